@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
+import asyncio
 import copy
 from datetime import timedelta
 import logging
 import math
+import random
 import re
 import time
 from typing import Callable
@@ -14,44 +16,129 @@ import async_timeout
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_PASSWORD,
-    CONF_SCAN_INTERVAL,
     CONF_URL,
     CONF_USERNAME,
     CONF_VERIFY_SSL,
 )
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.entity_registry import async_get
+from homeassistant.helpers.entity_registry import (
+    async_entries_for_config_entry,
+    async_get,
+)
 from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.util import slugify
 
 from .const import (
+    CONF_COMPRESS_RESPONSES,
     CONF_DEVICE_TRACKER_ENABLED,
     CONF_DEVICE_TRACKER_SCAN_INTERVAL,
+    CONF_DEVICES,
+    CONF_INTERFACE_COUNTERS_SCAN_INTERVAL,
     CONF_TLS_INSECURE,
-    COORDINATOR,
+    COORDINATORS,
+    DATA_DOMAIN_CARP,
+    DATA_DOMAIN_CONFIG,
+    DATA_DOMAIN_DATA,
+    DATA_DOMAIN_DEVICE_TRACKER,
+    DATA_DOMAIN_DHCP,
+    DATA_DOMAIN_FIRMWARE,
+    DATA_DOMAIN_INTERFACE_COUNTERS,
+    DATA_DOMAIN_NOTICES,
+    DATA_DOMAIN_SCAN_INTERVALS,
+    DATA_DOMAIN_SERVICES,
+    DATA_DOMAIN_TELEMETRY,
+    DATA_DOMAINS,
+    DEFAULT_COMPRESS_RESPONSES,
     DEFAULT_DEVICE_TRACKER_ENABLED,
     DEFAULT_DEVICE_TRACKER_SCAN_INTERVAL,
-    DEFAULT_SCAN_INTERVAL,
     DEFAULT_TLS_INSECURE,
     DEFAULT_VERIFY_SSL,
     DEVICE_TRACKER_COORDINATOR,
     DOMAIN,
+    FIRMWARE_SCAN_JITTER,
+    FIRMWARE_STORAGE_VERSION,
     LOADED_PLATFORMS,
-    PFSENSE_CLIENT,
+    MIN_INTERFACE_COUNTERS_SCAN_INTERVAL,
+    PFSENSE_ASYNC_CLIENT,
     PLATFORMS,
     SHOULD_RELOAD,
     UNDO_UPDATE_LISTENER,
 )
-from .pypfsense import Client as pfSenseClient
+from .pypfsense import (
+    DEFAULT_COMPRESS_THRESHOLD,
+    PRIORITY_BACKGROUND,
+    PRIORITY_TELEMETRY,
+    PRIORITY_USER,
+    RULE_INDEX_PROJECTION,
+    AsyncClient as pfSenseAsyncClient,
+    batch_result,
+)
 from .services import ServiceRegistrar
 
 _LOGGER = logging.getLogger(__name__)
 
+# counters that rates are calculated from between updates
+INTERFACE_COUNTERS = [
+    "inbytes",
+    "outbytes",
+    "inbytespass",
+    "outbytespass",
+    "inbytesblock",
+    "outbytesblock",
+    "inpkts",
+    "outpkts",
+    "inpktspass",
+    "outpktspass",
+    "inpktsblock",
+    "outpktsblock",
+]
+OPENVPN_SERVER_COUNTERS = [
+    "total_bytes_recv",
+    "total_bytes_sent",
+]
+
+# patterns for the (slugified) entity keys reading each data domain, a domain
+# without any enabled entity matching is not fetched, telemetry always is as it
+# refreshes the identity
+DATA_DOMAIN_ENTITY_KEYS = {
+    DATA_DOMAIN_INTERFACE_COUNTERS: r"telemetry_interface_.+(?<!_status)$",
+    DATA_DOMAIN_CONFIG: r"(filter|nat_port_forward|nat_outbound)_",
+    DATA_DOMAIN_SERVICES: r"service_",
+    DATA_DOMAIN_CARP: r"carp_",
+    DATA_DOMAIN_DHCP: r"dhcp_stats_",
+    DATA_DOMAIN_NOTICES: r"notices_",
+    DATA_DOMAIN_FIRMWARE: r"firmware_",
+}
+# same for the sections gathered by get_telemetry
+TELEMETRY_SECTION_ENTITY_KEYS = {
+    "pfstate": r"telemetry_pfstate_",
+    "mbuf": r"telemetry_mbuf_",
+    "memory": r"telemetry_memory_",
+    "system": r"telemetry_system_",
+    "cpu": r"telemetry_cpu_",
+    "filesystems": r"telemetry_filesystems_",
+    "interfaces": r"telemetry_interface_.+_status$",
+    "gateways": r"telemetry_gateway_",
+    "gateways_detail": r"telemetry_gateway_",
+    "openvpn": r"telemetry_openvpn_",
+}
+# everything is fetched this often so new entities are still discovered
+FULL_FETCH_INTERVAL = 3600
+
+# request priority of the data domains, anything else is PRIORITY_TELEMETRY
+DATA_DOMAIN_PRIORITIES = {
+    DATA_DOMAIN_DHCP: PRIORITY_BACKGROUND,
+    DATA_DOMAIN_FIRMWARE: PRIORITY_BACKGROUND,
+}
+
 
 def dict_get(data: dict, path: str, default=None):
     pathList = re.split(r"\.", path, flags=re.IGNORECASE)
@@ -67,6 +154,18 @@ def dict_get(data: dict, path: str, default=None):
     return result
 
 
+def index_get(data: dict, index: str, key: str, default=None):
+    """look up a single item in one of the indexes built for the state"""
+    try:
+        return data["index"][index].get(key, default)
+    except (KeyError, TypeError, AttributeError):
+        return default
+
+
+def normalize_filesystem_device_name(device_name):
+    return device_name.replace("/", "_slash_").strip("_")
+
+
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry):
     """Handle options update."""
     if hass.data[DOMAIN][entry.entry_id].get(SHOULD_RELOAD, True):
@@ -75,26 +174,25 @@ async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry):
         hass.data[DOMAIN][entry.entry_id][SHOULD_RELOAD] = True
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
-    """Set up pfSense from a config entry."""
-    config = entry.data
-    options = entry.options
-
-    url = config[CONF_URL]
-    username = config[CONF_USERNAME]
-    password = config[CONF_PASSWORD]
-    verify_ssl = config.get(CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL)
-    device_tracker_enabled = options.get(
-        CONF_DEVICE_TRACKER_ENABLED, DEFAULT_DEVICE_TRACKER_ENABLED
-    )
-    client = pfSenseClient(url, username, password, {"verify_ssl": verify_ssl})
-    data = PfSenseData(client, entry, hass)
-    scan_interval = options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
-
+def _create_coordinator(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    data: PfSenseData,
+    name: str,
+    scan_interval: int,
+    jitter: float = 0,
+) -> DataUpdateCoordinator:
     async def async_update_data():
         """Fetch data from pfSense."""
+        if jitter > 0:
+            # spread checks of many entries/restarts over time, the next
+            # refresh is scheduled with the interval set here
+            coordinator.update_interval = timedelta(
+                seconds=scan_interval + random.uniform(0, scan_interval * jitter)
+            )
+
         async with async_timeout.timeout(scan_interval - 1):
-            await hass.async_add_executor_job(lambda: data.update())
+            await data.async_update()
 
             if not data.state:
                 raise UpdateFailed(f"Error fetching {entry.title} pfSense state")
@@ -104,54 +202,110 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     coordinator = DataUpdateCoordinator(
         hass,
         _LOGGER,
-        name=f"{entry.title} pfSense state",
+        name=name,
         update_method=async_update_data,
         update_interval=timedelta(seconds=scan_interval),
     )
 
+    return coordinator
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Set up pfSense from a config entry."""
+    config = entry.data
+    options = entry.options
+
+    url = config[CONF_URL]
+    username = config[CONF_USERNAME]
+    password = config[CONF_PASSWORD]
+    verify_ssl = config.get(CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL)
+    device_tracker_enabled = options.get(
+        CONF_DEVICE_TRACKER_ENABLED, DEFAULT_DEVICE_TRACKER_ENABLED
+    )
+    client_opts = {"verify_ssl": verify_ssl}
+    if options.get(CONF_COMPRESS_RESPONSES, DEFAULT_COMPRESS_RESPONSES):
+        client_opts["compress_threshold"] = DEFAULT_COMPRESS_THRESHOLD
+    async_client = pfSenseAsyncClient(
+        url,
+        username,
+        password,
+        client_opts,
+        session=async_get_clientsession(hass, verify_ssl=verify_ssl),
+    )
+    identity = {}
+    coordinators = {}
+    data_domain_data = {}
+    scan_intervals = {}
+    for data_domain in DATA_DOMAINS:
+        conf_key, default_scan_interval = DATA_DOMAIN_SCAN_INTERVALS[data_domain]
+        scan_interval = default_scan_interval
+        if conf_key is not None:
+            scan_interval = options.get(conf_key, default_scan_interval)
+        if conf_key == CONF_INTERFACE_COUNTERS_SCAN_INTERVAL:
+            # options saved before the minimum was raised
+            scan_interval = max(scan_interval, MIN_INTERFACE_COUNTERS_SCAN_INTERVAL)
+        scan_intervals[data_domain] = scan_interval
+
+        data_domain_data[data_domain] = PfSenseData(
+            async_client, entry, hass, data_domain, identity
+        )
+        coordinators[data_domain] = _create_coordinator(
+            hass,
+            entry,
+            data_domain_data[data_domain],
+            f"{entry.title} pfSense {data_domain} state",
+            scan_interval,
+            FIRMWARE_SCAN_JITTER if data_domain == DATA_DOMAIN_FIRMWARE else 0,
+        )
+
     platforms = PLATFORMS.copy()
     device_tracker_coordinator = None
     if not device_tracker_enabled:
         platforms.remove("device_tracker")
     else:
-        device_tracker_data = PfSenseData(client, entry, hass)
         device_tracker_scan_interval = options.get(
             CONF_DEVICE_TRACKER_SCAN_INTERVAL, DEFAULT_DEVICE_TRACKER_SCAN_INTERVAL
         )
-
-        async def async_update_device_tracker_data():
-            """Fetch data from pfSense."""
-            async with async_timeout.timeout(device_tracker_scan_interval - 1):
-                await hass.async_add_executor_job(
-                    lambda: device_tracker_data.update({"scope": "device_tracker"})
-                )
-
-                if not device_tracker_data.state:
-                    raise UpdateFailed(f"Error fetching {entry.title} pfSense state")
-
-                return device_tracker_data.state
-
-        device_tracker_coordinator = DataUpdateCoordinator(
+        device_tracker_coordinator = _create_coordinator(
             hass,
-            _LOGGER,
-            name=f"{entry.title} pfSense device tracker state",
-            update_method=async_update_device_tracker_data,
-            update_interval=timedelta(seconds=device_tracker_scan_interval),
+            entry,
+            PfSenseData(
+                async_client, entry, hass, DATA_DOMAIN_DEVICE_TRACKER, identity
+            ),
+            f"{entry.title} pfSense device tracker state",
+            device_tracker_scan_interval,
         )
 
     undo_listener = entry.add_update_listener(_async_update_listener)
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
-        COORDINATOR: coordinator,
+        COORDINATORS: coordinators,
+        DATA_DOMAIN_DATA: data_domain_data,
         DEVICE_TRACKER_COORDINATOR: device_tracker_coordinator,
-        PFSENSE_CLIENT: client,
+        PFSENSE_ASYNC_CLIENT: async_client,
         UNDO_UPDATE_LISTENER: [undo_listener],
         LOADED_PLATFORMS: platforms,
     }
 
     # Fetch initial data so we have data when entities subscribe
-    await coordinator.async_config_entry_first_refresh()
+    for data_domain, coordinator in coordinators.items():
+        # firmware checks can take minutes, its entities are added once done
+        if data_domain == DATA_DOMAIN_FIRMWARE:
+            continue
+        await coordinator.async_config_entry_first_refresh()
+
+    # the last firmware check is restored, the next one runs once it is due
+    firmware_data = data_domain_data[DATA_DOMAIN_FIRMWARE]
+    firmware_coordinator = coordinators[DATA_DOMAIN_FIRMWARE]
+    check_time = await firmware_data.async_restore_firmware_update_info()
+    if check_time is None:
+        hass.async_create_task(firmware_coordinator.async_refresh())
+    else:
+        due = check_time + scan_intervals[DATA_DOMAIN_FIRMWARE] - time.time()
+        firmware_coordinator.update_interval = timedelta(seconds=max(due, 60))
+        firmware_coordinator.async_set_updated_data(firmware_data.state)
+
     if device_tracker_enabled:
         # Fetch initial data so we have data when entities subscribe
         await device_tracker_coordinator.async_config_entry_first_refresh()
@@ -173,11 +327,21 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         listener()
 
     if unload_ok:
+        await hass.data[DOMAIN][entry.entry_id][PFSENSE_ASYNC_CLIENT].close()
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored data of a config entry."""
+    await _get_firmware_store(hass, entry).async_remove()
+
+
+def _get_firmware_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    return Store(hass, FIRMWARE_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.firmware")
+
+
 async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Migrate an old config entry."""
     version = config_entry.version
@@ -210,324 +374,642 @@ async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
 
 class PfSenseData:
     def __init__(
-        self, client: pfSenseClient, config_entry: ConfigEntry, hass: HomeAssistant
+        self,
+        client: pfSenseAsyncClient,
+        config_entry: ConfigEntry,
+        hass: HomeAssistant,
+        data_domain: str,
+        identity: dict,
     ):
         """Initialize the data object."""
         self._client = client
         self._config_entry = config_entry
         self._hass = hass
+        self._data_domain = data_domain
+        # system_info and host_firmware_version, shared by all data domains
+        self._identity = identity
         self._state = {}
-        self._firmware_update_info = None
-        self._background_tasks = set()
+        self._rule_index = None
+        self._rule_index_config = None
+        self._full_fetch_time = None
+        # merged dhcp lease table (by mac|ip) and its stats, see _update_dhcp
+        self._dhcp_leases = {}
+        self._dhcp_leases_generation = None
+        self._dhcp_lease_stats = None
+        # keys of the enabled entities, None to fetch everything
+        self._enabled_entity_keys = None
+        # the running firmware check and whether the next one skips the cache
+        self._firmware_check = None
+        self._firmware_use_cache = True
 
     @property
     def state(self):
         return self._state
 
     def _log_timing(func):
-        def inner(*args, **kwargs):
-            begin = time.time()
-            response = func(*args, **kwargs)
+        def log(begin):
             end = time.time()
             elapsed = round((end - begin), 3)
             _LOGGER.debug(f"execution time: PfSenseData.{func.__name__} {elapsed}")
 
-            return response
+        if asyncio.iscoroutinefunction(func):
 
-        return inner
+            async def async_inner(*args, **kwargs):
+                begin = time.time()
+                response = await func(*args, **kwargs)
+                log(begin)
 
-    @_log_timing
-    def _get_system_info(self):
-        return self._client.get_system_info()
+                return response
 
-    @_log_timing
-    def _refresh_firmware_update_info(self):
-        try:
-            self._firmware_update_info = self._client.get_firmware_update_info()
+            return async_inner
 
-        except BaseException as err:
-            # can take some time to refresh data
-            # will catch it the next cycle likely
-            if "timed out" in str(err):
-                return
-            raise err
+        def inner(*args, **kwargs):
+            begin = time.time()
+            response = func(*args, **kwargs)
+            log(begin)
 
-    @_log_timing
-    def _get_firmware_update_info(self):
-        return self._firmware_update_info
+            return response
 
-    @_log_timing
-    def _get_telemetry(self):
-        return self._client.get_telemetry()
+        return inner
 
     @_log_timing
-    def _get_host_firmware_version(self):
-        return self._client.get_host_firmware_version()
+    async def _exec_php_batch(self, calls):
+        results = await self._client.exec_php_batch(calls)
+        _LOGGER.debug(f"payload stats: {self._client.payload_stats}")
 
-    @_log_timing
-    def _get_config(self):
-        return self._client.get_config()
+        return results
 
     @_log_timing
-    def _get_interfaces(self):
-        return self._client.get_interfaces()
+    def _enabled_tracked_macs(self):
+        """the lowercased macs of the configured devices with an enabled tracker"""
+        device_id = dict_get(self._identity, "system_info.netgate_device_id")
+        if device_id is None:
+            return set()
+
+        registry = async_get(self._hass)
+        enabled = set()
+        for entry in async_entries_for_config_entry(
+            registry, self._config_entry.entry_id
+        ):
+            if entry.domain == "device_tracker" and entry.disabled_by is None:
+                enabled.add(entry.unique_id)
+
+        # tracker unique ids are slugify(f"{device_id}_mac_{mac}")
+        macs = set()
+        for mac in self._config_entry.options.get(CONF_DEVICES, []):
+            if slugify(f"{device_id}_mac_{mac}") in enabled:
+                macs.add(mac.lower())
+
+        return macs
+
+    async def _flush_tracked_arp_entries(self, arp_table):
+        # removing the entries of tracked devices forces them to be
+        # re-resolved, so devices that left drop out of the table
+        tracked_macs = self._enabled_tracked_macs()
+        ips = []
+        for entry in arp_table:
+            if entry.get("mac-address", "").lower() not in tracked_macs:
+                continue
+            ip_address = entry.get("ip-address")
+            if ip_address is not None and len(ip_address) > 0:
+                ips.append(ip_address)
+
+        if len(ips) > 0:
+            await self._client.delete_arp_entries(ips)
+
+    def _get_counter_snapshot(self, state):
+        """
+        the subset of state rates are calculated from, in the same shape as
+        the state itself
+        """
+        snapshot = {}
+        if "update_time" in state:
+            snapshot["update_time"] = state["update_time"]
+
+        cpu = dict_get(state, "telemetry.cpu")
+        interfaces = dict_get(state, "telemetry.interfaces")
+        servers = dict_get(state, "telemetry.openvpn.servers")
+        if cpu is None and interfaces is None and servers is None:
+            return snapshot
+
+        telemetry = snapshot["telemetry"] = {}
+        if cpu is not None:
+            telemetry["cpu"] = {
+                "ticks": {
+                    "total": dict_get(cpu, "ticks.total"),
+                    "idle": dict_get(cpu, "ticks.idle"),
+                },
+                "used_percent": cpu.get("used_percent"),
+            }
+
+        if interfaces is not None:
+            telemetry["interfaces"] = {
+                interface_name: {
+                    property: interface[property]
+                    for property in INTERFACE_COUNTERS
+                    if property in interface
+                }
+                for interface_name, interface in interfaces.items()
+            }
+
+        if servers is not None:
+            telemetry["openvpn"] = {
+                "servers": {
+                    vpnid: {
+                        property: server[property]
+                        for property in OPENVPN_SERVER_COUNTERS
+                        if property in server
+                    }
+                    for vpnid, server in servers.items()
+                }
+            }
+
+        return snapshot
+
+    def _get_rule_index(self, config):
+        # the config is cached between revisions so only reindex when it changes
+        if config is self._rule_index_config:
+            return self._rule_index
+
+        index = {
+            "filter_rules": {},
+            "nat_port_forward_rules": {},
+            "nat_outbound_rules": {},
+        }
+        for name, path, tracker_path in [
+            ("filter_rules", "filter.rule", "tracker"),
+            ("nat_port_forward_rules", "nat.rule", "created.time"),
+            ("nat_outbound_rules", "nat.outbound.rule", "created.time"),
+        ]:
+            rules = dict_get(config, path)
+            if not isinstance(rules, list):
+                continue
+            for rule in rules:
+                if not isinstance(rule, dict):
+                    continue
+                tracker = dict_get(rule, tracker_path)
+                if tracker is not None:
+                    index[name].setdefault(tracker, rule)
+
+        self._rule_index = index
+        self._rule_index_config = config
+        return index
 
     @_log_timing
-    def _get_services(self):
-        return self._client.get_services()
+    def _build_index(self, state):
+        """index the lists in state so entities can look up items directly"""
+        index = {}
+
+        if "config" in state:
+            index.update(self._get_rule_index(state["config"]))
+
+        if "services" in state:
+            index["services"] = {}
+            for service in state["services"]:
+                key = service["name"]
+                if key == "openvpn":
+                    key = f"{key}-{service.get('vpnid')}"
+                index["services"].setdefault(key, service)
+
+        if "carp_interfaces" in state:
+            index["carp_interfaces"] = {}
+            for interface in state["carp_interfaces"]:
+                index["carp_interfaces"].setdefault(interface["uniqid"], interface)
+
+        filesystems = dict_get(state, "telemetry.filesystems")
+        if filesystems is not None:
+            index["filesystems"] = {}
+            for filesystem in filesystems:
+                device_clean = normalize_filesystem_device_name(filesystem["device"])
+                index["filesystems"].setdefault(device_clean, filesystem)
+
+        arp_table = dict_get(state, "arp_table")
+        if arp_table is not None:
+            index["arp_table"] = {}
+            for entry in arp_table:
+                mac_address = entry.get("mac-address", "").lower()
+                index["arp_table"].setdefault(mac_address, entry)
+
+        return index
+
+    def _get_enabled_entity_keys(self, current_time):
+        """
+        the slugified keys of the enabled entities of the config entry, or
+        None when everything should be fetched
+        """
+        if (
+            self._full_fetch_time is None
+            or current_time - self._full_fetch_time >= FULL_FETCH_INTERVAL
+        ):
+            return None
+
+        device_id = dict_get(self._identity, "system_info.netgate_device_id")
+        if device_id is None:
+            return None
+
+        # unique ids are slugify(f"{device_id}_{key}")
+        prefix = f"{slugify(device_id)}_"
+        registry = async_get(self._hass)
+        keys = set()
+        for entry in async_entries_for_config_entry(
+            registry, self._config_entry.entry_id
+        ):
+            if entry.disabled_by is not None:
+                continue
+            if entry.unique_id.startswith(prefix):
+                keys.add(entry.unique_id[len(prefix) :])
+
+        return keys
+
+    def _is_wanted(self, pattern):
+        """whether any enabled entity key matches the pattern"""
+        if self._enabled_entity_keys is None or pattern is None:
+            return True
+
+        return any(re.match(pattern, key) for key in self._enabled_entity_keys)
+
+    async def _exec_domain_batch(self, calls):
+        """
+        run the calls of the data domain as a single batch, checking the
+        identity of the firewall shared by all domains along with them
+
+        the identity itself is cached by the client and only refetched when
+        its boottime or config revision changed
+        """
+        calls = dict(calls)
+        refresh_identity = (
+            self._data_domain == DATA_DOMAIN_TELEMETRY or not self._identity
+        )
+        if refresh_identity:
+            calls["identity_key"] = "get_identity_key"
+        if len(calls) < 1:
+            return {}
+
+        results = await self._exec_php_batch(calls)
+        if refresh_identity:
+            self._identity.update(
+                await self._client.get_cached_identity(
+                    batch_result(results, "identity_key")
+                )
+            )
+
+        return results
+
+    async def _update_telemetry(self, new_state):
+        sections = None
+        if self._enabled_entity_keys is not None:
+            sections = [
+                section
+                for section, pattern in TELEMETRY_SECTION_ENTITY_KEYS.items()
+                if self._is_wanted(pattern)
+            ]
+
+        calls = {}
+        if sections is None or len(sections) > 0:
+            calls["telemetry"] = ("get_telemetry", [sections])
+        results = await self._exec_domain_batch(calls)
+
+        new_state["telemetry"] = {}
+        if "telemetry" in calls:
+            new_state["telemetry"] = batch_result(results, "telemetry")
+
+        # sections not fetched keep their last known value for entity discovery,
+        # copied as the rates below are written into the sections
+        for section, value in self._state.get("telemetry", {}).items():
+            if section not in new_state["telemetry"]:
+                new_state["telemetry"][section] = copy.copy(value)
+
+        previous_state = new_state["previous_state"]
+
+        # calcule pps and kbps
+        update_time = dict_get(new_state, "update_time")
+        previous_update_time = dict_get(new_state, "previous_state.update_time")
+
+        if previous_update_time is not None:
+            elapsed_time = update_time - previous_update_time
+
+            # calculate CPU Usage based on ticks
+            # /usr/local/www/widgets/widgets/system_information.widget.php
+            previous_cpu = dict_get(new_state, "previous_state.telemetry.cpu")
+            if previous_cpu is not None:
+                current_cpu = dict_get(new_state, "telemetry.cpu")
+                if (
+                    dict_get(previous_cpu, "ticks.total")
+                    <= dict_get(current_cpu, "ticks.total")
+                ) and (
+                    dict_get(previous_cpu, "ticks.idle")
+                    <= dict_get(current_cpu, "ticks.idle")
+                ):
+                    total_change = dict_get(current_cpu, "ticks.total") - dict_get(
+                        previous_cpu, "ticks.total"
+                    )
+                    idle_change = dict_get(current_cpu, "ticks.idle") - dict_get(
+                        previous_cpu, "ticks.idle"
+                    )
+                    # avoid division by 0 issues
+                    if total_change > 0:
+                        cpu_used_percent = math.floor(
+                            ((total_change - idle_change) / total_change) * 100
+                        )
+                        new_state["telemetry"]["cpu"]["used_percent"] = cpu_used_percent
+                    else:
+                        new_state["telemetry"]["cpu"]["used_percent"] = dict_get(
+                            previous_state, "telemetry.cpu.used_percent"
+                        )
 
-    @_log_timing
-    def _get_carp_interfaces(self):
-        return self._client.get_carp_interfaces()
+            # the rates are written into the servers, which a section carried
+            # over still shares with the previous state
+            if isinstance(dict_get(new_state, "telemetry.openvpn.servers"), dict):
+                openvpn = new_state["telemetry"]["openvpn"]
+                openvpn["servers"] = {
+                    server_name: dict(server)
+                    for server_name, server in openvpn["servers"].items()
+                }
+
+            for server_name in dict_get(
+                new_state, "telemetry.openvpn.servers", {}
+            ).keys():
+                if (
+                    server_name
+                    not in dict_get(new_state, "telemetry.openvpn.servers", {}).keys()
+                ):
+                    continue
+
+                if (
+                    server_name
+                    not in dict_get(
+                        new_state,
+                        "previous_state.telemetry.openvpn.servers",
+                        {},
+                    ).keys()
+                ):
+                    continue
+
+                server = new_state["telemetry"]["openvpn"]["servers"][server_name]
+                previous_server = new_state["previous_state"]["telemetry"]["openvpn"][
+                    "servers"
+                ][server_name]
+
+                for property in OPENVPN_SERVER_COUNTERS:
+
+                    current_parent_value = server[property]
+                    previous_parent_value = previous_server[property]
+                    change = abs(current_parent_value - previous_parent_value)
+                    rate = change / elapsed_time
+
+                    value = 0
+                    if "pkts" in property:
+                        label = "packets_per_second"
+                        value = rate
+                    if "bytes" in property:
+                        label = "kilobytes_per_second"
+                        # 1 Byte = 8 bits
+                        # 1 byte is equal to 0.001 kilobytes
+                        KBs = rate / 1000
+                        # Kbs = KBs * 8
+                        value = KBs
+
+                    new_property = f"{property}_{label}"
+                    server[new_property] = int(round(value, 0))
+
+    async def _update_interface_counters(self, new_state):
+        results = await self._exec_domain_batch(
+            {"interface_counters": "get_interface_counters"}
+        )
+        # same shape as telemetry so the interface sensors work with either
+        new_state["telemetry"] = {
+            "interfaces": batch_result(results, "interface_counters")
+        }
 
-    @_log_timing
-    def _get_carp_status(self):
-        return self._client.get_carp_status()
+        # calcule pps and kbps
+        update_time = dict_get(new_state, "update_time")
+        previous_update_time = dict_get(new_state, "previous_state.update_time")
 
-    @_log_timing
-    def _get_dhcp_leases(self):
-        return self._client.get_dhcp_leases(False)
+        if previous_update_time is not None:
+            elapsed_time = update_time - previous_update_time
 
-    @_log_timing
-    def _are_notices_pending(self):
-        return self._client.are_notices_pending()
+            for interface_name in dict_get(
+                new_state, "telemetry.interfaces", {}
+            ).keys():
+                interface = dict_get(
+                    new_state, f"telemetry.interfaces.{interface_name}"
+                )
+                previous_interface = dict_get(
+                    new_state,
+                    f"previous_state.telemetry.interfaces.{interface_name}",
+                )
+                if previous_interface is None:
+                    break
+
+                for property in INTERFACE_COUNTERS:
+
+                    current_parent_value = interface[property]
+                    previous_parent_value = previous_interface[property]
+                    change = abs(current_parent_value - previous_parent_value)
+                    rate = change / elapsed_time
+
+                    value = 0
+                    if "pkts" in property:
+                        label = "packets_per_second"
+                        value = rate
+                    if "bytes" in property:
+                        label = "kilobytes_per_second"
+                        # 1 Byte = 8 bits
+                        # 1 byte is equal to 0.001 kilobytes
+                        KBs = rate / 1000
+                        # Kbs = KBs * 8
+                        value = KBs
+
+                    new_property = f"{property}_{label}"
+                    interface[new_property] = int(round(value, 0))
+
+    async def _update_config(self, new_state):
+        results = await self._exec_domain_batch(
+            {
+                "config_revision": "get_config_revision",
+                "interfaces": "get_interfaces",
+            }
+        )
+        # the config is only refetched when its revision changes and
+        # is limited to the rule fields used by the switch entities
+        new_state["config"] = await self._client.get_cached_config(
+            batch_result(results, "config_revision"), RULE_INDEX_PROJECTION
+        )
+        new_state["interfaces"] = batch_result(results, "interfaces")
+
+    async def _update_services(self, new_state):
+        results = await self._exec_domain_batch({"services": "get_services"})
+        new_state["services"] = batch_result(results, "services")
+
+    async def _update_carp(self, new_state):
+        # every vip status comes from one server side ifconfig snapshot
+        results = await self._exec_domain_batch({"carp": "get_carp_state"})
+        carp = batch_result(results, "carp")
+        if carp is None:
+            carp = {}
+        new_state["carp_interfaces"] = carp.get("interfaces")
+        new_state["carp_status"] = carp.get("status")
+        new_state["carp_maintenance_mode"] = carp.get("maintenance_mode")
+
+    def _count_dhcp_lease(self, lease, sign):
+        """add (sign=1) or remove (sign=-1) a lease from the lease stats"""
+        if lease is None:
+            return
+        if "act" in lease.keys() and lease["act"] == "expired":
+            return
+
+        lease_stats = self._dhcp_lease_stats
+        lease_stats["total"] += sign
+        if "online" in lease.keys():
+            if lease["online"] in ["active", "active/online", "online"]:
+                lease_stats["online"] += sign
+            if lease["online"] in ["offline", "idle/offline", "idle"]:
+                lease_stats["idle_offline"] += sign
+
+    def _merge_dhcp_leases_delta(self, delta):
+        """apply a get_dhcp_leases_delta result to the lease table and stats"""
+        if delta["mode"] == "unchanged":
+            return
+
+        if delta["mode"] == "full" or self._dhcp_lease_stats is None:
+            self._dhcp_leases = {}
+            self._dhcp_lease_stats = {"total": 0, "online": 0, "idle_offline": 0}
+
+        for key in delta.get("removed", []):
+            self._count_dhcp_lease(self._dhcp_leases.pop(key, None), -1)
+
+        for key, lease in delta["leases"].items():
+            self._count_dhcp_lease(self._dhcp_leases.get(key), -1)
+            self._dhcp_leases[key] = lease
+            self._count_dhcp_lease(lease, 1)
+
+        self._dhcp_leases_generation = delta["generation"]
+
+    async def _update_dhcp(self, new_state):
+        # only the leases changed since the last update are transferred
+        generation = self._dhcp_leases_generation
+        results = await self._exec_domain_batch(
+            {"dhcp_leases": ("get_dhcp_leases_delta", [generation, False])}
+        )
+        self._merge_dhcp_leases_delta(batch_result(results, "dhcp_leases"))
+
+        new_state["dhcp_leases"] = list(self._dhcp_leases.values())
+        new_state["dhcp_stats"] = {}
+        new_state["dhcp_stats"]["leases"] = dict(self._dhcp_lease_stats)
+
+    async def _update_notices(self, new_state):
+        # the notices list is only transferred when its hash changed
+        results = await self._exec_domain_batch({"notices": "get_pending_notices"})
+        new_state["notices"] = batch_result(results, "notices")
+
+    async def _check_firmware(self, use_cache):
+        info = await self._client.get_firmware_update_info(use_cache)
+        if info is not None:
+            await _get_firmware_store(self._hass, self._config_entry).async_save(
+                {"time": time.time(), "firmware_update_info": info}
+            )
+
+        return info
+
+    async def _update_firmware(self, new_state):
+        await self._exec_domain_batch({})
+        # a single check at a time, a refresh while one is running waits for it
+        if self._firmware_check is None or self._firmware_check.done():
+            use_cache = self._firmware_use_cache
+            self._firmware_use_cache = True
+            self._firmware_check = self._hass.async_create_task(
+                self._check_firmware(use_cache)
+            )
+        try:
+            # shielded so a cancelled refresh does not abort the check
+            new_state["firmware_update_info"] = await asyncio.shield(
+                self._firmware_check
+            )
+        except BaseException as err:
+            # can take some time to refresh data
+            # keep the last known info and catch it the next cycle likely
+            if isinstance(err, asyncio.TimeoutError) or "timed out" in str(err):
+                _LOGGER.warning(
+                    f"firmware update check timed out, keeping the last result {err=}"
+                )
+                new_state["firmware_update_info"] = self._state.get(
+                    "firmware_update_info"
+                )
+                return
+            raise err
 
-    @_log_timing
-    def _get_notices(self):
-        return self._client.get_notices()
+    def request_firmware_check(self):
+        """skip the firewall side cache on the next firmware check"""
+        self._firmware_use_cache = False
+
+    async def async_restore_firmware_update_info(self):
+        """
+        restore the state from the last stored firmware check, returns the
+        time of that check or None when there is none
+        """
+        stored = await _get_firmware_store(self._hass, self._config_entry).async_load()
+        if not stored:
+            return None
+
+        new_state = {
+            "update_time": stored["time"],
+            "previous_state": {},
+            "firmware_update_info": stored["firmware_update_info"],
+        }
+        new_state.update(self._identity)
+        new_state["index"] = self._build_index(new_state)
+        self._state = new_state
 
-    @_log_timing
-    def _get_arp_table(self):
-        return self._client.get_arp_table(True)
+        return stored["time"]
 
-    def update(self, opts={}):
-        """Fetch the latest state from pfSense."""
+    async def _update_device_tracker(self, new_state):
+        results = await self._exec_domain_batch(
+            {"arp_table": ("get_arp_table", [True])}
+        )
+        try:
+            new_state["arp_table"] = batch_result(results, "arp_table")
+        except BaseException as err:
+            message = f"failed to retrieve arp table {err=}, {type(err)=}"
+            _LOGGER.error(message)
+        else:
+            try:
+                await self._flush_tracked_arp_entries(new_state["arp_table"])
+            except BaseException as err:
+                message = f"failed to flush arp entries {err=}, {type(err)=}"
+                _LOGGER.error(message)
+
+    async def async_update(self):
+        """Fetch the latest state of the data domain from pfSense."""
         new_state = {}
 
         try:
             current_time = time.time()
 
-            # copy the old data to have around
-            previous_state = copy.deepcopy(self._state)
-            if "previous_state" in previous_state.keys():
-                del previous_state["previous_state"]
+            # keep only what is needed from the old data to calculate rates
+            previous_state = self._get_counter_snapshot(self._state)
 
             # ensure clean state each interval
 
             new_state["update_time"] = current_time
             new_state["previous_state"] = previous_state
 
-            new_state["system_info"] = self._get_system_info()
-            new_state["host_firmware_version"] = self._get_host_firmware_version()
+            self._enabled_entity_keys = self._get_enabled_entity_keys(current_time)
+            if not self._is_wanted(DATA_DOMAIN_ENTITY_KEYS.get(self._data_domain)):
+                # nothing enabled reads this data domain, keep the last state
+                return
 
-            if "scope" in opts.keys() and opts["scope"] == "device_tracker":
-                try:
-                    new_state["arp_table"] = self._get_arp_table()
-                except BaseException as err:
-                    message = f"failed to retrieve arp table {err=}, {type(err)=}"
-                    _LOGGER.error(message)
-            else:
-                # queue up the firmaware task
-                # task = self._hass.loop.create_task(self._refresh_firmware_update_info())
-                # self._background_tasks.add(task)
-                # task.add_done_callback(self._background_tasks.discard)
-                self._hass.add_job(self._refresh_firmware_update_info)
-
-                new_state["firmware_update_info"] = self._get_firmware_update_info()
-                new_state["telemetry"] = self._get_telemetry()
-                new_state["config"] = self._get_config()
-                new_state["interfaces"] = self._get_interfaces()
-                new_state["services"] = self._get_services()
-                new_state["carp_interfaces"] = self._get_carp_interfaces()
-                new_state["carp_status"] = self._get_carp_status()
-                new_state["dhcp_leases"] = self._get_dhcp_leases()
-                new_state["dhcp_stats"] = {}
-                new_state["notices"] = {}
-                new_state["notices"][
-                    "pending_notices_present"
-                ] = self._are_notices_pending()
-                new_state["notices"]["pending_notices"] = self._get_notices()
-
-                lease_stats = {"total": 0, "online": 0, "idle_offline": 0}
-                for lease in new_state["dhcp_leases"]:
-                    if "act" in lease.keys() and lease["act"] == "expired":
-                        continue
-
-                    lease_stats["total"] += 1
-                    if "online" in lease.keys():
-                        if lease["online"] in ["active", "active/online", "online"]:
-                            lease_stats["online"] += 1
-                        if lease["online"] in ["offline", "idle/offline", "idle"]:
-                            lease_stats["idle_offline"] += 1
-
-                new_state["dhcp_stats"]["leases"] = lease_stats
-
-                # calcule pps and kbps
-                scan_interval = self._config_entry.options.get(
-                    CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
-                )
-                update_time = dict_get(new_state, "update_time")
-                previous_update_time = dict_get(new_state, "previous_state.update_time")
-
-                if previous_update_time is not None:
-                    elapsed_time = update_time - previous_update_time
-
-                    # calculate CPU Usage based on ticks
-                    # /usr/local/www/widgets/widgets/system_information.widget.php
-                    previous_cpu = dict_get(new_state, "previous_state.telemetry.cpu")
-                    if previous_cpu is not None:
-                        current_cpu = dict_get(new_state, "telemetry.cpu")
-                        if (
-                            dict_get(previous_cpu, "ticks.total")
-                            <= dict_get(current_cpu, "ticks.total")
-                        ) and (
-                            dict_get(previous_cpu, "ticks.idle")
-                            <= dict_get(current_cpu, "ticks.idle")
-                        ):
-                            total_change = dict_get(
-                                current_cpu, "ticks.total"
-                            ) - dict_get(previous_cpu, "ticks.total")
-                            idle_change = dict_get(
-                                current_cpu, "ticks.idle"
-                            ) - dict_get(previous_cpu, "ticks.idle")
-                            # avoid division by 0 issues
-                            if total_change > 0:
-                                cpu_used_percent = math.floor(
-                                    ((total_change - idle_change) / total_change) * 100
-                                )
-                                new_state["telemetry"]["cpu"][
-                                    "used_percent"
-                                ] = cpu_used_percent
-                            else:
-                                new_state["telemetry"]["cpu"]["used_percent"] = (
-                                    dict_get(
-                                        previous_state, "telemetry.cpu.used_percent"
-                                    )
-                                )
-
-                    for interface_name in dict_get(
-                        new_state, "telemetry.interfaces", {}
-                    ).keys():
-                        interface = dict_get(
-                            new_state, f"telemetry.interfaces.{interface_name}"
-                        )
-                        previous_interface = dict_get(
-                            new_state,
-                            f"previous_state.telemetry.interfaces.{interface_name}",
-                        )
-                        if previous_interface is None:
-                            break
-
-                        for property in [
-                            "inbytes",
-                            "outbytes",
-                            "inbytespass",
-                            "outbytespass",
-                            "inbytesblock",
-                            "outbytesblock",
-                            "inpkts",
-                            "outpkts",
-                            "inpktspass",
-                            "outpktspass",
-                            "inpktsblock",
-                            "outpktsblock",
-                        ]:
-
-                            current_parent_value = interface[property]
-                            previous_parent_value = previous_interface[property]
-                            change = abs(current_parent_value - previous_parent_value)
-                            rate = change / elapsed_time
-
-                            value = 0
-                            if "pkts" in property:
-                                label = "packets_per_second"
-                                value = rate
-                            if "bytes" in property:
-                                label = "kilobytes_per_second"
-                                # 1 Byte = 8 bits
-                                # 1 byte is equal to 0.001 kilobytes
-                                KBs = rate / 1000
-                                # Kbs = KBs * 8
-                                value = KBs
-
-                            new_property = f"{property}_{label}"
-                            interface[new_property] = int(round(value, 0))
-
-                            continue
-
-                            # TODO: this logic is not perfect but probably 'good enough'
-                            # to make this perfect the stats should probably be their own
-                            # coordinator
-                            #
-                            # put this here to prevent over-agressive calculations when
-                            # data is refreshed due to switches being triggered etc
-                            #
-                            # theoretically if switches are going on/off rapidly the value
-                            # would never get updated as the code currently is
-                            if elapsed_time >= scan_interval:
-                                interface[new_property] = int(round(value, 0))
-                            else:
-                                previous_value = dict_get(
-                                    previous_interface, new_property
-                                )
-                                if previous_value is None:
-                                    previous_value = value
-                                interface[new_property] = int(round(previous_value, 0))
-
-                    for server_name in dict_get(
-                        new_state, "telemetry.openvpn.servers", {}
-                    ).keys():
-                        if (
-                            server_name
-                            not in dict_get(
-                                new_state, "telemetry.openvpn.servers", {}
-                            ).keys()
-                        ):
-                            continue
-
-                        if (
-                            server_name
-                            not in dict_get(
-                                new_state,
-                                "previous_state.telemetry.openvpn.servers",
-                                {},
-                            ).keys()
-                        ):
-                            continue
-
-                        server = new_state["telemetry"]["openvpn"]["servers"][
-                            server_name
-                        ]
-                        previous_server = new_state["previous_state"]["telemetry"][
-                            "openvpn"
-                        ]["servers"][server_name]
-
-                        for property in [
-                            "total_bytes_recv",
-                            "total_bytes_sent",
-                        ]:
-
-                            current_parent_value = server[property]
-                            previous_parent_value = previous_server[property]
-                            change = abs(current_parent_value - previous_parent_value)
-                            rate = change / elapsed_time
-
-                            value = 0
-                            if "pkts" in property:
-                                label = "packets_per_second"
-                                value = rate
-                            if "bytes" in property:
-                                label = "kilobytes_per_second"
-                                # 1 Byte = 8 bits
-                                # 1 byte is equal to 0.001 kilobytes
-                                KBs = rate / 1000
-                                # Kbs = KBs * 8
-                                value = KBs
-
-                            new_property = f"{property}_{label}"
-                            server[new_property] = int(round(value, 0))
+            update = getattr(self, f"_update_{self._data_domain}")
+            priority = DATA_DOMAIN_PRIORITIES.get(self._data_domain, PRIORITY_TELEMETRY)
+            with self._client.priority(priority):
+                await update(new_state)
+            if self._enabled_entity_keys is None:
+                self._full_fetch_time = current_time
+
+            new_state.update(self._identity)
+            new_state["index"] = self._build_index(new_state)
         except BaseException as err:
             # still replace current state as best we can
+            new_state.update(self._identity)
             self._state = new_state
             raise err
 
@@ -634,37 +1116,45 @@ class PfSenseEntity(CoordinatorEntity, RestoreEntity):
 
         return value
 
-    def _get_pfsense_client(self) -> pfSenseClient:
-        return self.hass.data[DOMAIN][self.config_entry.entry_id][PFSENSE_CLIENT]
+    def _get_pfsense_async_client(self) -> pfSenseAsyncClient:
+        return self.hass.data[DOMAIN][self.config_entry.entry_id][PFSENSE_ASYNC_CLIENT]
 
-    def service_close_notice(self, id: int | str | None = None):
-        client = self._get_pfsense_client()
-        client.close_notice(id)
+    async def _async_client_action(self, method: str, *args, **kwargs):
+        """
+        run a user initiated client call, it shares the request slots of the
+        polling and goes ahead of any waiting telemetry or background calls
+        """
+        client = self._get_pfsense_async_client()
+        with client.priority(PRIORITY_USER):
+            return await getattr(client, method)(*args, **kwargs)
 
-    def service_file_notice(self, **kwargs):
-        client = self._get_pfsense_client()
-        client.file_notice(**kwargs)
+    async def service_refresh_firmware_update_info(self):
+        entry_data = self.hass.data[DOMAIN][self.config_entry.entry_id]
+        entry_data[DATA_DOMAIN_DATA][DATA_DOMAIN_FIRMWARE].request_firmware_check()
+        await entry_data[COORDINATORS][DATA_DOMAIN_FIRMWARE].async_refresh()
 
-    def service_start_service(
+    async def service_close_notice(self, id: int | str | None = None):
+        await self._async_client_action("close_notice", id)
+
+    async def service_file_notice(self, **kwargs):
+        await self._async_client_action("file_notice", **kwargs)
+
+    async def service_start_service(
         self, service_name: str, service: dict | str | None = None
     ):
-        client = self._get_pfsense_client()
-        client.start_service(service_name, service)
+        await self._async_client_action("start_service", service_name, service)
 
-    def service_stop_service(
+    async def service_stop_service(
         self, service_name: str, service: dict | str | None = None
     ):
-        client = self._get_pfsense_client()
-        client.stop_service(service_name, service)
+        await self._async_client_action("stop_service", service_name, service)
 
-    def service_restart_service(
+    async def service_restart_service(
         self,
         service_name: str,
         only_if_running: int | str | None | bool = False,
         service: dict | str | None = None,
     ):
-        client = self._get_pfsense_client()
-
         if isinstance(only_if_running, str):
             if len(only_if_running) > 0:
                 if only_if_running.lower() == "true" or only_if_running == "1":
@@ -681,38 +1171,32 @@ class PfSenseEntity(CoordinatorEntity, RestoreEntity):
                 only_if_running = False
 
         if only_if_running:
-            client.restart_service_if_running(service_name, service)
+            await self._async_client_action(
+                "restart_service_if_running", service_name, service
+            )
         else:
-            client.restart_service(service_name, service)
+            await self._async_client_action("restart_service", service_name, service)
 
-    def service_reset_state_table(self):
-        client = self._get_pfsense_client()
-        client.reset_state_table()
+    async def service_reset_state_table(self):
+        await self._async_client_action("reset_state_table")
 
-    def service_kill_states(self, source: str, destination: str = None):
-        client = self._get_pfsense_client()
-        client.kill_states(source, destination)
+    async def service_kill_states(self, source: str, destination: str = None):
+        await self._async_client_action("kill_states", source, destination)
 
-    def service_system_halt(self):
-        client = self._get_pfsense_client()
-        client.system_halt()
+    async def service_system_halt(self):
+        await self._async_client_action("system_halt")
 
-    def service_system_reboot(self):
-        client = self._get_pfsense_client()
-        client.system_reboot()
+    async def service_system_reboot(self):
+        await self._async_client_action("system_reboot")
 
-    def service_send_wol(self, interface: str, mac: str):
-        client = self._get_pfsense_client()
-        client.send_wol(interface, mac)
+    async def service_send_wol(self, interface: str, mac: str):
+        await self._async_client_action("send_wol", interface, mac)
 
-    def service_set_default_gateway(self, gateway: str, ip_version: str):
-        client = self._get_pfsense_client()
-        client.set_default_gateway(gateway, ip_version)
+    async def service_set_default_gateway(self, gateway: str, ip_version: str):
+        await self._async_client_action("set_default_gateway", gateway, ip_version)
 
-    def service_exec_php(self, script: str):
-        client = self._get_pfsense_client()
-        client._exec_php(script)
+    async def service_exec_php(self, script: str):
+        await self._async_client_action("_exec_php", script)
 
-    def service_exec_command(self, command: str, background: bool = False):
-        client = self._get_pfsense_client()
-        client._exec_command(command, background)
+    async def service_exec_command(self, command: str, background: bool = False):
+        await self._async_client_action("_exec_command", command, background)
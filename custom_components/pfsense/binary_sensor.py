@@ -15,7 +15,7 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import slugify
 
 from . import CoordinatorEntityManager, PfSenseEntity, dict_get
-from .const import COORDINATOR, DOMAIN
+from .const import COORDINATORS, DATA_DOMAIN_CARP, DATA_DOMAIN_NOTICES, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,7 +30,7 @@ async def async_setup_entry(
     @callback
     def process_entities_callback(hass, config_entry):
         data = hass.data[DOMAIN][config_entry.entry_id]
-        coordinator = data[COORDINATOR]
+        coordinator = data[COORDINATORS][DATA_DOMAIN_CARP]
         entities = []
         entity = PfSenseCarpStatusBinarySensor(
             config_entry,
@@ -47,6 +47,13 @@ async def async_setup_entry(
         )
         entities.append(entity)
 
+        return entities
+
+    @callback
+    def process_notices_entities_callback(hass, config_entry):
+        data = hass.data[DOMAIN][config_entry.entry_id]
+        coordinator = data[COORDINATORS][DATA_DOMAIN_NOTICES]
+        entities = []
         entity = PfSensePendingNoticesPresentBinarySensor(
             config_entry,
             coordinator,
@@ -64,14 +71,19 @@ async def async_setup_entry(
 
         return entities
 
-    cem = CoordinatorEntityManager(
-        hass,
-        hass.data[DOMAIN][config_entry.entry_id][COORDINATOR],
-        config_entry,
-        process_entities_callback,
-        async_add_entities,
-    )
-    cem.process_entities()
+    coordinators = hass.data[DOMAIN][config_entry.entry_id][COORDINATORS]
+    for data_domain, callback_func in [
+        (DATA_DOMAIN_CARP, process_entities_callback),
+        (DATA_DOMAIN_NOTICES, process_notices_entities_callback),
+    ]:
+        cem = CoordinatorEntityManager(
+            hass,
+            coordinators[data_domain],
+            config_entry,
+            callback_func,
+            async_add_entities,
+        )
+        cem.process_entities()
 
 
 class PfSenseBinarySensor(PfSenseEntity, BinarySensorEntity):
@@ -114,8 +126,26 @@ class PfSenseCarpStatusBinarySensor(PfSenseBinarySensor):
         except KeyError:
             return STATE_UNKNOWN
 
+    @property
+    def extra_state_attributes(self):
+        state = self.coordinator.data
+        return {"maintenance_mode": state.get("carp_maintenance_mode")}
+
 
 class PfSensePendingNoticesPresentBinarySensor(PfSenseBinarySensor):
+    _notices_written = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # the notices list is kept in the attributes, only write a new state
+        # to the recorder when the notices or the availability changed
+        notices_hash = dict_get(self.coordinator.data, "notices.hash")
+        written = (notices_hash, self.available)
+        if notices_hash is not None and written == self._notices_written:
+            return
+        self._notices_written = written
+        super()._handle_coordinator_update()
+
     @property
     def is_on(self):
         state = self.coordinator.data
@@ -19,17 +19,26 @@ from homeassistant.util import slugify
 import voluptuous as vol
 
 from .const import (
+    CONF_COMPRESS_RESPONSES,
     CONF_DEVICE_TRACKER_CONSIDER_HOME,
     CONF_DEVICE_TRACKER_ENABLED,
     CONF_DEVICE_TRACKER_SCAN_INTERVAL,
     CONF_DEVICES,
+    CONF_FIRMWARE_SCAN_INTERVAL,
+    CONF_INTERFACE_COUNTERS_SCAN_INTERVAL,
+    CONF_METADATA_SCAN_INTERVAL,
+    DEFAULT_COMPRESS_RESPONSES,
     DEFAULT_DEVICE_TRACKER_CONSIDER_HOME,
     DEFAULT_DEVICE_TRACKER_ENABLED,
     DEFAULT_DEVICE_TRACKER_SCAN_INTERVAL,
+    DEFAULT_FIRMWARE_SCAN_INTERVAL,
+    DEFAULT_INTERFACE_COUNTERS_SCAN_INTERVAL,
+    DEFAULT_METADATA_SCAN_INTERVAL,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_USERNAME,
     DEFAULT_VERIFY_SSL,
     DOMAIN,
+    MIN_INTERFACE_COUNTERS_SCAN_INTERVAL,
 )
 from .pypfsense import Client
 
@@ -207,6 +216,19 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         scan_interval = self.config_entry.options.get(
             CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
         )
+        interface_counters_scan_interval = self.config_entry.options.get(
+            CONF_INTERFACE_COUNTERS_SCAN_INTERVAL,
+            DEFAULT_INTERFACE_COUNTERS_SCAN_INTERVAL,
+        )
+        metadata_scan_interval = self.config_entry.options.get(
+            CONF_METADATA_SCAN_INTERVAL, DEFAULT_METADATA_SCAN_INTERVAL
+        )
+        firmware_scan_interval = self.config_entry.options.get(
+            CONF_FIRMWARE_SCAN_INTERVAL, DEFAULT_FIRMWARE_SCAN_INTERVAL
+        )
+        compress_responses = self.config_entry.options.get(
+            CONF_COMPRESS_RESPONSES, DEFAULT_COMPRESS_RESPONSES
+        )
         device_tracker_enabled = self.config_entry.options.get(
             CONF_DEVICE_TRACKER_ENABLED, DEFAULT_DEVICE_TRACKER_ENABLED
         )
@@ -222,6 +244,20 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             vol.Optional(CONF_SCAN_INTERVAL, default=scan_interval): vol.All(
                 vol.Coerce(int), vol.Clamp(min=10, max=300)
             ),
+            vol.Optional(
+                CONF_INTERFACE_COUNTERS_SCAN_INTERVAL,
+                default=interface_counters_scan_interval,
+            ): vol.All(
+                vol.Coerce(int),
+                vol.Clamp(min=MIN_INTERFACE_COUNTERS_SCAN_INTERVAL, max=300),
+            ),
+            vol.Optional(
+                CONF_METADATA_SCAN_INTERVAL, default=metadata_scan_interval
+            ): vol.All(vol.Coerce(int), vol.Clamp(min=10, max=3600)),
+            vol.Optional(
+                CONF_FIRMWARE_SCAN_INTERVAL, default=firmware_scan_interval
+            ): vol.All(vol.Coerce(int), vol.Clamp(min=3600, max=86400)),
+            vol.Optional(CONF_COMPRESS_RESPONSES, default=compress_responses): bool,
             vol.Optional(
                 CONF_DEVICE_TRACKER_ENABLED, default=device_tracker_enabled
             ): bool,
@@ -10,6 +10,7 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.const import (
+    CONF_SCAN_INTERVAL,
     PERCENTAGE,
     UnitOfFrequency,
     UnitOfInformation,
@@ -25,8 +26,9 @@ UNDO_UPDATE_LISTENER = "undo_update_listener"
 PLATFORMS = ["sensor", "switch", "device_tracker", "binary_sensor", "update"]
 LOADED_PLATFORMS = "loaded_platforms"
 
-PFSENSE_CLIENT = "pfsense_client"
-COORDINATOR = "coordinator"
+PFSENSE_ASYNC_CLIENT = "pfsense_async_client"
+COORDINATORS = "coordinators"
+DATA_DOMAIN_DATA = "data_domain_data"
 DEVICE_TRACKER_COORDINATOR = "device_tracker_coordinator"
 SHOULD_RELOAD = "should_reload"
 TRACKED_MACS = "tracked_macs"
@@ -46,6 +48,63 @@ DEFAULT_DEVICE_TRACKER_CONSIDER_HOME = 0
 
 CONF_DEVICES = "devices"
 
+CONF_METADATA_SCAN_INTERVAL = "metadata_scan_interval"
+DEFAULT_METADATA_SCAN_INTERVAL = 120
+
+CONF_INTERFACE_COUNTERS_SCAN_INTERVAL = "interface_counters_scan_interval"
+DEFAULT_INTERFACE_COUNTERS_SCAN_INTERVAL = 10
+# updates are given scan interval - 1 seconds to complete
+MIN_INTERFACE_COUNTERS_SCAN_INTERVAL = 5
+
+CONF_COMPRESS_RESPONSES = "compress_responses"
+DEFAULT_COMPRESS_RESPONSES = False
+
+CONF_FIRMWARE_SCAN_INTERVAL = "firmware_scan_interval"
+DEFAULT_FIRMWARE_SCAN_INTERVAL = 21600
+# up to this fraction of the interval is added to each firmware check
+FIRMWARE_SCAN_JITTER = 0.1
+FIRMWARE_STORAGE_VERSION = 1
+
+# each data domain is fetched by its own coordinator on its own interval
+DATA_DOMAIN_TELEMETRY = "telemetry"
+DATA_DOMAIN_INTERFACE_COUNTERS = "interface_counters"
+DATA_DOMAIN_CONFIG = "config"
+DATA_DOMAIN_SERVICES = "services"
+DATA_DOMAIN_CARP = "carp"
+DATA_DOMAIN_DHCP = "dhcp"
+DATA_DOMAIN_NOTICES = "notices"
+DATA_DOMAIN_FIRMWARE = "firmware"
+DATA_DOMAIN_DEVICE_TRACKER = "device_tracker"
+
+DATA_DOMAINS = [
+    DATA_DOMAIN_TELEMETRY,
+    DATA_DOMAIN_INTERFACE_COUNTERS,
+    DATA_DOMAIN_CONFIG,
+    DATA_DOMAIN_SERVICES,
+    DATA_DOMAIN_CARP,
+    DATA_DOMAIN_DHCP,
+    DATA_DOMAIN_NOTICES,
+    DATA_DOMAIN_FIRMWARE,
+]
+
+# option and default for the scan interval of each data domain
+DATA_DOMAIN_SCAN_INTERVALS = {
+    DATA_DOMAIN_TELEMETRY: (CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+    DATA_DOMAIN_INTERFACE_COUNTERS: (
+        CONF_INTERFACE_COUNTERS_SCAN_INTERVAL,
+        DEFAULT_INTERFACE_COUNTERS_SCAN_INTERVAL,
+    ),
+    DATA_DOMAIN_CONFIG: (CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+    DATA_DOMAIN_SERVICES: (CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+    DATA_DOMAIN_CARP: (CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+    DATA_DOMAIN_DHCP: (CONF_METADATA_SCAN_INTERVAL, DEFAULT_METADATA_SCAN_INTERVAL),
+    DATA_DOMAIN_NOTICES: (
+        CONF_METADATA_SCAN_INTERVAL,
+        DEFAULT_METADATA_SCAN_INTERVAL,
+    ),
+    DATA_DOMAIN_FIRMWARE: (CONF_FIRMWARE_SCAN_INTERVAL, DEFAULT_FIRMWARE_SCAN_INTERVAL),
+}
+
 COUNT = "count"
 
 # pulled from upnp component
@@ -276,3 +335,4 @@ SERVICE_SEND_WOL = "send_wol"
 SERVICE_SET_DEFAULT_GATEWAY = "set_default_gateway"
 SERVICE_EXEC_PHP = "exec_php"
 SERVICE_EXEC_COMMAND = "exec_command"
+SERVICE_REFRESH_FIRMWARE_UPDATE_INFO = "refresh_firmware_update_info"
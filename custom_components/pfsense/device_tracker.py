@@ -20,7 +20,7 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import slugify
 from mac_vendor_lookup import AsyncMacLookup
 
-from . import CoordinatorEntityManager, PfSenseEntity, dict_get
+from . import CoordinatorEntityManager, PfSenseEntity, dict_get, index_get
 from .const import (
     CONF_DEVICE_TRACKER_CONSIDER_HOME,
     CONF_DEVICES,
@@ -172,14 +172,7 @@ class PfSenseScannerEntity(PfSenseEntity, ScannerEntity):
 
     def _get_pfsense_arp_entry(self) -> dict[str, str]:
         state = self.coordinator.data
-        arp_table = dict_get(state, "arp_table")
-        if arp_table is None:
-            return None
-        for entry in arp_table:
-            if entry.get("mac-address", "").lower() == self._mac_address:
-                return entry
-
-        return None
+        return index_get(state, "arp_table", self._mac_address)
 
     @property
     def available(self) -> bool:
@@ -308,12 +301,7 @@ class PfSenseScannerEntity(PfSenseEntity, ScannerEntity):
 
             return False
         # TODO: check "expires" here to add more honed in logic?
-        # TODO: clear cache under certain scenarios?
-        ip_address = entry.get("ip-address")
-        if ip_address is not None and len(ip_address) > 0:
-            client = self._get_pfsense_client()
-            self.hass.add_job(client.delete_arp_entry, ip_address)
-
+        # the arp entry is flushed by the device tracker coordinator each cycle
         self._last_known_connected_time = int(update_time)
 
         return True
@@ -3,21 +3,297 @@ note that the xmlrpc api only allows a single request to be handled at a time
 likely via some sort of mutex.
 """
 
+import asyncio
+import base64
+import concurrent.futures
+from contextlib import contextmanager
+import contextvars
+import functools
+import hashlib
+import heapq
+import http.client
+import inspect
+import itertools
 import json
 import logging
 import re
-import socket
 import ssl
+import threading
+import time
 from urllib.parse import quote_plus, urlparse
 from xml.parsers.expat import ExpatError
 import xmlrpc.client
+import zlib
 
-# value to set as the socket timeout
+import aiohttp
+
+# seconds allowed for each read from the socket
 DEFAULT_TIMEOUT = 10
 
+# seconds allowed to establish the tcp (and tls) connection
+DEFAULT_CONNECT_TIMEOUT = 10
+
+# seconds allowed for a request as a whole
+DEFAULT_REQUEST_TIMEOUT = 60
+
+# per method overrides of the connect/read/total timeouts above, further
+# overrides can be passed in via the "timeouts" client opt using the same
+# format (the "default" key applies to all methods)
+DEFAULT_METHOD_TIMEOUTS = {
+    # checks the package repositories, can take a minute or more
+    "get_firmware_update_info": {"read": 120, "total": 180},
+    # xmlrpc restore_config_section is given a 60s server-side timeout
+    "_restore_config_section": {"read": 90, "total": 90},
+}
+
+# max number of idle keep-alive connections held per client
+DEFAULT_POOL_SIZE = 2
+
+# idle connections older than this (seconds) are closed instead of reused
+# nginx on pfSense defaults keepalive_timeout to 75s
+DEFAULT_POOL_IDLE_TIMEOUT = 60
+
+# max number of requests the async client runs against the firewall at once
+DEFAULT_WORKERS = 3
+
+# exec_php results of at least this many (json) bytes are compressed when the
+# "compress_threshold" client opt is set to it, the default None never does
+DEFAULT_COMPRESS_THRESHOLD = 16384
+
+# the async client decodes responses of at least this many bytes in the
+# executor instead of on the event loop, see the "decode_threshold" client opt
+DEFAULT_DECODE_THRESHOLD = 65536
+
+# errors raised when the firewall cannot be reached or answers with something
+# other than a complete response, e.g. while it reboots
+TRANSPORT_ERRORS = (
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    OSError,
+    http.client.HTTPException,
+    xmlrpc.client.ProtocolError,
+)
+
+# request priorities, waiting requests with a lower value go first
+PRIORITY_USER = 0
+PRIORITY_TELEMETRY = 1
+PRIORITY_BACKGROUND = 2
+
+# slots of the async client a priority leaves free for more urgent requests,
+# so a user action never waits behind a full set of polling requests
+DEFAULT_RESERVED_SLOTS = {PRIORITY_TELEMETRY: 1, PRIORITY_BACKGROUND: 1}
+
+# max number of slots of the async client the requests of a priority hold
+DEFAULT_SLOT_LIMITS = {PRIORITY_BACKGROUND: 1}
+
+# matches the mutex release line found at the top of most read-only scripts
+_PHP_UNLOCK_RE = re.compile(r"^unlock\(\$xmlrpclockkey\);[ \t]*$", re.MULTILINE)
+
+# matches the line decoding the (json) arguments of a script
+_PHP_DATA_RE = re.compile(r"^\$data = json_decode\((.*), true\);[ \t]*$", re.MULTILINE)
+
+# the helper library is installed as <prefix><sha1 of its content>.php
+_LIBRARY_PATH_PREFIX = "/tmp/hass-pfsense-"
+
+# result of a library call when the library is not installed (anymore)
+_LIBRARY_MISSING = {"hass_library_missing": True}
+
+# the batchable methods kept in the helper library and the arguments their
+# scripts are built with there, other arguments only change the $data line
+_LIBRARY_METHODS = {
+    "get_system_info": (),
+    "get_host_firmware_version": (),
+    "get_identity_key": (),
+    "get_telemetry": (None,),
+    "get_interface_counters": (),
+    "get_config_revision": (),
+    "get_interfaces": (),
+    "get_services": (),
+    "get_carp_state": (),
+    "get_dhcp_leases_delta": (None, False),
+    "get_pending_notices": ("all",),
+    "get_arp_table": (True,),
+}
+
+# php functions returning the dhcp leases in the system_get_dhcpleases() format
+# from either the isc dhcpd or the kea backend, kea leases are queried a page at
+# a time through its control sockets instead of parsing the lease files
+_PHP_DHCP_LEASES = r"""
+if (!function_exists("hass_kea_command")) {
+  function hass_kea_command($socket, $command, $arguments) {
+    $fp = @stream_socket_client("unix://" . $socket, $errno, $errstr, 5);
+    if ($fp === false) {
+      return null;
+    }
+    stream_set_timeout($fp, 30);
+    fwrite($fp, json_encode(["command" => $command, "arguments" => $arguments]));
+    $response = "";
+    while (!feof($fp)) {
+      $chunk = fread($fp, 65536);
+      if ($chunk === false || stream_get_meta_data($fp)["timed_out"]) {
+        break;
+      }
+      $response .= $chunk;
+      // the socket is not always closed after the response
+      if (json_decode($response, true) !== null) {
+        break;
+      }
+    }
+    fclose($fp);
+    return json_decode($response, true);
+  }
+
+  function hass_kea_leases($version, $page_size = 1000) {
+    $socket = "/var/run/kea{$version}-ctrl-socket";
+    $leases = [];
+    if (!file_exists($socket)) {
+      return $leases;
+    }
+    $from = "start";
+    do {
+      $response = hass_kea_command($socket, "lease{$version}-get-page", ["from" => $from, "limit" => $page_size]);
+      // result 3 is an empty page
+      if (!is_array($response) || $response["result"] !== 0) {
+        break;
+      }
+      $page = $response["arguments"]["leases"];
+      foreach ($page as $lease) {
+        $leases[] = $lease;
+      }
+      $from = end($page)["ip-address"];
+    } while (count($page) >= $page_size);
+    return $leases;
+  }
+
+  function hass_dhcp_interface($ip, $subnets) {
+    foreach ($subnets as $if => $subnet) {
+      if ($subnet !== null && ip_in_subnet($ip, $subnet)) {
+        return $if;
+      }
+    }
+    return "";
+  }
+
+  function hass_get_dhcp_leases($dns_lookups) {
+    global $config;
+    if (($config["dhcpbackend"] ?? "isc") != "kea") {
+      return system_get_dhcpleases($dns_lookups)["lease"];
+    }
+
+    // online/offline the same way system_get_dhcpleases() does it
+    $online = [];
+    exec("/usr/sbin/arp -an", $neighbors);
+    exec("/usr/sbin/ndp -an", $neighbors);
+    foreach ($neighbors as $line) {
+      if (preg_match('/(([0-9a-f]{1,2}:){5}[0-9a-f]{1,2})/i', $line, $matches)) {
+        $online[strtolower($matches[1])] = true;
+      }
+    }
+
+    $subnets = [4 => [], 6 => []];
+    foreach (["dhcpd" => 4, "dhcpdv6" => 6] as $section => $version) {
+      foreach (array_keys($config[$section] ?? []) as $if) {
+        if ($version == 4) {
+          $ip = get_interface_ip($if);
+          $bits = get_interface_subnet($if);
+          $network = $ip ? gen_subnet($ip, $bits) : null;
+        } else {
+          $ip = get_interface_ipv6($if);
+          $bits = get_interface_subnetv6($if);
+          $network = $ip ? gen_subnetv6($ip, $bits) : null;
+        }
+        $subnets[$version][$if] = $network ? $network . "/" . $bits : null;
+      }
+    }
+
+    $now = time();
+    $leases = [];
+    foreach ([4, 6] as $version) {
+      foreach (hass_kea_leases($version) as $kea_lease) {
+        $mac = strtolower($kea_lease["hw-address"] ?? "");
+        $ends = $kea_lease["cltt"] + $kea_lease["valid-lft"];
+        // state 0 is the only usable (default) state
+        $expired = $kea_lease["state"] != 0 || $ends < $now;
+        $leases[] = [
+          "ip" => $kea_lease["ip-address"],
+          "type" => "dynamic",
+          "mac" => $mac,
+          "if" => hass_dhcp_interface($kea_lease["ip-address"], $subnets[$version]),
+          "starts" => date("Y/m/d H:i:s", $kea_lease["cltt"]),
+          "ends" => date("Y/m/d H:i:s", $ends),
+          "hostname" => rtrim($kea_lease["hostname"] ?? "", "."),
+          "descr" => "",
+          "act" => $expired ? "expired" : "active",
+          "online" => isset($online[$mac]) ? "active/online" : "idle/offline",
+        ];
+      }
+    }
+
+    // static mappings are not leases to kea
+    foreach (($config["dhcpd"] ?? []) as $if => $dhcpif) {
+      if (!is_array($dhcpif) || !is_array($dhcpif["staticmap"] ?? null)) {
+        continue;
+      }
+      foreach ($dhcpif["staticmap"] as $staticmap) {
+        $mac = strtolower($staticmap["mac"] ?? "");
+        $leases[] = [
+          "ip" => $staticmap["ipaddr"] ?? "",
+          "type" => "static",
+          "mac" => $mac,
+          "if" => $if,
+          "starts" => "",
+          "ends" => "",
+          "hostname" => $staticmap["hostname"] ?? "",
+          "descr" => $staticmap["descr"] ?? "",
+          "act" => "static",
+          "online" => isset($online[$mac]) ? "online" : "offline",
+        ];
+      }
+    }
+
+    return $leases;
+  }
+}
+"""
+
+# name of the client method currently executing, used to look up timeouts
+_CURRENT_METHOD = contextvars.ContextVar("pypfsense_current_method", default=None)
+
+# priority of the requests currently being made, see client.priority()
+_CURRENT_PRIORITY = contextvars.ContextVar(
+    "pypfsense_current_priority", default=PRIORITY_TELEMETRY
+)
+
 _LOGGER = logging.getLogger(__name__)
 
 
+# the fields of the filter and nat rules needed to manage them
+RULE_INDEX_PROJECTION = {
+    "filter.rule": ["tracker", "descr", "disabled", "associated-rule-id"],
+    "nat.rule": ["created.time", "descr", "disabled"],
+    "nat.outbound.rule": ["created.time", "descr", "disabled"],
+}
+
+# the methods making up the identity of the firewall
+IDENTITY_CALLS = {
+    "system_info": "get_system_info",
+    "host_firmware_version": "get_host_firmware_version",
+}
+
+
+class BatchError(Exception):
+    """a single fragment of a batched exec_php request failed"""
+
+
+def batch_result(results: dict, key: str):
+    """return a single value from an exec_php_batch result, raising its error"""
+    value = results[key]
+    if isinstance(value, BatchError):
+        raise value
+
+    return value
+
+
 def dict_get(data: dict, path: str, default=None):
     pathList = re.split(r"\.", path, flags=re.IGNORECASE)
     result = data
@@ -49,8 +325,258 @@ def normalize_service_data(service):
     return service
 
 
-class Client(object):
-    """pfSense Client"""
+def php_quote(value: str):
+    """quote a value as a php single-quoted string literal"""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+    """HTTPSConnection resuming the last TLS session negotiated by the pool"""
+
+    def __init__(self, *args, pool=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = pool
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        self.sock = self._context.wrap_socket(
+            self.sock, server_hostname=self.host, session=self._pool.tls_session
+        )
+        if self.sock.session is not None:
+            self._pool.tls_session = self.sock.session
+
+
+class _DeadlineResponse(object):
+    """HTTPResponse proxy applying the remaining read budget before each read"""
+
+    def __init__(self, response, sock, read_timeout):
+        self._response = response
+        self._sock = sock
+        self._read_timeout = read_timeout
+
+    def read(self, *args):
+        self._sock.settimeout(self._read_timeout())
+        return self._response.read(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class _KeepAliveTransport(xmlrpc.client.SafeTransport):
+    """
+    xmlrpc transport holding a single persistent HTTP/1.1 connection
+
+    the stock Transport already keeps its connection open between requests
+    and retries once when a cached connection has gone cold
+    (RemoteDisconnected, ECONNRESET, EPIPE), so all that is needed is to
+    reuse transport instances and resume TLS sessions on reconnect
+    """
+
+    def __init__(self, pool, scheme, context=None):
+        super().__init__(context=context)
+        self._pool = pool
+        self._scheme = scheme
+        self._sock = None
+        self.last_used = time.monotonic()
+        self.timeouts = None
+        self.deadline = None
+
+    def set_timeouts(self, timeouts):
+        """apply connect/read/total timeouts to the next request"""
+        self.timeouts = timeouts
+        self.deadline = None
+        if timeouts["total"] is not None:
+            self.deadline = time.monotonic() + timeouts["total"]
+
+    def make_connection(self, host):
+        if self._connection and host == self._connection[0]:
+            return self._connection[1]
+
+        chost, self._extra_headers, x509 = self.get_host_info(host)
+        if self._scheme == "https":
+            connection = _HTTPSConnection(
+                chost,
+                None,
+                timeout=self.timeouts["connect"],
+                context=self.context,
+                pool=self._pool,
+                **(x509 or {}),
+            )
+        else:
+            connection = http.client.HTTPConnection(
+                chost, timeout=self.timeouts["connect"]
+            )
+        self._connection = host, connection
+        return connection
+
+    def _read_timeout(self):
+        """the read timeout, capped to what is left of the request deadline"""
+        read_timeout = self.timeouts["read"]
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("timed out (request deadline exceeded)")
+            if read_timeout is None or remaining < read_timeout:
+                read_timeout = remaining
+
+        return read_timeout
+
+    def single_request(self, host, handler, request_body, verbose=False):
+        read_timeout = self._read_timeout()
+        connection = self.make_connection(host)
+        connection.timeout = self.timeouts["connect"]
+        if connection.sock is None:
+            connection.connect()
+        # covers sending the request and waiting for the response headers,
+        # the body reads get the remaining budget in parse_response
+        connection.sock.settimeout(read_timeout)
+        self._sock = connection.sock
+
+        return super().single_request(host, handler, request_body, verbose)
+
+    def parse_response(self, response):
+        return super().parse_response(
+            _DeadlineResponse(response, self._sock, self._read_timeout)
+        )
+
+
+class _TransportPool(object):
+    """thread-safe pool of keep-alive transports for a single firewall"""
+
+    def __init__(
+        self,
+        scheme,
+        context=None,
+        size=DEFAULT_POOL_SIZE,
+        idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+    ):
+        self._scheme = scheme
+        self._context = context
+        self._size = size
+        self._idle_timeout = idle_timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self.tls_session = None
+
+    def checkout(self):
+        now = time.monotonic()
+        stale = []
+        transport = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if now - candidate.last_used > self._idle_timeout:
+                    stale.append(candidate)
+                    continue
+                transport = candidate
+                break
+
+        for candidate in stale:
+            candidate.close()
+
+        if transport is None:
+            transport = _KeepAliveTransport(self, self._scheme, context=self._context)
+
+        return transport
+
+    def checkin(self, transport):
+        transport.last_used = time.monotonic()
+        evicted = None
+        with self._lock:
+            self._idle.append(transport)
+            if len(self._idle) > self._size:
+                evicted = self._idle.pop(0)
+
+        if evicted is not None:
+            evicted.close()
+
+    def close(self):
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+
+        for transport in idle:
+            transport.close()
+
+
+class _AsyncPrioritySemaphore(object):
+    """
+    asyncio semaphore handing free slots to the waiter with the lowest
+    priority, see DEFAULT_RESERVED_SLOTS and DEFAULT_SLOT_LIMITS
+    """
+
+    def __init__(self, size=DEFAULT_WORKERS, reserved=None, limits=None):
+        self._size = size
+        self._free = size
+        self._reserved = DEFAULT_RESERVED_SLOTS if reserved is None else reserved
+        self._limits = DEFAULT_SLOT_LIMITS if limits is None else limits
+        # slots held by priority
+        self._held = {}
+        self._waiters = []
+        self._counter = itertools.count()
+
+    def _can_take(self, priority):
+        # a single slot is always usable by every priority
+        reserved = min(self._reserved.get(priority, 0), self._size - 1)
+        if self._free <= reserved:
+            return False
+        return self._held.get(priority, 0) < self._limits.get(priority, self._size)
+
+    def _take(self, priority):
+        self._free -= 1
+        self._held[priority] = self._held.get(priority, 0) + 1
+
+    async def acquire(self, priority):
+        if self._can_take(priority):
+            self._take(priority)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # the slot may have been handed over right before the cancel
+            if future.done() and not future.cancelled():
+                self.release(priority)
+            raise
+
+    def release(self, priority):
+        self._free += 1
+        self._held[priority] -= 1
+
+        # hand the free slots to the most urgent waiters allowed to take them
+        skipped = []
+        while self._waiters and self._free > 0:
+            waiter = heapq.heappop(self._waiters)
+            if waiter[2].done():
+                continue
+            if self._can_take(waiter[0]):
+                self._take(waiter[0])
+                waiter[2].set_result(None)
+            else:
+                skipped.append(waiter)
+
+        for waiter in skipped:
+            heapq.heappush(self._waiters, waiter)
+
+
+def _decode_php_response(response):
+    """the decoded exec_php result and the size of its json in bytes"""
+    if "compressed" in response:
+        real = zlib.decompress(base64.b64decode(response["compressed"]))
+    else:
+        real = response["real"]
+    return json.loads(real), len(real)
+
+
+class _BaseClient(object):
+    """
+    everything shared by the sync and async clients which does not perform I/O
+
+    _<method>_script builds the php sent to exec_php for a method and
+    _<method>_response turns the decoded result into the method return value
+    """
 
     def __init__(self, url, username, password, opts=None):
         """pfSense Client initializer."""
@@ -69,63 +595,67 @@ class Client(object):
             host=parts.netloc,
         )
         self._url_parts = urlparse(self._url)
-
-    # https://stackoverflow.com/questions/64983392/python-multiple-patch-gives-http-client-cannotsendrequest-request-sent
-    def _get_proxy(self):
-        # https://docs.python.org/3/library/xmlrpc.client.html#module-xmlrpc.client
-        # https://stackoverflow.com/questions/30461969/disable-default-certificate-verification-in-python-2-7-9
-        context = None
-        verify_ssl = True
-        if "verify_ssl" in self._opts.keys():
-            verify_ssl = self._opts["verify_ssl"]
-
-        if self._url_parts.scheme == "https" and not verify_ssl:
-            context = ssl._create_unverified_context()
-
-        # set to True if necessary during development
-        verbose = False
-
-        proxy = xmlrpc.client.ServerProxy(self._url, context=context, verbose=verbose)
-        return proxy
-
-    def _apply_timeout(func):
-        def inner(*args, **kwargs):
-            response = None
-            # timout applies to each recv() call, not the whole request
-            default_timeout = socket.getdefaulttimeout()
-            try:
-                socket.setdefaulttimeout(DEFAULT_TIMEOUT)
-                response = func(*args, **kwargs)
-            finally:
-                socket.setdefaulttimeout(default_timeout)
-            return response
-
-        return inner
-
-    def _log_errors(func):
-        def inner(*args, **kwargs):
-            try:
-                return func(*args, **kwargs)
-            except BaseException as err:
-                _LOGGER.error(f"Unexpected {func.__name__} error {err=}, {type(err)=}")
-                raise err
-
-        return inner
-
-    @_apply_timeout
-    def _get_config_section(self, section):
-        response = self._get_proxy().pfsense.backup_config_section([section])
-        return response[section]
-
-    @_apply_timeout
-    def _restore_config_section(self, section_name, data):
-        params = {section_name: data}
-        response = self._get_proxy().pfsense.restore_config_section(params, 60)
-        return response
-
-    @_apply_timeout
-    def _exec_php(self, script):
-        script = """
+        self._cached_config = None
+        self._cached_config_revision = None
+        self._cached_config_projection = None
+        self._cached_identity = None
+        self._cached_identity_key = None
+        # category => (hash, notices list) of the last notices fetched
+        self._cached_notices = {}
+        # in-flight read requests by _coalesce_key
+        self._in_flight = {}
+        # None until installed, True when installed, False when unusable
+        self._library = None
+        self._library_installed = None
+        # bytes of exec_php results, as json and as actually transferred
+        self._payload_stats = {
+            "responses": 0,
+            "compressed_responses": 0,
+            "raw_bytes": 0,
+            "transferred_bytes": 0,
+        }
+
+    @property
+    def payload_stats(self):
+        """sizes of the exec_php results received so far"""
+        return dict(self._payload_stats)
+
+    @contextmanager
+    def priority(self, priority):
+        """make the requests of the enclosed calls with the given priority"""
+        token = _CURRENT_PRIORITY.set(priority)
+        try:
+            yield
+        finally:
+            _CURRENT_PRIORITY.reset(token)
+
+    def _coalesce_key(self, method, args, kwargs):
+        return json.dumps([method, args, kwargs], sort_keys=True, default=repr)
+
+    def _get_timeouts(self, method=None):
+        """resolve the connect/read/total timeouts for a client method"""
+        if method is None:
+            method = _CURRENT_METHOD.get()
+
+        timeouts = {
+            "connect": DEFAULT_CONNECT_TIMEOUT,
+            "read": DEFAULT_TIMEOUT,
+            "total": DEFAULT_REQUEST_TIMEOUT,
+        }
+        overrides = self._opts.get("timeouts", {})
+        timeouts.update(overrides.get("default", {}))
+        timeouts.update(DEFAULT_METHOD_TIMEOUTS.get(method, {}))
+        timeouts.update(overrides.get(method, {}))
+
+        return timeouts
+
+    def _php_script(self, script):
+        # a negative threshold disables compression
+        threshold = self._opts.get("compress_threshold")
+        if threshold is None:
+            threshold = -1
+
+        return """
 ini_set('display_errors', 0);
 
 {}
@@ -135,142 +665,501 @@ ini_set('display_errors', 0);
 $toreturn_real = $toreturn;
 $toreturn = [];
 $toreturn["real"] = json_encode($toreturn_real);
+if ($toreturn["real"] === false && isset($hass_encode_failed)) {{
+  // ie: fail only the batch fragments which are not encodable
+  $toreturn["real"] = json_encode($hass_encode_failed($toreturn_real));
+}}
+
+$hass_compress_threshold = {};
+if ($hass_compress_threshold >= 0 && strlen($toreturn["real"]) >= $hass_compress_threshold && function_exists("gzcompress")) {{
+  $toreturn["compressed"] = base64_encode(gzcompress($toreturn["real"]));
+  unset($toreturn["real"]);
+}}
 """.format(
-            script
+            script, int(threshold)
         )
-        response = self._get_proxy().pfsense.exec_php(script)
-        response = json.loads(response["real"])
-        return response
 
-    def _exec_php_no_timeout(self, script):
+    def _php_response(self, response, decoded=None):
+        # decoded is the _decode_php_response(response) result when done already
+        if decoded is None:
+            decoded = _decode_php_response(response)
+        result, raw_bytes = decoded
+
+        stats = self._payload_stats
+        stats["responses"] += 1
+        stats["raw_bytes"] += raw_bytes
+        if "compressed" in response:
+            stats["compressed_responses"] += 1
+            stats["transferred_bytes"] += len(response["compressed"])
+        else:
+            stats["transferred_bytes"] += len(response["real"])
+        return result
+
+    def _batch_script(self, scripts):
+        """
+        run several php fragments in a single exec_php request
+
+        each fragment runs in its own closure so variables do not leak between
+        them, a fragment which throws or returns unencodable data only fails
+        its own key. the results are encoded once, along with the envelope
+        """
+        # release the mutex once up-front, but only if every fragment would
+        # have done so itself, otherwise hold it for the whole batch
+        unlock = all(_PHP_UNLOCK_RE.search(script) for script in scripts.values())
+
+        fragments = []
+        for key, script in scripts.items():
+            # a second unlock() of the same key would fail the fragment
+            script = _PHP_UNLOCK_RE.sub("", script)
+            fragments.append(
+                "$hass_batch[{}] = function () {{\n{}\nreturn $toreturn;\n}};".format(
+                    php_quote(key), script
+                )
+            )
+
         script = """
-ini_set('display_errors', 0);
+{}
 
+$hass_batch = [];
 {}
 
-// wrapping this in json_encode and then unwrapping in python prevents funny XMLRPC NULL encoding errors
-// https://github.com/travisghansen/hass-pfsense/issues/35
-$toreturn_real = $toreturn;
-$toreturn = [];
-$toreturn["real"] = json_encode($toreturn_real);
+$hass_batch_results = [];
+foreach ($hass_batch as $key => $fn) {{
+  try {{
+    $hass_batch_results[$key] = ["data" => $fn()];
+  }}
+  catch (\\Throwable $e) {{
+    $hass_batch_results[$key] = ["error" => $e->getMessage()];
+  }}
+}}
+
+// only looked for when encoding the whole batch failed
+$hass_encode_failed = function ($results) {{
+  foreach ($results as $key => $result) {{
+    if (json_encode($result) === false) {{
+      $results[$key] = ["error" => json_last_error_msg()];
+    }}
+  }}
+  return $results;
+}};
+
+$toreturn = $hass_batch_results;
 """.format(
-            script
+            (
+                """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+"""
+                if unlock
+                else ""
+            ),
+            "\n\n".join(fragments),
         )
-        response = self._get_proxy().pfsense.exec_php(script)
-        response = json.loads(response["real"])
-        return response
+        return script
 
-    def _exec_command(self, command, background=False):
+    def _library_body(self, script):
+        # the script as a function body, $data is passed in by the caller
+        return _PHP_DATA_RE.sub("", _PHP_UNLOCK_RE.sub("", script, 1), 1)
+
+    def _get_library(self):
+        """
+        the helper library holding every batchable script as a function
+        hass_lib_<method>($data), built once from the scripts themselves
+        """
+        if self._library is not None:
+            return self._library
+
+        bodies = {}
+        for method, args in _LIBRARY_METHODS.items():
+            script = getattr(self, f"_{method}_script")(*args)
+            bodies[method] = self._library_body(script)
+
+        content = "<?php\n"
+        for method, body in sorted(bodies.items()):
+            content += f"\nfunction hass_lib_{method}($data) {{\n{body}\nreturn $toreturn;\n}}\n"
+
+        digest = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        self._library = {
+            "path": f"{_LIBRARY_PATH_PREFIX}{digest}.php",
+            "hash": digest,
+            "content": content,
+            "bodies": bodies,
+        }
+        return self._library
+
+    def _install_library_script(self):
+        library = self._get_library()
         script = """
-$data = json_decode('{}', true);
-if ($data["background"]) {{
-    $ret = mwexec_bg($data["command"]);    
-}}
-else {{
-    $ret = mwexec($data["command"]);
+$data = json_decode({}, true);
+$content = base64_decode($data["content"]);
+$installed = false;
+if (sha1($content) === $data["hash"]) {{
+  // tempnam() creates a new private (0600) file, moved into place at once
+  $tmp = tempnam(dirname($data["path"]), "hass-pfsense-tmp-");
+  if ($tmp !== false) {{
+    if (file_put_contents($tmp, $content) === strlen($content) && rename($tmp, $data["path"])) {{
+      // make sure it loads, older versions are left for other clients still
+      // using them and go away with /tmp
+      try {{
+        eval("?>" . $content);
+        $installed = true;
+      }}
+      catch (\\Throwable $e) {{
+        @unlink($data["path"]);
+      }}
+    }}
+    else {{
+      @unlink($tmp);
+    }}
+  }}
 }}
-
 $toreturn = [
-  "data" => $ret,
+  "data" => $installed,
 ];
 """.format(
-            json.dumps({"command": command, "background": background})
+            php_quote(
+                json.dumps(
+                    {
+                        "path": library["path"],
+                        "hash": library["hash"],
+                        "content": base64.b64encode(
+                            library["content"].encode("utf-8")
+                        ).decode("ascii"),
+                    }
+                )
+            )
         )
-        response = self._exec_php(script)
-        return response["data"]
+        return script
 
-    @_apply_timeout
-    @_log_errors
-    def get_host_firmware_version(self):
-        return self._get_proxy().pfsense.host_firmware_version(1, 60)
+    def _library_call_script(self, method, script):
+        """
+        script calling hass_lib_<method> instead of sending its source, or
+        None when the script is not the one in the library
+        """
+        library = self._get_library()
+        if library["bodies"].get(method) != self._library_body(script):
+            return None
 
-    @_log_errors
-    def get_firmware_update_info(self):
+        match = _PHP_DATA_RE.search(script)
+        data = match[1] if match else "'null'"
+        unlock = ""
+        if _PHP_UNLOCK_RE.search(script):
+            unlock = """
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+"""
+
+        return """{}
+if (!function_exists('hass_lib_{method}')) {{
+  // only the exact bytes verified here are loaded
+  $hass_library = @file_get_contents({path});
+  if ($hass_library !== false && sha1($hass_library) === {hash}) {{
+    eval("?>" . $hass_library);
+  }}
+}}
+if (function_exists('hass_lib_{method}')) {{
+  $toreturn = hass_lib_{method}(json_decode({data}, true));
+}}
+else {{
+  $toreturn = ['hass_library_missing' => true];
+}}
+""".format(
+            unlock,
+            method=method,
+            path=php_quote(library["path"]),
+            hash=php_quote(library["hash"]),
+            data=data,
+        )
+
+    def _library_scripts(self, scripts, methods):
+        """replace the batch scripts found in the (installed) library"""
+        if not self._library_installed:
+            return scripts
+
+        replaced = {}
+        for key, script in scripts.items():
+            call = self._library_call_script(methods[key], script)
+            # short scripts are cheaper to send than the call itself
+            replaced[key] = call if call and len(call) < len(script) else script
+
+        return replaced
+
+    def _library_missing_keys(self, results):
+        missing = [key for key, result in results.items() if result == _LIBRARY_MISSING]
+        if missing:
+            # ie: /tmp was cleared by a reboot, install it again next time
+            self._library_installed = None
+
+        return missing
+
+    def _batch_results(self, scripts, response):
+        results = {}
+        for key in scripts.keys():
+            result = response.get(key) if isinstance(response, dict) else None
+            if result is None:
+                results[key] = BatchError(f"{key}: no result returned")
+            elif "error" in result:
+                results[key] = BatchError(f"{key}: {result['error']}")
+            else:
+                results[key] = result.get("data")
+
+        return results
+
+    def _batch_calls(self, calls):
         """
-        # the cache is 2 hours
-        get_system_pkg_version($baseonly = false, $use_cache = true)
-        # for testing
-        rm /var/run/pfSense_version*
+        resolve exec_php_batch calls into scripts and response handlers
+
+        calls is a dict of key => method name or (method name, [args])
+        {"telemetry": "get_telemetry", "leases": ("get_dhcp_leases", [False])}
+
+        only methods with a _<method>_script/_<method>_response pair can be
+        batched
+        """
+        scripts = {}
+        handlers = {}
+        methods = {}
+        for key, call in calls.items():
+            if isinstance(call, str):
+                call = (call, [])
+            method, args = call
+            scripts[key] = getattr(self, f"_{method}_script")(*args)
+            handlers[key] = getattr(self, f"_{method}_response")
+            methods[key] = method
+
+        return scripts, handlers, methods
+
+    def _set_rules_disabled(self, rules, match, disabled):
+        """
+        set or clear the disabled flag on every rule where match(rule)
+        returns True if any rule changed and the section should be restored
         """
+        changed = False
+        for rule in rules:
+            if not match(rule):
+                continue
+
+            if disabled and "disabled" not in rule.keys():
+                rule["disabled"] = ""
+                changed = True
+
+            if not disabled and "disabled" in rule.keys():
+                del rule["disabled"]
+                changed = True
+
+        return changed
+
+    def _set_filter_rule_disabled(self, config, tracker, disabled):
+        return self._set_rules_disabled(
+            config["filter"]["rule"],
+            lambda rule: "tracker" in rule.keys() and rule["tracker"] == tracker,
+            disabled,
+        )
+
+    def _set_nat_port_forward_rule_disabled(self, config, created_time, disabled):
+        return self._set_rules_disabled(
+            config["nat"]["rule"],
+            lambda rule: dict_get(rule, "created.time") == created_time,
+            disabled,
+        )
+
+    def _set_nat_outbound_rule_disabled(self, config, created_time, disabled):
+        return self._set_rules_disabled(
+            config["nat"]["outbound"]["rule"],
+            lambda rule: dict_get(rule, "created.time") == created_time,
+            disabled,
+        )
+
+    def _get_host_firmware_version_script(self):
+        # same as the native pfsense.host_firmware_version xmlrpc method
+        # but usable as part of a batch
         script = """
 // release the mutex immediately so other api calls can go through
 // as this one can take a minute
 require_once '/etc/inc/util.inc';
 global $xmlrpclockkey;
 unlock($xmlrpclockkey);
-//unlock_force("xmlrpc");
 
-require_once '/etc/inc/pkg-utils.inc';
+require_once '/etc/inc/pfsense-utils.inc';
 
 $toreturn = [
-  "data" => [
-      "base" => get_system_pkg_version(),
-      // someday add package updates details here
-      "packages" => [],
-    ]
+  "data" => host_firmware_version(),
 ];
 """
-        response = self._exec_php(script)
-        return response["data"]
+        return script
 
-    @_log_errors
-    def upgrade_firmware(self):
-        script = """
-$ret = mwexec_bg("pfSense-upgrade -y -l /tmp/hass-upgrade.log -p /tmp/hass-upgrade.sock");
-$toreturn = [
-  "data" => $ret,
-];
-"""
-        response = self._exec_php(script)
+    def _get_host_firmware_version_response(self, response):
         return response["data"]
 
-    @_log_errors
-    def pid_is_running(self, pid):
+    def _get_firmware_update_info_script(self, use_cache=True):
         script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+//unlock_force("xmlrpc");
+
+require_once '/etc/inc/pkg-utils.inc';
+
 $data = json_decode('{}', true);
-$running = posix_kill($data["pid"],0);
+// refreshes the local pkg catalog once the version cache expired
+$base = get_system_pkg_version(false, $data["use_cache"]);
+
+// installed pfSense packages against the local catalog (-U never fetches the
+// repositories), cached until the catalog or the installed packages change
+$catalog_mtime = 0;
+foreach (glob("/var/db/pkg/repo-*.sqlite") as $catalog) {{
+  $catalog_mtime = max($catalog_mtime, filemtime($catalog));
+}}
+$packages_key = $catalog_mtime . ":" . @filemtime("/var/db/pkg/local.sqlite");
+$packages_cache_file = "/tmp/hass-pkg-updates.json";
+$packages_cache = json_decode((string) @file_get_contents($packages_cache_file), true);
+if (is_array($packages_cache) && $packages_cache["key"] === $packages_key) {{
+  $packages = $packages_cache["packages"];
+}} else {{
+  $packages = [];
+  $latest_versions = [];
+  $stdout = "";
+  $stderr = "";
+  pkg_exec("rquery -U -g '%n %v' 'pfSense-pkg-*'", $stdout, $stderr);
+  foreach (explode("\\n", trim($stdout)) as $line) {{
+    $parts = explode(" ", $line, 2);
+    if (count($parts) == 2) {{
+      $latest_versions[$parts[0]] = $parts[1];
+    }}
+  }}
+
+  $stdout = "";
+  pkg_exec("query -g '%n %v' 'pfSense-pkg-*'", $stdout, $stderr);
+  foreach (explode("\\n", trim($stdout)) as $line) {{
+    $parts = explode(" ", $line, 2);
+    if (count($parts) != 2) {{
+      continue;
+    }}
+    list($name, $installed_version) = $parts;
+    $version = $latest_versions[$name] ?? $installed_version;
+    $update_available = false;
+    if ($version != $installed_version) {{
+      $compare = "";
+      pkg_exec("version -t " . escapeshellarg($installed_version) . " " . escapeshellarg($version), $compare, $stderr);
+      $update_available = trim($compare) == "<";
+    }}
+    $packages[$name] = [
+      "name" => $name,
+      "installed_version" => $installed_version,
+      "version" => $update_available ? $version : $installed_version,
+      "update_available" => $update_available,
+    ];
+  }}
+  file_put_contents($packages_cache_file, json_encode(["key" => $packages_key, "packages" => $packages]));
+}}
+
 $toreturn = [
-  "data" => $running,
+  "data" => [
+      "base" => $base,
+      "packages" => $packages,
+    ]
 ];
 """.format(
             json.dumps(
                 {
-                    "pid": pid,
+                    "use_cache": use_cache,
                 }
             )
         )
+        return script
 
-        response = self._exec_php(script)
-        return response["data"]
+    def _get_firmware_update_info_response(self, response):
+        info = response["data"]
+        # php encodes an empty keyed array as a list
+        if isinstance(info.get("packages"), list):
+            info["packages"] = {}
+        return info
 
-    @_log_errors
-    def get_system_serial(self):
+    def _upgrade_firmware_script(self):
         script = """
-// release the mutex immediately so other api calls can go through
-// as this one can take a minute
-require_once '/etc/inc/util.inc';
-global $xmlrpclockkey;
-unlock($xmlrpclockkey);
-
+// start from an empty log so progress can be read from offset 0
+@unlink("/tmp/hass-upgrade.log");
+$ret = mwexec_bg("pfSense-upgrade -y -l /tmp/hass-upgrade.log -p /tmp/hass-upgrade.sock");
 $toreturn = [
-  "data" => system_get_serial(),
+  "data" => $ret,
 ];
 """
-        response = self._exec_php(script)
+        return script
+
+    def _upgrade_firmware_response(self, response):
+        self.clear_cached_identity()
         return response["data"]
 
-    @_log_errors
-    def get_netgate_device_id(self):
+    def _get_upgrade_progress_script(self, pid, offset=0, max_bytes=65536):
+        """
+        the upgrade log from byte offset on, up to max_bytes and cut at the
+        last complete line, along with whether pid is still running and the
+        boot time (the firewall reboots at the end of most upgrades)
+        """
         script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+$data = json_decode('{}', true);
+$log_file = "/tmp/hass-upgrade.log";
+$offset = (int) $data["offset"];
+$size = file_exists($log_file) ? filesize($log_file) : 0;
+if ($offset > $size) {{
+  // the log was started over
+  $offset = 0;
+}}
+
+$chunk = "";
+if ($size > $offset) {{
+  $handle = fopen($log_file, "r");
+  fseek($handle, $offset);
+  $chunk = fread($handle, $data["max_bytes"]);
+  fclose($handle);
+  // a partial last line is read again by the next call
+  $end = strrpos($chunk, "\\n");
+  if ($end !== false) {{
+    $chunk = substr($chunk, 0, $end + 1);
+  }} elseif (strlen($chunk) < $data["max_bytes"]) {{
+    $chunk = "";
+  }}
+}}
+
+$boottime = exec_command("sysctl -n kern.boottime");
+// {{ sec = 1634047554, usec = 237429 }} Tue Oct 12 08:05:54 2021
+preg_match("/sec = ([0-9]+)/", $boottime, $matches);
+
 $toreturn = [
-  "data" => system_get_uniqueid(),
+  "data" => [
+    "running" => $data["pid"] ? posix_kill($data["pid"], 0) : false,
+    "boottime" => (int) $matches[1],
+    "offset" => $offset + strlen($chunk),
+    "size" => $size,
+    "log" => mb_convert_encoding($chunk, "UTF-8", "UTF-8"),
+  ],
 ];
-"""
-        response = self._exec_php(script)
+""".format(
+            json.dumps(
+                {
+                    "pid": pid,
+                    "offset": offset,
+                    "max_bytes": max_bytes,
+                }
+            )
+        )
+        return script
+
+    def _get_upgrade_progress_response(self, response):
         return response["data"]
 
-    @_log_errors
-    def get_system_info(self):
+    def _get_system_info_script(self):
         # TODO: add bios details here
         script = """
 // release the mutex immediately so other api calls can go through
@@ -289,11 +1178,15 @@ $toreturn = [
   "platform" => system_identify_specific_platform(),
 ];
 """
-        response = self._exec_php(script)
+        return script
+
+    def _get_system_info_response(self, response):
         return response
 
-    @_log_errors
-    def get_config(self):
+    def _get_config_script(self, projection=None):
+        if projection is not None:
+            return self._get_config_projection_script(projection)
+
         script = """
 // release the mutex immediately so other api calls can go through
 // as this one can take a minute
@@ -307,155 +1200,151 @@ $toreturn = [
   "data" => $config,
 ];
 """
-        response = self._exec_php(script)
-        return response["data"]
-
-    @_log_errors
-    def get_interfaces(self):
-        return self._get_config_section("interfaces")
-
-    @_log_errors
-    def get_interface(self, interface):
-        interfaces = self.get_interfaces()
-        return interfaces[interface]
-
-    @_log_errors
-    def get_interface_by_description(self, interface):
-        interfaces = self.get_interfaces()
-        for i, i_interface in enumerate(interfaces.keys()):
-            if interfaces[i_interface]["descr"] == interface:
-                return interfaces[i_interface]
-
-    @_log_errors
-    def enable_filter_rule_by_tracker(self, tracker):
-        config = self.get_config()
-        for rule in config["filter"]["rule"]:
-            if "tracker" not in rule.keys():
-                continue
-            if rule["tracker"] != tracker:
-                continue
-
-            if "disabled" in rule.keys():
-                del rule["disabled"]
-                self._restore_config_section("filter", config["filter"])
-
-    @_log_errors
-    def disable_filter_rule_by_tracker(self, tracker):
-        config = self.get_config()
-
-        for rule in config["filter"]["rule"]:
-            if "tracker" not in rule.keys():
-                continue
-            if rule["tracker"] != tracker:
-                continue
-
-            if "disabled" not in rule.keys():
-                rule["disabled"] = ""
-                self._restore_config_section("filter", config["filter"])
-
-    # use created_time as a unique_id since none other exists
-    @_log_errors
-    def enable_nat_port_forward_rule_by_created_time(self, created_time):
-        config = self.get_config()
-        if created_time is None:
-            return
-
-        for rule in config["nat"]["rule"]:
-            if dict_get(rule, "created.time") != created_time:
-                continue
-
-            if "disabled" in rule.keys():
-                del rule["disabled"]
-                self._restore_config_section("nat", config["nat"])
-
-    # use created_time as a unique_id since none other exists
-    @_log_errors
-    def disable_nat_port_forward_rule_by_created_time(self, created_time):
-        config = self.get_config()
-        if created_time is None:
-            return
+        return script
 
-        for rule in config["nat"]["rule"]:
-            if dict_get(rule, "created.time") != created_time:
-                continue
+    def _get_config_projection_script(self, projection):
+        # projection maps the path of a list in the config to the field paths
+        # to keep from each item, ie: {"filter.rule": ["tracker", "created.time"]}
+        # the result has the same shape as the config with only those fields
+        script = """
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
 
-            if "disabled" not in rule.keys():
-                rule["disabled"] = ""
-                self._restore_config_section("nat", config["nat"])
+global $config;
 
-    # use created_time as a unique_id since none other exists
-    @_log_errors
-    def enable_nat_outbound_rule_by_created_time(self, created_time):
-        config = self.get_config()
-        if created_time is None:
-            return
+$data = json_decode({}, true);
 
-        for rule in config["nat"]["outbound"]["rule"]:
-            if dict_get(rule, "created.time") != created_time:
-                continue
+$get_path = function ($array, $path) {{
+  foreach (explode(".", $path) as $key) {{
+    if (!is_array($array) || !array_key_exists($key, $array)) {{
+      return [false, null];
+    }}
+    $array = $array[$key];
+  }}
+  return [true, $array];
+}};
+
+$set_path = function (&$array, $path, $value) {{
+  $ref = &$array;
+  foreach (explode(".", $path) as $key) {{
+    if (!isset($ref[$key]) || !is_array($ref[$key])) {{
+      $ref[$key] = [];
+    }}
+    $ref = &$ref[$key];
+  }}
+  $ref = $value;
+}};
 
-            if "disabled" in rule.keys():
-                del rule["disabled"]
-                self._restore_config_section("nat", config["nat"])
+$projected = [];
+// always included so the result can be cached by revision
+if (isset($config["revision"])) {{
+  $projected["revision"] = $config["revision"];
+}}
 
-    # use created_time as a unique_id since none other exists
-    @_log_errors
-    def disable_nat_outbound_rule_by_created_time(self, created_time):
-        config = self.get_config()
-        if created_time is None:
-            return
+foreach ($data["projection"] as $list_path => $fields) {{
+  list($found, $items) = $get_path($config, $list_path);
+  if (!$found || !is_array($items)) {{
+    continue;
+  }}
+  $list = [];
+  foreach ($items as $item) {{
+    if (!is_array($item)) {{
+      continue;
+    }}
+    $entry = [];
+    foreach ($fields as $field) {{
+      list($found, $value) = $get_path($item, $field);
+      if ($found) {{
+        $set_path($entry, $field, $value);
+      }}
+    }}
+    $list[] = $entry;
+  }}
+  $set_path($projected, $list_path, $list);
+}}
 
-        for rule in config["nat"]["outbound"]["rule"]:
-            if dict_get(rule, "created.time") != created_time:
-                continue
+$toreturn = [
+  "data" => $projected,
+];
+""".format(
+            php_quote(json.dumps({"projection": projection}))
+        )
+        return script
 
-            if "disabled" not in rule.keys():
-                rule["disabled"] = ""
-                self._restore_config_section("nat", config["nat"])
+    def _get_config_response(self, response):
+        return response["data"]
 
-    @_log_errors
-    def get_configured_interface_descriptions(self):
+    def _get_config_revision_script(self):
         script = """
-// release the mutex immediately so other api calls can go through
-// as this one can take a minute
 require_once '/etc/inc/util.inc';
 global $xmlrpclockkey;
 unlock($xmlrpclockkey);
 
+global $config;
+
 $toreturn = [
-  "data" => get_configured_interface_with_descr(),
+  "data" => $config["revision"] ?? null,
 ];
 """
-        response = self._exec_php(script)
+        return script
+
+    def _get_config_revision_response(self, response):
         return response["data"]
 
-    @_log_errors
-    def get_gateways(self):
-        # {'GW_WAN': {'interface': '<if>', 'gateway': '<ip>', 'name': 'GW_WAN', 'weight': '1', 'ipprotocol': 'inet', 'interval': '', 'descr': 'Interface wan Gateway', 'monitor': '<ip>', 'friendlyiface': 'wan', 'friendlyifdescr': 'WAN', 'isdefaultgw': True, 'attribute': 0, 'tiername': 'Default (IPv4)'}}
+    def _is_cached_config_current(self, revision, projection=None):
+        # without a revision there is no way to tell if the config changed
+        return (
+            revision is not None
+            and self._cached_config is not None
+            and revision == self._cached_config_revision
+            and projection == self._cached_config_projection
+        )
+
+    def _set_cached_config(self, config, projection=None):
+        self._cached_config = config
+        self._cached_config_revision = dict_get(config, "revision")
+        self._cached_config_projection = projection
+
+    def _get_identity_key_script(self):
+        # cheap values that change whenever the identity may have changed
         script = """
-// release the mutex immediately so other api calls can go through
-// as this one can take a minute
 require_once '/etc/inc/util.inc';
 global $xmlrpclockkey;
 unlock($xmlrpclockkey);
 
+global $config;
+
+$boottime = exec_command("sysctl -n kern.boottime");
+// { sec = 1634047554, usec = 237429 } Tue Oct 12 08:05:54 2021
+preg_match("/sec = ([0-9]+)/", $boottime, $matches);
+
 $toreturn = [
-  "data" => return_gateways_array(),
+  "data" => [
+    "boottime" => (int) $matches[1],
+    "revision" => $config["revision"] ?? null,
+  ],
 ];
 """
-        response = self._exec_php(script)
+        return script
+
+    def _get_identity_key_response(self, response):
         return response["data"]
 
-    @_log_errors
-    def get_gateway(self, gateway):
-        gateways = self.get_gateways()
-        for g in gateways.keys():
-            if g == gateway:
-                return gateways[g]
+    def _is_cached_identity_current(self, key):
+        return self._cached_identity is not None and key == self._cached_identity_key
 
-    @_log_errors
-    def get_gateways_status(self):
-        # {'GW_WAN': {'monitorip': '<ip>', 'srcip': '<ip>', 'name': 'GW_WAN', 'delay': '0.387ms', 'stddev': '0.097ms', 'loss': '0.0%', 'status': 'online', 'substatus': 'none'}}
+    def _set_cached_identity(self, identity, key):
+        self._cached_identity = identity
+        self._cached_identity_key = key
+
+    def clear_cached_identity(self):
+        """force the identity to be refetched, ie: after an upgrade"""
+        self._cached_identity = None
+        self._cached_identity_key = None
+
+    def _get_interfaces_script(self):
+        # same as the interfaces config section but usable as part of a batch
         script = """
 // release the mutex immediately so other api calls can go through
 // as this one can take a minute
@@ -463,23 +1352,18 @@ require_once '/etc/inc/util.inc';
 global $xmlrpclockkey;
 unlock($xmlrpclockkey);
 
+global $config;
+
 $toreturn = [
-  // function return_gateways_status($byname = false, $gways = false)
-  "data" => return_gateways_status(true),
+  "data" => $config["interfaces"],
 ];
 """
-        response = self._exec_php(script)
-        return response["data"]
+        return script
 
-    @_log_errors
-    def get_gateway_status(self, gateway):
-        gateways = self.get_gateways_status()
-        for g in gateways.keys():
-            if g == gateway:
-                return gateways[g]
+    def _get_interfaces_response(self, response):
+        return response["data"]
 
-    @_log_errors
-    def get_arp_table(self, resolve_hostnames=False):
+    def _get_arp_table_script(self, resolve_hostnames=False):
         # [{'hostname': '?', 'ip-address': '<ip>', 'mac-address': '<mac>', 'interface': 'em0', 'expires': 1199, 'type': 'ethernet'}, ...]
         script = """
 // release the mutex immediately so other api calls can go through
@@ -500,54 +1384,12 @@ $toreturn = [
                 }
             )
         )
-        response = self._exec_php(script)
-        return response["data"]
-
-    @_log_errors
-    def set_default_gateway(self, gateway, ip_version="4"):
-        ipVersion = str(ip_version)
-        key = "defaultgw4"
-        if "4" in ipVersion:
-            key = "defaultgw4"
-        if "6" in ipVersion:
-            key = "defaultgw6"
-
-        script = """
-require_once '/etc/inc/config.inc';
-global $config;
-
-$data = json_decode('{}', true);
-$key = $data["key"];
-$config['gateways'][$key] = $data["gateway"];
-
-mark_subsystem_dirty('staticroutes');
-write_config("System - Gateways: save default gateway");
-
-$retval = 0;
-                    
-$retval |= system_routing_configure();
-$retval |= system_resolvconf_generate();
-$retval |= filter_configure();
-/* reconfigure our gateway monitor */
-setup_gateways_monitor();
-/* Dynamic DNS on gw groups may have changed */
-send_event("service reload dyndnsall");
-
-if ($retval == 0) {{
-  clear_subsystem_dirty('staticroutes');
-}}
-
-$toreturn = [
-  "data" => $retval
-];
-""".format(
-            json.dumps({"key": key, "gateway": gateway})
-        )
+        return script
 
-        self._exec_php(script)
+    def _get_arp_table_response(self, response):
+        return response["data"]
 
-    @_log_errors
-    def get_services(self):
+    def _get_services_script(self):
         # function get_services()
         # ["",{"name":"nut","rcfile":"nut.sh","executable":"upsmon","description":"UPS monitoring daemon"},{"name":"iperf","executable":"iperf3","description":"iperf Network Performance Testing Daemon/Client","stopcmd":"mwexec(\"/usr/bin/killall iperf3\");"},{"name":"telegraf","rcfile":"telegraf.sh","executable":"telegraf","description":"Telegraf daemon"},{"name":"vnstatd","rcfile":"vnstatd.sh","executable":"vnstatd","description":"Status Traffic Totals data collection daemon"},{"name":"wireguard","rcfile":"wireguardd","executable":"php_wg","description":"WireGuard"},{"name":"FRR zebra","rcfile":"frr.sh","executable":"zebra","description":"FRR core/abstraction daemon"},{"name":"FRR staticd","rcfile":"frr.sh","executable":"staticd","description":"FRR static route daemon"},{"name":"FRR bfdd","rcfile":"frr.sh","executable":"bfdd","description":"FRR BFD daemon"},{"name":"FRR bgpd","rcfile":"frr.sh","executable":"bgpd","description":"FRR BGP routing daemon"},{"name":"FRR ospfd","rcfile":"frr.sh","executable":"ospfd","description":"FRR OSPF routing daemon"},{"name":"FRR ospf6d","rcfile":"frr.sh","executable":"ospf6d","description":"FRR OSPF6 routing daemon"},{"name":"FRR watchfrr","rcfile":"frr.sh","executable":"watchfrr","description":"FRR watchfrr watchdog daemon"},{"name":"haproxy","rcfile":"haproxy.sh","executable":"haproxy","description":"TCP/HTTP(S) Load Balancer"},{"name":"unbound","description":"DNS Resolver","enabled":true,"status":true},{"name":"pcscd","description":"PC/SC Smart Card Daemon","enabled":true,"status":true},{"name":"ntpd","description":"NTP clock sync","enabled":true,"status":true},{"name":"syslogd","description":"System Logger Daemon","enabled":true,"status":true},{"name":"dhcpd","description":"DHCP Service","enabled":true,"status":true},{"name":"dpinger","description":"Gateway Monitoring Daemon","enabled":true,"status":true},{"name":"miniupnpd","description":"UPnP Service","enabled":true,"status":true},{"name":"ipsec","description":"IPsec VPN","enabled":true,"status":true},{"name":"sshd","description":"Secure Shell Daemon","enabled":true,"status":true},{"name":"openvpn","mode":"server","id":0,"vpnid":"1","description":"OpenVPN server: primary vpn","enabled":true,"status":true}]
         script = """
@@ -558,6 +1400,25 @@ global $xmlrpclockkey;
 unlock($xmlrpclockkey);
 
 require_once '/etc/inc/service-utils.inc';
+global $config;
+
+// single snapshot of the process table rather than a pgrep per service
+// pgrep matches against the command name which is truncated to MAXCOMLEN
+$ps = [];
+exec("/bin/ps -ax -o comm=", $ps_output);
+foreach ($ps_output as $line) {
+  $ps[trim($line)] = true;
+}
+
+$packages = [];
+if (is_array($config['installedpackages']['service'])) {
+  foreach ($config['installedpackages']['service'] as $package) {
+    if (is_array($package) && isset($package['name'])) {
+      $packages[strtolower($package['name'])] = $package;
+    }
+  }
+}
+
 // only returns enabled services currently
 $s = get_services();
 $services = [];
@@ -565,9 +1426,28 @@ foreach($s as $service) {
   if (!is_array($service)) {
       continue;
   }
-  if (!empty($service)) {
-    $services[] = $service;
+  if (empty($service)) {
+    continue;
+  }
+
+  // package services do not report a status, resolve it the same way as
+  // is_service_running() does: the status command or executable of the
+  // installed package, otherwise a process named after the service
+  if (!array_key_exists("status", $service)) {
+    $package = $packages[strtolower($service["name"])] ?? null;
+    if ($package && !empty($package['custom_php_service_status_command'])) {
+      $service["status"] = (bool) is_service_running($service["name"]);
+    } else {
+      if ($package) {
+        $process = $package['executable'] ?? "";
+      } else {
+        $process = $service["name"];
+      }
+      $service["status"] = !empty($process) && isset($ps[substr($process, 0, 19)]);
+    }
   }
+
+  $services[] = $service;
 }
 
 $toreturn = [
@@ -575,52 +1455,15 @@ $toreturn = [
   "data" => $services,
 ];
 """
-        response = self._exec_php(script)
-
-        for service in response["data"]:
-            if "status" not in service:
-                service["status"] = self.get_service_is_running(
-                    service["name"], service
-                )
+        return script
 
+    def _get_services_response(self, response):
         return response["data"]
 
-    @_log_errors
-    def get_service_is_enabled(self, service_name, service={}):
+    def _get_service_is_running_script(self, service_name, service={}):
         service = normalize_service_data(service)
 
-        # function is_service_enabled($service_name)
-        script = """
-// release the mutex immediately so other api calls can go through
-// as this one can take a minute
-require_once '/etc/inc/util.inc';
-global $xmlrpclockkey;
-unlock($xmlrpclockkey);
-
-require_once '/etc/inc/service-utils.inc';
-
-$data = json_decode('{}', true);
-$service_name = $data["service_name"];
-$toreturn = [
-  // always returns true, so mostly useless at this point
-  "data" => is_service_enabled($service_name),
-];
-""".format(
-            json.dumps(
-                {
-                    "service_name": service_name,
-                    "service": service,
-                }
-            )
-        )
-        response = self._exec_php(script)
-        return response["data"]
-
-    @_log_errors
-    def get_service_is_running(self, service_name, service={}):
-        service = normalize_service_data(service)
-
-        # function is_service_running($service, $ps = "")
+        # function is_service_running($service, $ps = "")
         script = """
 // release the mutex immediately so other api calls can go through
 // as this one can take a minute
@@ -667,209 +1510,192 @@ else {{
                 }
             )
         )
-        response = self._exec_php(script)
-        return response["data"]
+        return script
 
-    @_log_errors
-    def start_service(self, service_name, service={}):
-        service = normalize_service_data(service)
+    def _get_service_is_running_response(self, response):
+        return response["data"]
 
-        # function start_service($name, $after_sync = false)
+    def _get_dhcp_leases_script(self, dns_lookups=None):
+        # the "lease" list of system_get_dhcpleases(), or the same built from
+        # the kea leases when kea is the dhcp backend
+        # function system_get_dhcpleases()
+        # {'lease': [], 'failover': []}
+        # {"lease":[{"ip":"<ip>","type":"static","mac":"<mac>","if":"lan","starts":"","ends":"","hostname":"<hostname>","descr":"","act":"static","online":"online","staticmap_array_index":48} ...
         script = """
-require_once '/etc/inc/service-utils.inc';
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
 
-$data = json_decode('{}', true);
-$service_name = $data["service_name"];
-$service = $data["service"];
-if (!$service) {{
-  $service = [];
-}}
+{}
 
-if ($service_name == "openvpn" && $service) {{
-  // requires name, mode and vpnid
-  if (!$service["name"]) {{
-    $service["name"] = $service_name;
-  }}
-  if (!$service["vpnmode"] && $service["mode"]) {{
-    $service["vpnmode"] = $service["mode"];
-  }}
-  if (!$service["mode"] && $service["vpnmode"]) {{
-    $service["mode"] = $service["vpnmode"];
-  }}
-  $service["id"] = $service["vpnid"];
-  $is_running = (bool) get_service_status($service);
-}}
-else {{
-  $is_running = is_service_running($service_name);
-}}
+$data = json_decode('{}', true);
 
-if (!$is_running) {{
-  service_control_start($service_name, $service);
+$dns_lookups = null;
+if ($data["dns_lookups"] === true || $data["dns_lookups"] === false) {{
+  $dns_lookups = $data["dns_lookups"];
 }}
 
 $toreturn = [
-  // no return value
-  "data" => true,
+  "data" => hass_get_dhcp_leases($dns_lookups),
 ];
 """.format(
+            _PHP_DHCP_LEASES,
             json.dumps(
                 {
-                    "service_name": service_name,
-                    "service": service,
+                    "dns_lookups": dns_lookups,
                 }
-            )
+            ),
         )
-        self._exec_php(script)
+        return script
 
-    @_log_errors
-    def stop_service(self, service_name, service={}):
-        service = normalize_service_data(service)
+    def _get_dhcp_leases_response(self, response):
+        return response["data"]
 
-        # function stop_service($name)
+    def _get_dhcp_leases_delta_script(self, generation=None, dns_lookups=None):
+        # the generation covers everything the leases are built from, when
+        # it changed only the leases (keyed by mac|ip) differing from the
+        # snapshot kept for the previous generation are returned
+        # {"generation": "<md5>", "mode": "unchanged"}
+        # {"generation": "<md5>", "mode": "full", "leases": {"<mac>|<ip>": {...}}}
+        # {"generation": "<md5>", "mode": "delta", "leases": {...}, "removed": [...]}
         script = """
-require_once '/etc/inc/service-utils.inc';
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+global $config;
+
+{}
 
 $data = json_decode('{}', true);
-$service_name = $data["service_name"];
-$service = $data["service"];
-if (!$service) {{
-  $service = [];
-}}
 
-if ($service_name == "openvpn" && $service) {{
-  // requires name, mode, and vpnid
-  if (!$service["name"]) {{
-    $service["name"] = $service_name;
-  }}
-  if (!$service["vpnmode"] && $service["mode"]) {{
-    $service["vpnmode"] = $service["mode"];
-  }}
-  if (!$service["mode"] && $service["vpnmode"]) {{
-    $service["mode"] = $service["vpnmode"];
-  }}
-  $service["id"] = $service["vpnid"];
-  $is_running = (bool) get_service_status($service);
-}}
-else {{
-  $is_running = is_service_running($service_name);
+$dns_lookups = null;
+if ($data["dns_lookups"] === true || $data["dns_lookups"] === false) {{
+  $dns_lookups = $data["dns_lookups"];
 }}
 
-if ($is_running) {{
-  service_control_stop($service_name, $service);
-}}
-$toreturn = [
-  // no return value
-  "data" => true,
+$generation_parts = [json_encode($dns_lookups), json_encode($config["revision"] ?? null)];
+$lease_files = [
+  "/var/dhcpd/var/db/dhcpd.leases",
+  "/var/dhcpd/var/db/dhcpd6.leases",
+  "/var/lib/kea/dhcp4.leases",
+  "/var/lib/kea/dhcp6.leases",
 ];
-""".format(
-            json.dumps(
-                {
-                    "service_name": service_name,
-                    "service": service,
-                }
-            )
-        )
-        self._exec_php(script)
-
-    @_log_errors
-    def restart_service(self, service_name, service={}):
-        service = normalize_service_data(service)
-
-        # function restart_service($name) (if service is not currently running, it will be started)
-        script = """
-require_once '/etc/inc/service-utils.inc';
-
-$data = json_decode('{}', true);
-$service_name = $data["service_name"];
-$service = $data["service"];
-if (!$service) {{
-  $service = [];
+foreach ($lease_files as $file) {{
+  $stat = @stat($file);
+  $generation_parts[] = $stat ? $stat["mtime"] . ":" . $stat["size"] : "";
 }}
-
-if ($service_name == "openvpn" && $service) {{
-  // requires name, mode, and vpnid
-  if (!$service["name"]) {{
-    $service["name"] = $service_name;
+// online/offline comes from the arp and ndp tables, only their ip/mac pairs
+// count as the raw output holds expiry countdowns changing every second
+$neighbors = [];
+$arp_lines = [];
+exec("/usr/sbin/arp -an", $arp_lines);
+foreach ($arp_lines as $line) {{
+  // ? (192.168.1.10) at 00:11:22:33:44:55 on em1 expires in 1180 seconds [ethernet]
+  if (preg_match('/\\((\\S+)\\) at ([0-9a-f]{{2}}(:[0-9a-f]{{2}}){{5}})/i', $line, $matches)) {{
+    $neighbors[] = $matches[1] . "|" . strtolower($matches[2]);
   }}
-  if (!$service["vpnmode"] && $service["mode"]) {{
-    $service["vpnmode"] = $service["mode"];
-  }}
-  if (!$service["mode"] && $service["vpnmode"]) {{
-    $service["mode"] = $service["vpnmode"];
+}}
+$ndp_lines = [];
+exec("/usr/sbin/ndp -an", $ndp_lines);
+foreach ($ndp_lines as $line) {{
+  // fe80::1%em1 00:11:22:33:44:55 em1 23h59m58s S R
+  $fields = preg_split('/\\s+/', trim($line));
+  if (count($fields) > 1 && preg_match('/^[0-9a-f]{{2}}(:[0-9a-f]{{2}}){{5}}$/i', $fields[1])) {{
+    $neighbors[] = $fields[0] . "|" . strtolower($fields[1]);
   }}
-  $service["id"] = $service["vpnid"];
 }}
-
-service_control_restart($service_name, $service);
-$toreturn = [
-  // no return value
-  "data" => true,
-];
-""".format(
-            json.dumps(
-                {
-                    "service_name": service_name,
-                    "service": service,
-                }
-            )
-        )
-        self._exec_php(script)
-
-    @_log_errors
-    def restart_service_if_running(self, service_name, service={}):
-        service = normalize_service_data(service)
-
-        # function restart_service_if_running($service)
-        script = """
-require_once '/etc/inc/service-utils.inc';
-
-$data = json_decode('{}', true);
-$service_name = $data["service_name"];
-$service = $data["service"];
-if (!$service) {{
-  $service = [];
+sort($neighbors);
+$generation_parts[] = md5(implode(",", $neighbors));
+$generation = md5(implode("|", $generation_parts));
+
+$snapshot_prefix = "/tmp/hass-dhcp-leases-";
+$previous_generation = $data["generation"];
+if (!is_string($previous_generation) || !preg_match('/^[0-9a-f]{{32}}$/', $previous_generation)) {{
+  $previous_generation = null;
 }}
 
-if ($service_name == "openvpn" && $service) {{
-  // requires name, mode, and vpnid
-  if (!$service["name"]) {{
-    $service["name"] = $service_name;
+if ($previous_generation === $generation) {{
+  @touch($snapshot_prefix . $generation . ".json");
+  $toreturn = [
+    "data" => [
+      "generation" => $generation,
+      "mode" => "unchanged",
+    ],
+  ];
+}} else {{
+  $leases = [];
+  $digests = [];
+  foreach (hass_get_dhcp_leases($dns_lookups) as $lease) {{
+    $key = $lease["mac"] . "|" . $lease["ip"];
+    $leases[$key] = $lease;
+    $digests[$key] = md5(json_encode($lease));
   }}
-  if (!$service["vpnmode"] && $service["mode"]) {{
-    $service["vpnmode"] = $service["mode"];
+
+  $previous = null;
+  if ($previous_generation !== null) {{
+    $previous = json_decode(@file_get_contents($snapshot_prefix . $previous_generation . ".json"), true);
   }}
-  if (!$service["mode"] && $service["vpnmode"]) {{
-    $service["mode"] = $service["vpnmode"];
+  file_put_contents($snapshot_prefix . $generation . ".json", json_encode($digests));
+
+  // snapshots no client asked about for an hour are dropped
+  foreach (glob($snapshot_prefix . "*.json") as $file) {{
+    if (filemtime($file) < time() - 3600) {{
+      @unlink($file);
+    }}
   }}
-  $service["id"] = $service["vpnid"];
-  $is_running = (bool) get_service_status($service);
-}}
-else {{
-  $is_running = is_service_running($service_name);
-}}
 
-if ($is_running) {{
-  service_control_restart($service_name, $service);
+  if (!is_array($previous)) {{
+    $toreturn = [
+      "data" => [
+        "generation" => $generation,
+        "mode" => "full",
+        "leases" => $leases,
+      ],
+    ];
+  }} else {{
+    $changed = [];
+    foreach ($digests as $key => $digest) {{
+      if (($previous[$key] ?? null) !== $digest) {{
+        $changed[$key] = $leases[$key];
+      }}
+    }}
+    $toreturn = [
+      "data" => [
+        "generation" => $generation,
+        "mode" => "delta",
+        "leases" => $changed,
+        "removed" => array_keys(array_diff_key($previous, $digests)),
+      ],
+    ];
+  }}
 }}
-$toreturn = [
-  // no return value
-  "data" => true,
-];
 """.format(
+            _PHP_DHCP_LEASES,
             json.dumps(
                 {
-                    "service_name": service_name,
-                    "service": service,
+                    "generation": generation,
+                    "dns_lookups": dns_lookups,
                 }
-            )
+            ),
         )
-        self._exec_php(script)
+        return script
 
-    @_log_errors
-    def get_dhcp_leases(self, dns_lookups=None):
-        # function system_get_dhcpleases()
-        # {'lease': [], 'failover': []}
-        # {"lease":[{"ip":"<ip>","type":"static","mac":"<mac>","if":"lan","starts":"","ends":"","hostname":"<hostname>","descr":"","act":"static","online":"online","staticmap_array_index":48} ...
+    def _get_dhcp_leases_delta_response(self, response):
+        delta = response["data"]
+        # php encodes an empty keyed array as a list
+        if isinstance(delta.get("leases"), list):
+            delta["leases"] = {}
+        return delta
+
+    def _get_carp_status_script(self):
+        # carp enabled or not
+        # readonly attribute, cannot be set directly
+        # function get_carp_status()
         script = """
 // release the mutex immediately so other api calls can go through
 // as this one can take a minute
@@ -877,28 +1703,16 @@ require_once '/etc/inc/util.inc';
 global $xmlrpclockkey;
 unlock($xmlrpclockkey);
 
-$data = json_decode('{}', true);
-
-$dns_lookups = null;
-if ($data["dns_lookups"] === true || $data["dns_lookups"] === false) {{
-  $dns_lookups = $data["dns_lookups"];
-}}
-
 $toreturn = [
-  "data" => system_get_dhcpleases($dns_lookups),
+  "data" => get_carp_status(),
 ];
-""".format(
-            json.dumps(
-                {
-                    "dns_lookups": dns_lookups,
-                }
-            )
-        )
-        response = self._exec_php(script)
-        return response["data"]["lease"]
+"""
+        return script
 
-    @_log_errors
-    def get_virtual_ips(self):
+    def _get_carp_status_response(self, response):
+        return response["data"]
+
+    def _get_carp_interfaces_script(self):
         script = """
 // release the mutex immediately so other api calls can go through
 // as this one can take a minute
@@ -911,65 +1725,32 @@ global $config;
 $vips = [];
 if ($config['virtualip'] && is_iterable($config['virtualip']['vip'])) {
   foreach ($config['virtualip']['vip'] as $vip) {
+    if ($vip["mode"] != "carp") {
+      continue;
+    }
     $vips[] = $vip;
   }
 }
 
+foreach ($vips as &$vip) {
+  $status = get_carp_interface_status("_vip{$vip['uniqid']}");
+  $vip["status"] = $status;
+}
+
 $toreturn = [
   "data" => $vips,
 ];
 """
-        response = self._exec_php(script)
+        return script
+
+    def _get_carp_interfaces_response(self, response):
         return response["data"]
 
-    @_log_errors
-    def get_carp_status(self):
-        # carp enabled or not
-        # readonly attribute, cannot be set directly
-        # function get_carp_status()
-        script = """
-// release the mutex immediately so other api calls can go through
-// as this one can take a minute
-require_once '/etc/inc/util.inc';
-global $xmlrpclockkey;
-unlock($xmlrpclockkey);
-
-$toreturn = [
-  "data" => get_carp_status(),
-];
-"""
-        response = self._exec_php(script)
-        return response["data"]
-
-    @_log_errors
-    def get_carp_interface_status(self, uniqueid):
-        # function get_carp_interface_status($carpid)
-        script = """
-// release the mutex immediately so other api calls can go through
-// as this one can take a minute
-require_once '/etc/inc/util.inc';
-global $xmlrpclockkey;
-unlock($xmlrpclockkey);
-
-$data = json_decode('{}', true);
-$uniqueid = $data["uniqueid"];
-$carp_if = "_vip{{$uniqueid}}";
-$status = get_carp_interface_status($carp_if);
-$toreturn = [
-  "data" => $status,
-];
-""".format(
-            json.dumps(
-                {
-                    "uniqueid": uniqueid,
-                }
-            )
-        )
-        response = self._exec_php(script)
-        return response["data"]
-
-    @_log_errors
-    def get_carp_interfaces(self):
+    def _get_carp_state_script(self):
+        """
+        carp enable flag, maintenance mode and every vip status derived
+        from a single ifconfig snapshot instead of one ifconfig per vip
+        """
         script = """
 // release the mutex immediately so other api calls can go through
 // as this one can take a minute
@@ -977,227 +1758,81 @@ require_once '/etc/inc/util.inc';
 global $xmlrpclockkey;
 unlock($xmlrpclockkey);
 
+require_once '/etc/inc/interfaces.inc';
 global $config;
 
+// <real interface> => [<vhid> => MASTER|BACKUP|INIT]
+$carp_states = [];
+$ifconfig = [];
+exec("/sbin/ifconfig", $ifconfig);
+$ifname = null;
+foreach ($ifconfig as $line) {
+  if (preg_match('/^([^\\s:]+):\\s+flags=/', $line, $matches)) {
+    $ifname = $matches[1];
+    continue;
+  }
+  if ($ifname !== null && preg_match('/carp:\\s+(MASTER|BACKUP|INIT)\\s+vhid\\s+(\\d+)\\s/', $line . " ", $matches)) {
+    $carp_states[$ifname][$matches[2]] = $matches[1];
+  }
+}
+
 $vips = [];
 if ($config['virtualip'] && is_iterable($config['virtualip']['vip'])) {
   foreach ($config['virtualip']['vip'] as $vip) {
     if ($vip["mode"] != "carp") {
       continue;
     }
+    // same result as get_carp_interface_status() without the extra ifconfig
+    $realif = get_real_interface($vip["interface"]);
+    $vip["status"] = $carp_states[$realif][$vip["vhid"]] ?? "";
     $vips[] = $vip;
   }
 }
 
-foreach ($vips as &$vip) {
-  $status = get_carp_interface_status("_vip{$vip['uniqid']}");
-  $vip["status"] = $status;
-}
-
-$toreturn = [
-  "data" => $vips,
-];
-"""
-        response = self._exec_php(script)
-        return response["data"]
-
-    @_log_errors
-    def delete_arp_entry(self, ip):
-        if len(ip) < 1:
-            return
-        script = """
-$data = json_decode('{}', true);
-$ip = trim($data["ip"]);
-$ret = mwexec("arp -d " . $ip, true);
-$toreturn = [
-  "data" => $ret,
-];
-""".format(
-            json.dumps(
-                {
-                    "ip": ip,
-                }
-            )
-        )
-        self._exec_php(script)
-
-    @_log_errors
-    def arp_get_mac_by_ip(self, ip, do_ping=True):
-        """function arp_get_mac_by_ip($ip, $do_ping = true)"""
-        script = """
-// release the mutex immediately so other api calls can go through
-// as this one can take a minute
-require_once '/etc/inc/util.inc';
-global $xmlrpclockkey;
-unlock($xmlrpclockkey);
-
-$data = json_decode('{}', true);
-$ip = $data["ip"];
-$do_ping = $data["do_ping"];
 $toreturn = [
-  "data" => arp_get_mac_by_ip($ip, $do_ping),
+  "data" => [
+    "status" => get_carp_status(),
+    "maintenance_mode" => isset($config["virtualip_carp_maintenancemode"]),
+    "interfaces" => $vips,
+  ],
 ];
-""".format(
-            json.dumps(
-                {
-                    "ip": ip,
-                    "do_ping": do_ping,
-                }
-            )
-        )
-        response = self._exec_php(script)["data"]
-        if not response:
-            return None
-        return response
-
-    @_log_errors
-    def reset_state_table(self):
-
-        script = """
-mwexec("/sbin/pfctl -F states");
 """
-        # no response is expected on success since all connections are closed
-        self._exec_php(script)
-
-    @_log_errors
-    def kill_states(self, source, destination=None):
-
-        if destination is None:
-            script = """
-$data = json_decode('{}', true);
-$source = $data["source"];
-
-mwexec("/sbin/pfctl -k $source");
-
-""".format(
-                json.dumps(
-                    {
-                        "source": source,
-                    }
-                )
-            )
-            self._exec_php(script)
-            return None
-
-        else:
-            script = """
-$data = json_decode('{}', true);
-$source = $data["source"];
-$destination = $data["destination"];
-
-mwexec("/sbin/pfctl -k $source -k $destination");
-
-""".format(
-                json.dumps(
-                    {
-                        "source": source,
-                        "destination": destination,
-                    }
-                )
-            )
-            self._exec_php(script)
-            return None
-
-    @_log_errors
-    def system_reboot(self, type="normal"):
-        """
-        type = normal = simple reboot
-        type = reroot = a reroot reboot
-        type = fsck = perform an fsck on next boot
-        """
-        script = """
-$data = json_decode('{}', true);
-$type = $data["type"];
-$type = strtolower($type);
-
-switch ($type) {{
-    case 'fsck':
-        if (php_uname('m') != 'arm') {{
-            mwexec('/sbin/nextboot -e "pfsense.fsck.force=5"');
-        }}
-        system_reboot();
-        break;
-    case 'reroot':
-        system_reboot_sync(true);
-        break;
-    case 'normal':
-        system_reboot();
-        break;
-    default:
-        break;
-}}
-
-$toreturn = [
-  "data" => true,
-];
-""".format(
-            json.dumps(
-                {
-                    "type": type,
-                }
-            )
-        )
-        try:
-            self._exec_php(script)
-        except ExpatError:
-            # ignore response failures because the system is going down
-            pass
+        return script
 
-    @_log_errors
-    def system_halt(self):
-        script = """
-system_halt();
-$toreturn = [
-  "data" => true,
-];
-"""
-        try:
-            self._exec_php(script)
-        except ExpatError:
-            # ignore response failures because the system is going down
-            pass
+    def _get_carp_state_response(self, response):
+        return response["data"]
 
-    @_log_errors
-    def send_wol(self, interface, mac):
-        """
-        interface should be wan, lan, opt1, opt2 etc, not the description
-        """
+    def _delete_arp_entry_script(self, ip):
+        return self._delete_arp_entries_script([ip])
 
+    def _delete_arp_entries_script(self, ips):
         script = """
 $data = json_decode('{}', true);
-$if = $data["interface"];
-$mac = $data["mac"];
-function send_wol($if, $mac) {{
-        $ipaddr = get_interface_ip($if);
-        if (!is_ipaddr($ipaddr) || !is_macaddr($mac)) {{
-                return false;
-        }}
-
-        $bcip = gen_subnet_max($ipaddr, get_interface_subnet($if));
-        return (bool) !mwexec("/usr/local/bin/wol -i {{$bcip}} {{$mac}}");
+$ret = [];
+foreach ($data["ips"] as $ip) {{
+  $ip = trim($ip);
+  if (!filter_var($ip, FILTER_VALIDATE_IP)) {{
+    continue;
+  }}
+  $ret[$ip] = mwexec("arp -d " . escapeshellarg($ip), true);
 }}
-
-$value = send_wol($if, $mac);
 $toreturn = [
-  "data" => $value,
+  "data" => $ret,
 ];
 """.format(
             json.dumps(
                 {
-                    "interface": interface,
-                    "mac": mac,
+                    "ips": ips,
                 }
             )
         )
+        return script
 
-        response = self._exec_php(script)
+    def _delete_arp_entries_response(self, response):
         return response["data"]
 
-    # TODO: function find_service_by_name($name)
-    # TODO: function get_service_status($service) # seems to be higher-level logic than is_service_running, passes in the full service object
-
-    @_log_errors
-    def get_telemetry(self):
+    def _get_telemetry_script(self, sections=None):
+        # sections=None gathers everything, otherwise only the named sections
         script = """
 // release the mutex immediately so other api calls can go through
 // as this one can take a minute
@@ -1217,61 +1852,53 @@ require_once '/etc/inc/ipsec.inc';
 global $config;
 global $g;
 
-function stripalpha($s) {
-  return preg_replace("/\D/", "", $s);
-}
-
-$mbuf = null;
-$mbufpercent = null;
-get_mbuf($mbuf, $mbufpercent);
-$mbuf_parts = explode("/", $mbuf);
-
-$filesystems = get_mounted_filesystems();
-$ifdescrs = get_configured_interface_with_descr();
-
-$boottime = exec_command("sysctl kern.boottime");
-// kern.boottime: { sec = 1634047554, usec = 237429 } Tue Oct 12 08:05:54 2021
-preg_match("/sec = [0-9]*/", $boottime, $matches);
-$boottime = $matches[0];
-$boottime = explode("=", $boottime)[1];
-$boottime = (int) trim($boottime);
-
-$pfstate = get_pfstate();
-// <used>/<total>
-$pfstate_parts = explode("/", $pfstate);
-
-$cpu_usage = cpu_usage();
-// 1112|111
-$cpu_usage_parts = explode("|", $cpu_usage);
-
-$system_load_average = get_load_average();
-// 0.23, 0.22, 0.21
-$system_load_average_parts = explode(",", $system_load_average);
+$data = json_decode('{}', true);
+$sections = $data["sections"];
 
-$cpu_frequency = get_cpufreq();
-// Current: 800 MHz, Max: 3700 MHz
-$cpu_frequency_parts = explode(",", $cpu_frequency);
+if (!function_exists("stripalpha")) {{
+  function stripalpha($s) {{
+    return preg_replace("/\\D/", "", $s);
+  }}
+}}
 
-$memory_info = exec_command("sysctl hw.physmem hw.usermem hw.realmem vm.swap_total vm.swap_reserved");
-$memory_parts = explode("\n", $memory_info);
+if (!function_exists("want_section")) {{
+  function want_section($sections, $section) {{
+    return $sections === null || in_array($section, $sections);
+  }}
+}}
 
-$ovpn_servers = openvpn_get_active_servers();
+$toreturn = [];
 
-$toreturn = [
+if (want_section($sections, "pfstate")) {{
+  $pfstate = get_pfstate();
+  // <used>/<total>
+  $pfstate_parts = explode("/", $pfstate);
 
-  "pfstate" => [
+  $toreturn["pfstate"] = [
     "used" => (int) $pfstate_parts[0],
     "total" => (int) $pfstate_parts[1],
     "used_percent" => get_pfstate(true),
-  ],
+  ];
+}}
 
-  "mbuf" => [
+if (want_section($sections, "mbuf")) {{
+  $mbuf = null;
+  $mbufpercent = null;
+  get_mbuf($mbuf, $mbufpercent);
+  $mbuf_parts = explode("/", $mbuf);
+
+  $toreturn["mbuf"] = [
     "used" => (int) $mbuf_parts[0],
     "total" => (int) $mbuf_parts[1],
     "used_percent" => floatval($mbufpercent),
-  ],
+  ];
+}}
 
-  "memory" => [
+if (want_section($sections, "memory")) {{
+  $memory_info = exec_command("sysctl hw.physmem hw.usermem hw.realmem vm.swap_total vm.swap_reserved");
+  $memory_parts = explode("\\n", $memory_info);
+
+  $toreturn["memory"] = [
     "swap_used_percent" => floatval(swap_usage()),
     "used_percent" => floatval(mem_usage()),
     "physmem" => (int) trim(explode(":", $memory_parts[0])[1]),
@@ -1279,9 +1906,22 @@ $toreturn = [
     "realmem" => (int) trim(explode(":", $memory_parts[2])[1]),
     "swap_total" => (int) trim(explode(":", $memory_parts[3])[1]),
     "swap_reserved" => (int) trim(explode(":", $memory_parts[4])[1]),
-  ],
+  ];
+}}
+
+if (want_section($sections, "system")) {{
+  $boottime = exec_command("sysctl kern.boottime");
+  // kern.boottime: {{ sec = 1634047554, usec = 237429 }} Tue Oct 12 08:05:54 2021
+  preg_match("/sec = [0-9]*/", $boottime, $matches);
+  $boottime = $matches[0];
+  $boottime = explode("=", $boottime)[1];
+  $boottime = (int) trim($boottime);
+
+  $system_load_average = get_load_average();
+  // 0.23, 0.22, 0.21
+  $system_load_average_parts = explode(",", $system_load_average);
 
-  "system" => [
+  $toreturn["system"] = [
     "boottime" => $boottime,
     "uptime" => (int) get_uptime_sec(),
     "temp" => floatval(get_temp()),
@@ -1290,9 +1930,19 @@ $toreturn = [
         "five_minute" => floatval(trim($system_load_average_parts[1])),
         "fifteen_minute" => floatval(trim($system_load_average_parts[2])),
     ],
-  ],
+  ];
+}}
+
+if (want_section($sections, "cpu")) {{
+  $cpu_usage = cpu_usage();
+  // 1112|111
+  $cpu_usage_parts = explode("|", $cpu_usage);
 
-  "cpu" => [
+  $cpu_frequency = get_cpufreq();
+  // Current: 800 MHz, Max: 3700 MHz
+  $cpu_frequency_parts = explode(",", $cpu_frequency);
+
+  $toreturn["cpu"] = [
     "frequency" => [
         "current" => (int) stripalpha($cpu_frequency_parts[0]),
         "max" => (int) stripalpha($cpu_frequency_parts[1]),
@@ -1303,70 +1953,168 @@ $toreturn = [
         "total" => (int) $cpu_usage_parts[0],
         "idle" => (int) $cpu_usage_parts[1],
     ],
-  ],
-
-  "filesystems" => $filesystems,
+  ];
+}}
 
-  "interfaces" => [],
+if (want_section($sections, "filesystems")) {{
+  $toreturn["filesystems"] = get_mounted_filesystems();
+}}
 
-  "openvpn" => [],
+if (want_section($sections, "interfaces")) {{
+  $toreturn["interfaces"] = [];
+  $ifdescrs = get_configured_interface_with_descr();
+  foreach ($ifdescrs as $ifdescr => $ifname) {{
+    $ifinfo = get_interface_info("${{ifdescr}}");
+    // I know these look off, but they are indeed correct
+    $ifinfo["descr"] = $ifname;
+    $ifinfo["ifname"] = $ifdescr;
+    $toreturn["interfaces"]["${{ifdescr}}"] = $ifinfo;
+  }}
+}}
 
-  "ipsec" => [],
+if (want_section($sections, "openvpn")) {{
+  $toreturn["openvpn"] = [];
+  $ovpn_servers = openvpn_get_active_servers();
+  foreach ($ovpn_servers as $server) {{
+    $vpnid = $server["vpnid"];
+    $name = $server["name"];
+    $conn_count = count($server["conns"]);
+
+    $total_bytes_recv = 0;
+    $total_bytes_sent = 0;
+    foreach ($server["conns"] as $conn) {{
+      $total_bytes_recv += $conn["bytes_recv"];
+      $total_bytes_sent += $conn["bytes_sent"];
+    }}
+
+    $toreturn["openvpn"]["servers"][$vpnid]["name"] = $name;
+    $toreturn["openvpn"]["servers"][$vpnid]["vpnid"] = $vpnid;
+    $toreturn["openvpn"]["servers"][$vpnid]["connected_client_count"] = $conn_count;
+    $toreturn["openvpn"]["servers"][$vpnid]["total_bytes_recv"] = $total_bytes_recv;
+    $toreturn["openvpn"]["servers"][$vpnid]["total_bytes_sent"] = $total_bytes_sent;
+  }}
+}}
 
-  "gateways" => return_gateways_status(true),
-  "gateways_detail" => return_gateways_array(),
-];
+if (want_section($sections, "ipsec")) {{
+  $toreturn["ipsec"] = [];
+}}
 
-foreach($filesystems as $fs) {
-  $key = str_replace("/", "_slash_", $fs["mountpoint"]);
-  $key = trim($key, "_");
-  //$toreturn["disk_usage_percent_${key}"] = floatval(disk_usage($fs["mountpoint"]));
-  //$toreturn["disk_usage_percent_${key}"] = floatval($fs["percent_used"]);
-}
+if (want_section($sections, "gateways")) {{
+  $toreturn["gateways"] = return_gateways_status(true);
+}}
 
-foreach ($ifdescrs as $ifdescr => $ifname) {
-  $data = get_interface_info("${ifdescr}");
-  // I know these look off, but they are indeed correct
-  $data["descr"] = $ifname;
-  $data["ifname"] = $ifdescr;
-  $toreturn["interfaces"]["${ifdescr}"] = $data;
-}
+if (want_section($sections, "gateways_detail")) {{
+  $toreturn["gateways_detail"] = return_gateways_array();
+}}
+""".format(
+            json.dumps(
+                {
+                    "sections": sections,
+                }
+            )
+        )
+        return script
+
+    def _get_telemetry_response(self, response):
+        for fs in response.get("filesystems", []):
+            fs["percent_used"] = int(fs["percent_used"])
 
-foreach ($ovpn_servers as $server) {
-  $vpnid = $server["vpnid"];
-  $name = $server["name"];
-  $conn_count = count($server["conns"]);
+        if isinstance(response.get("gateways"), list):
+            response["gateways"] = {}
 
-  $total_bytes_recv = 0;
-  $total_bytes_sent = 0;
-  foreach ($server["conns"] as $conn) {
-    $total_bytes_recv += $conn["bytes_recv"];
-    $total_bytes_sent += $conn["bytes_sent"];
+        return response
+
+    def _get_interface_counters_script(self):
+        # the counters of get_interface_info() without its per interface
+        # pfctl/ifconfig calls, from one pfctl and one netstat snapshot
+        script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+require_once '/etc/inc/interfaces.inc';
+global $config;
+
+// pass/block counters of every interface
+$pf = [];
+$pf_if = null;
+exec("/sbin/pfctl -vvsI", $pfctl_output);
+foreach ($pfctl_output as $line) {
+  if (preg_match('/^(\\S+)/', $line, $matches)) {
+    $pf_if = $matches[1];
+    $pf[$pf_if] = [];
+    continue;
+  }
+  if ($pf_if === null) {
+    continue;
+  }
+  if (preg_match('/(In|Out)[46]\\/(Pass|Block):\\s+\\[\\s*Packets:\\s+(\\d+)\\s+Bytes:\\s+(\\d+)/', $line, $matches)) {
+    $direction = strtolower($matches[1]);
+    $action = strtolower($matches[2]);
+    $pkts_key = "{$direction}pkts{$action}";
+    $bytes_key = "{$direction}bytes{$action}";
+    $pf[$pf_if][$pkts_key] = ($pf[$pf_if][$pkts_key] ?? 0) + (int) $matches[3];
+    $pf[$pf_if][$bytes_key] = ($pf[$pf_if][$bytes_key] ?? 0) + (int) $matches[4];
   }
-  
-  $toreturn["openvpn"]["servers"][$vpnid]["name"] = $name;
-  $toreturn["openvpn"]["servers"][$vpnid]["vpnid"] = $vpnid;
-  $toreturn["openvpn"]["servers"][$vpnid]["connected_client_count"] = $conn_count;
-  $toreturn["openvpn"]["servers"][$vpnid]["total_bytes_recv"] = $total_bytes_recv;
-  $toreturn["openvpn"]["servers"][$vpnid]["total_bytes_sent"] = $total_bytes_sent;
 }
-"""
-        data = self._exec_php(script)
 
-        for fs in data["filesystems"]:
-            fs["percent_used"] = int(fs["percent_used"])
+// link level stats of every interface
+$links = [];
+exec("/usr/bin/netstat -i -b -n --libxo json", $netstat_output);
+$netstat = json_decode(implode("\\n", $netstat_output), true);
+foreach ($netstat["statistics"]["interface"] ?? [] as $link) {
+  if (strpos($link["network"] ?? "", "<Link#") !== 0) {
+    continue;
+  }
+  $links[$link["name"]] = $link;
+}
+
+$interfaces = [];
+foreach (get_configured_interface_with_descr() as $ifdescr => $ifname) {
+  $realif = get_real_interface($ifdescr);
+  $counters = $pf[$realif] ?? [];
+  $link = $links[$realif] ?? [];
+
+  $data = [
+    // same naming as the telemetry interfaces
+    "descr" => $ifname,
+    "ifname" => $ifdescr,
+    "if" => $realif,
+    "hwif" => $config["interfaces"][$ifdescr]["if"] ?? $realif,
+    "enable" => isset($config["interfaces"][$ifdescr]["enable"]),
+    "macaddr" => $link["address"] ?? null,
+    "mtu" => $link["mtu"] ?? null,
+    "inerrs" => $link["received-errors"] ?? 0,
+    "outerrs" => $link["send-errors"] ?? 0,
+    "collisions" => $link["collisions"] ?? 0,
+  ];
+  foreach (["in", "out"] as $direction) {
+    foreach (["pass", "block"] as $action) {
+      $data["{$direction}pkts{$action}"] = $counters["{$direction}pkts{$action}"] ?? 0;
+      $data["{$direction}bytes{$action}"] = $counters["{$direction}bytes{$action}"] ?? 0;
+    }
+    // get_interface_info() reports the passed traffic as the totals
+    $data["{$direction}pkts"] = $data["{$direction}pktspass"];
+    $data["{$direction}bytes"] = $data["{$direction}bytespass"];
+  }
+  $interfaces[$ifdescr] = $data;
+}
 
-        if isinstance(data["gateways"], list):
-            data["gateways"] = {}
+$toreturn = [
+  "data" => $interfaces,
+];
+"""
+        return script
 
-        return data
+    def _get_interface_counters_response(self, response):
+        # an empty php array is encoded as a list
+        if isinstance(response["data"], list):
+            return {}
+        return response["data"]
 
-    @_log_errors
-    def are_notices_pending(self, category="all"):
-        """
-        are_notices_pending($category = "all")
-        $category appears to be ignored currently
-        """
+    def _are_notices_pending_script(self, category="all"):
         script = """
 // release the mutex immediately so other api calls can go through
 // as this one can take a minute
@@ -1386,12 +2134,12 @@ $toreturn = [
                 }
             )
         )
+        return script
 
-        response = self._exec_php(script)
+    def _are_notices_pending_response(self, response):
         return response["data"]
 
-    @_log_errors
-    def get_notices(self, category="all"):
+    def _get_notices_script(self, category="all"):
         script = """
 // release the mutex immediately so other api calls can go through
 // as this one can take a minute
@@ -1415,9 +2163,12 @@ $toreturn = [
                 }
             )
         )
+        return script
 
-        response = self._exec_php(script)
-        value = response["data"]
+    def _get_notices_response(self, response):
+        return self._notices_list(response["data"])
+
+    def _notices_list(self, value):
         if value is False:
             return []
 
@@ -1429,71 +2180,1900 @@ $toreturn = [
 
         return notices
 
-    @_log_errors
-    def file_notice(
-        self, id, notice, category="General", url="", priority=1, local_only=False
-    ):
+    def _get_pending_notices_script(self, category="all"):
         """
-        /****f* notices/file_notice
-        * NAME
-        *   file_notice
-        * INPUTS
-        *       $id, $notice, $category, $url, $priority, $local_only
-        * RESULT
-        *   Files a notice and kicks off the various alerts, smtp, telegram, pushover, system log, LED's, etc.
-        *   If $local_only is true then the notice is not sent to external places (smtp, telegram, pushover)
-        ******/
-        function file_notice($id, $notice, $category = "General", $url = "", $priority = 1, $local_only = false)
+        notices and a hash of their content, the notices are left out
+        when the hash matches the one of the cached list
         """
-
+        known_hash = self._cached_notices.get(category, (None, None))[0]
         script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
 $data = json_decode('{}', true);
-$id = $data["id"];
-$notice = $data["notice"];
 $category = $data["category"];
-$url = $data["url"];
-$priority = $data["priority"];
-$local_only = $data["local_only"];
-
-$value = file_notice($id, $notice, $category, $url, $priority, $local_only);
+$value = get_notices($category);
+if (!$value) {{
+    $value = false;
+}}
+$hash = sha1(serialize($value));
 $toreturn = [
-  "data" => $value,
+  "data" => [
+    "category" => $category,
+    "hash" => $hash,
+    "pending" => $value !== false,
+    "notices" => ($hash === $data["known_hash"]) ? null : $value,
+  ],
 ];
 """.format(
             json.dumps(
                 {
-                    "id": id,
-                    "notice": notice,
                     "category": category,
-                    "url": url,
-                    "priority": priority,
-                    "local_only": local_only,
+                    "known_hash": known_hash,
                 }
             )
         )
+        return script
 
-        response = self._exec_php(script)
+    def _get_pending_notices_response(self, response):
+        data = response["data"]
+        category = data["category"]
+        if data["notices"] is None and category in self._cached_notices:
+            notices = self._cached_notices[category][1]
+        else:
+            notices = self._notices_list(data["notices"] or False)
+            self._cached_notices[category] = (data["hash"], notices)
+
+        return {
+            "pending_notices_present": data["pending"],
+            "pending_notices": notices,
+            "hash": data["hash"],
+        }
+
+    def _exec_command_script(self, command, background=False):
+        script = """
+$data = json_decode('{}', true);
+if ($data["background"]) {{
+    $ret = mwexec_bg($data["command"]);    
+}}
+else {{
+    $ret = mwexec($data["command"]);
+}}
+
+$toreturn = [
+  "data" => $ret,
+];
+""".format(
+            json.dumps({"command": command, "background": background})
+        )
+        return script
+
+    def _exec_command_response(self, response):
         return response["data"]
 
-    @_log_errors
-    def close_notice(self, id):
-        """
-        id = "all" to wipe everything
-        """
+    def _set_default_gateway_script(self, gateway, ip_version="4"):
+        ipVersion = str(ip_version)
+        key = "defaultgw4"
+        if "4" in ipVersion:
+            key = "defaultgw4"
+        if "6" in ipVersion:
+            key = "defaultgw6"
+
+        script = """
+require_once '/etc/inc/config.inc';
+global $config;
+
+$data = json_decode('{}', true);
+$key = $data["key"];
+$config['gateways'][$key] = $data["gateway"];
+
+mark_subsystem_dirty('staticroutes');
+write_config("System - Gateways: save default gateway");
+
+$retval = 0;
+                    
+$retval |= system_routing_configure();
+$retval |= system_resolvconf_generate();
+$retval |= filter_configure();
+/* reconfigure our gateway monitor */
+setup_gateways_monitor();
+/* Dynamic DNS on gw groups may have changed */
+send_event("service reload dyndnsall");
+
+if ($retval == 0) {{
+  clear_subsystem_dirty('staticroutes');
+}}
+
+$toreturn = [
+  "data" => $retval
+];
+""".format(
+            json.dumps({"key": key, "gateway": gateway})
+        )
+        return script
+
+    def _start_service_script(self, service_name, service={}):
+        service = normalize_service_data(service)
+
+        # function start_service($name, $after_sync = false)
         script = """
+require_once '/etc/inc/service-utils.inc';
+
 $data = json_decode('{}', true);
-$id = $data["id"];
-close_notice($id);
+$service_name = $data["service_name"];
+$service = $data["service"];
+if (!$service) {{
+  $service = [];
+}}
+
+if ($service_name == "openvpn" && $service) {{
+  // requires name, mode and vpnid
+  if (!$service["name"]) {{
+    $service["name"] = $service_name;
+  }}
+  if (!$service["vpnmode"] && $service["mode"]) {{
+    $service["vpnmode"] = $service["mode"];
+  }}
+  if (!$service["mode"] && $service["vpnmode"]) {{
+    $service["mode"] = $service["vpnmode"];
+  }}
+  $service["id"] = $service["vpnid"];
+  $is_running = (bool) get_service_status($service);
+}}
+else {{
+  $is_running = is_service_running($service_name);
+}}
+
+if (!$is_running) {{
+  service_control_start($service_name, $service);
+}}
+
 $toreturn = [
+  // no return value
   "data" => true,
 ];
 """.format(
             json.dumps(
                 {
-                    "id": id,
+                    "service_name": service_name,
+                    "service": service,
                 }
             )
         )
+        return script
 
-        response = self._exec_php(script)
-        return response["data"]
+    def _stop_service_script(self, service_name, service={}):
+        service = normalize_service_data(service)
+
+        # function stop_service($name)
+        script = """
+require_once '/etc/inc/service-utils.inc';
+
+$data = json_decode('{}', true);
+$service_name = $data["service_name"];
+$service = $data["service"];
+if (!$service) {{
+  $service = [];
+}}
+
+if ($service_name == "openvpn" && $service) {{
+  // requires name, mode, and vpnid
+  if (!$service["name"]) {{
+    $service["name"] = $service_name;
+  }}
+  if (!$service["vpnmode"] && $service["mode"]) {{
+    $service["vpnmode"] = $service["mode"];
+  }}
+  if (!$service["mode"] && $service["vpnmode"]) {{
+    $service["mode"] = $service["vpnmode"];
+  }}
+  $service["id"] = $service["vpnid"];
+  $is_running = (bool) get_service_status($service);
+}}
+else {{
+  $is_running = is_service_running($service_name);
+}}
+
+if ($is_running) {{
+  service_control_stop($service_name, $service);
+}}
+$toreturn = [
+  // no return value
+  "data" => true,
+];
+""".format(
+            json.dumps(
+                {
+                    "service_name": service_name,
+                    "service": service,
+                }
+            )
+        )
+        return script
+
+    def _restart_service_script(self, service_name, service={}):
+        service = normalize_service_data(service)
+
+        # function restart_service($name) (if service is not currently running, it will be started)
+        script = """
+require_once '/etc/inc/service-utils.inc';
+
+$data = json_decode('{}', true);
+$service_name = $data["service_name"];
+$service = $data["service"];
+if (!$service) {{
+  $service = [];
+}}
+
+if ($service_name == "openvpn" && $service) {{
+  // requires name, mode, and vpnid
+  if (!$service["name"]) {{
+    $service["name"] = $service_name;
+  }}
+  if (!$service["vpnmode"] && $service["mode"]) {{
+    $service["vpnmode"] = $service["mode"];
+  }}
+  if (!$service["mode"] && $service["vpnmode"]) {{
+    $service["mode"] = $service["vpnmode"];
+  }}
+  $service["id"] = $service["vpnid"];
+}}
+
+service_control_restart($service_name, $service);
+$toreturn = [
+  // no return value
+  "data" => true,
+];
+""".format(
+            json.dumps(
+                {
+                    "service_name": service_name,
+                    "service": service,
+                }
+            )
+        )
+        return script
+
+    def _restart_service_if_running_script(self, service_name, service={}):
+        service = normalize_service_data(service)
+
+        # function restart_service_if_running($service)
+        script = """
+require_once '/etc/inc/service-utils.inc';
+
+$data = json_decode('{}', true);
+$service_name = $data["service_name"];
+$service = $data["service"];
+if (!$service) {{
+  $service = [];
+}}
+
+if ($service_name == "openvpn" && $service) {{
+  // requires name, mode, and vpnid
+  if (!$service["name"]) {{
+    $service["name"] = $service_name;
+  }}
+  if (!$service["vpnmode"] && $service["mode"]) {{
+    $service["vpnmode"] = $service["mode"];
+  }}
+  if (!$service["mode"] && $service["vpnmode"]) {{
+    $service["mode"] = $service["vpnmode"];
+  }}
+  $service["id"] = $service["vpnid"];
+  $is_running = (bool) get_service_status($service);
+}}
+else {{
+  $is_running = is_service_running($service_name);
+}}
+
+if ($is_running) {{
+  service_control_restart($service_name, $service);
+}}
+$toreturn = [
+  // no return value
+  "data" => true,
+];
+""".format(
+            json.dumps(
+                {
+                    "service_name": service_name,
+                    "service": service,
+                }
+            )
+        )
+        return script
+
+    def _reset_state_table_script(self):
+        script = """
+mwexec("/sbin/pfctl -F states");
+"""
+        return script
+
+    def _system_reboot_script(self, type="normal"):
+        script = """
+$data = json_decode('{}', true);
+$type = $data["type"];
+$type = strtolower($type);
+
+switch ($type) {{
+    case 'fsck':
+        if (php_uname('m') != 'arm') {{
+            mwexec('/sbin/nextboot -e "pfsense.fsck.force=5"');
+        }}
+        system_reboot();
+        break;
+    case 'reroot':
+        system_reboot_sync(true);
+        break;
+    case 'normal':
+        system_reboot();
+        break;
+    default:
+        break;
+}}
+
+$toreturn = [
+  "data" => true,
+];
+""".format(
+            json.dumps(
+                {
+                    "type": type,
+                }
+            )
+        )
+        return script
+
+    def _system_halt_script(self):
+        script = """
+system_halt();
+$toreturn = [
+  "data" => true,
+];
+"""
+        return script
+
+    def _send_wol_script(self, interface, mac):
+        script = """
+$data = json_decode('{}', true);
+$if = $data["interface"];
+$mac = $data["mac"];
+function send_wol($if, $mac) {{
+        $ipaddr = get_interface_ip($if);
+        if (!is_ipaddr($ipaddr) || !is_macaddr($mac)) {{
+                return false;
+        }}
+
+        $bcip = gen_subnet_max($ipaddr, get_interface_subnet($if));
+        return (bool) !mwexec("/usr/local/bin/wol -i {{$bcip}} {{$mac}}");
+}}
+
+$value = send_wol($if, $mac);
+$toreturn = [
+  "data" => $value,
+];
+""".format(
+            json.dumps(
+                {
+                    "interface": interface,
+                    "mac": mac,
+                }
+            )
+        )
+        return script
+
+    def _send_wol_response(self, response):
+        return response["data"]
+
+    def _file_notice_script(
+        self, id, notice, category="General", url="", priority=1, local_only=False
+    ):
+        script = """
+$data = json_decode('{}', true);
+$id = $data["id"];
+$notice = $data["notice"];
+$category = $data["category"];
+$url = $data["url"];
+$priority = $data["priority"];
+$local_only = $data["local_only"];
+
+$value = file_notice($id, $notice, $category, $url, $priority, $local_only);
+$toreturn = [
+  "data" => $value,
+];
+""".format(
+            json.dumps(
+                {
+                    "id": id,
+                    "notice": notice,
+                    "category": category,
+                    "url": url,
+                    "priority": priority,
+                    "local_only": local_only,
+                }
+            )
+        )
+        return script
+
+    def _file_notice_response(self, response):
+        return response["data"]
+
+    def _close_notice_script(self, id):
+        script = """
+$data = json_decode('{}', true);
+$id = $data["id"];
+close_notice($id);
+$toreturn = [
+  "data" => true,
+];
+""".format(
+            json.dumps(
+                {
+                    "id": id,
+                }
+            )
+        )
+        return script
+
+    def _close_notice_response(self, response):
+        return response["data"]
+
+    def _kill_states_script(self, source, destination=None):
+        script = """
+$data = json_decode('{}', true);
+$args = "-k " . escapeshellarg($data["source"]);
+if ($data["destination"] !== null) {{
+  $args .= " -k " . escapeshellarg($data["destination"]);
+}}
+mwexec("/sbin/pfctl $args");
+""".format(
+            json.dumps(
+                {
+                    "source": source,
+                    "destination": destination,
+                }
+            )
+        )
+        return script
+
+
+class Client(_BaseClient):
+    """pfSense Client"""
+
+    def __init__(self, url, username, password, opts=None):
+        """pfSense Client initializer."""
+        super().__init__(url, username, password, opts)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._in_flight_lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is not None:
+            return self._pool
+
+        # https://docs.python.org/3/library/xmlrpc.client.html#module-xmlrpc.client
+        # https://stackoverflow.com/questions/30461969/disable-default-certificate-verification-in-python-2-7-9
+        context = None
+        verify_ssl = True
+        if "verify_ssl" in self._opts.keys():
+            verify_ssl = self._opts["verify_ssl"]
+
+        if self._url_parts.scheme == "https":
+            if verify_ssl:
+                context = ssl.create_default_context()
+            else:
+                context = ssl._create_unverified_context()
+
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = _TransportPool(
+                    self._url_parts.scheme,
+                    context=context,
+                    size=self._opts.get("pool_size", DEFAULT_POOL_SIZE),
+                    idle_timeout=self._opts.get(
+                        "pool_idle_timeout", DEFAULT_POOL_IDLE_TIMEOUT
+                    ),
+                )
+
+        return self._pool
+
+    # https://stackoverflow.com/questions/64983392/python-multiple-patch-gives-http-client-cannotsendrequest-request-sent
+    @contextmanager
+    def _get_proxy(self, timeouts=None):
+        if timeouts is None:
+            timeouts = self._get_timeouts()
+
+        pool = self._get_pool()
+        transport = pool.checkout()
+        transport.set_timeouts(timeouts)
+
+        # set to True if necessary during development
+        verbose = False
+
+        try:
+            yield xmlrpc.client.ServerProxy(
+                self._url, transport=transport, verbose=verbose
+            )
+        except xmlrpc.client.Fault:
+            # a fault is a complete response, the connection is still usable
+            pool.checkin(transport)
+            raise
+        except BaseException:
+            # the connection may be mid-response, never hand it out again
+            transport.close()
+            raise
+
+        pool.checkin(transport)
+
+    def close(self):
+        """close all pooled connections"""
+        if self._pool is not None:
+            self._pool.close()
+
+    def _apply_timeout(func):
+        # requests made while func runs use the timeouts configured for it
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            token = _CURRENT_METHOD.set(func.__name__)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _CURRENT_METHOD.reset(token)
+
+        return inner
+
+    def _log_errors(func):
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except BaseException as err:
+                _LOGGER.error(f"Unexpected {func.__name__} error {err=}, {type(err)=}")
+                raise err
+
+        return inner
+
+    def _coalesce(func):
+        # concurrent identical reads share a single in-flight request and its
+        # result, which callers must not modify. only for reads that depend
+        # on nothing but the firewall and their arguments
+        @functools.wraps(func)
+        def inner(self, *args, **kwargs):
+            key = self._coalesce_key(func.__name__, args, kwargs)
+            with self._in_flight_lock:
+                future = self._in_flight.get(key)
+                if future is None:
+                    self._in_flight[key] = concurrent.futures.Future()
+            if future is not None:
+                return future.result()
+
+            future = self._in_flight[key]
+            try:
+                result = func(self, *args, **kwargs)
+            except BaseException as err:
+                future.set_exception(err)
+                raise
+            else:
+                future.set_result(result)
+            finally:
+                with self._in_flight_lock:
+                    del self._in_flight[key]
+
+            return result
+
+        return inner
+
+    def _get_config_section(self, section):
+        with self._get_proxy() as proxy:
+            response = proxy.pfsense.backup_config_section([section])
+        return response[section]
+
+    @_apply_timeout
+    def _restore_config_section(self, section_name, data):
+        params = {section_name: data}
+        with self._get_proxy() as proxy:
+            response = proxy.pfsense.restore_config_section(params, 60)
+        return response
+
+    def _exec_php(self, script):
+        script = self._php_script(script)
+        with self._get_proxy() as proxy:
+            response = proxy.pfsense.exec_php(script)
+        return self._php_response(response)
+
+    def _exec_php_no_timeout(self, script):
+        script = self._php_script(script)
+        timeouts = self._get_timeouts()
+        timeouts.update({"read": None, "total": None})
+        with self._get_proxy(timeouts) as proxy:
+            response = proxy.pfsense.exec_php(script)
+        return self._php_response(response)
+
+    def _exec_command(self, command, background=False):
+        response = self._exec_php(self._exec_command_script(command, background))
+        return self._exec_command_response(response)
+
+    def _install_library(self):
+        # once per session, unless the "library" client opt is False
+        if self._library_installed is not None:
+            return
+        if not self._opts.get("library", True):
+            self._library_installed = False
+            return
+
+        try:
+            response = self._exec_php(self._install_library_script())
+            self._library_installed = response["data"] is True
+        except BaseException as err:
+            _LOGGER.warning(f"failed to install the helper library {err=}")
+            self._library_installed = False
+
+    @_apply_timeout
+    @_log_errors
+    def exec_php_batch(self, calls):
+        """
+        invoke several client methods using a single exec_php request
+
+        see _batch_calls for the format of calls, a failed method yields a
+        BatchError for its key instead of failing the whole batch
+        """
+        self._install_library()
+        scripts, handlers, methods = self._batch_calls(calls)
+        response = self._exec_php(
+            self._batch_script(self._library_scripts(scripts, methods))
+        )
+        results = self._batch_results(scripts, response)
+        missing = self._library_missing_keys(results)
+        if missing:
+            retry = {key: scripts[key] for key in missing}
+            response = self._exec_php(self._batch_script(retry))
+            results.update(self._batch_results(retry, response))
+
+        for key, result in results.items():
+            if isinstance(result, BatchError):
+                continue
+            try:
+                results[key] = handlers[key](result)
+            except BaseException as err:
+                results[key] = BatchError(f"{key}: {err!r}")
+
+        return results
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_host_firmware_version(self):
+        with self._get_proxy() as proxy:
+            return proxy.pfsense.host_firmware_version(1, 60)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_firmware_update_info(self, use_cache=True):
+        """
+        # the cache is 2 hours, use_cache=False forces a new check
+        get_system_pkg_version($baseonly = false, $use_cache = true)
+        # for testing
+        rm /var/run/pfSense_version*
+        """
+        response = self._exec_php(self._get_firmware_update_info_script(use_cache))
+        return self._get_firmware_update_info_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    def upgrade_firmware(self):
+        response = self._exec_php(self._upgrade_firmware_script())
+        return self._upgrade_firmware_response(response)
+
+    # errors are expected while the firewall reboots, left to the caller
+    @_apply_timeout
+    def get_upgrade_progress(self, pid, offset=0):
+        response = self._exec_php(self._get_upgrade_progress_script(pid, offset))
+        return self._get_upgrade_progress_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    def pid_is_running(self, pid):
+        script = """
+$data = json_decode('{}', true);
+$running = posix_kill($data["pid"],0);
+$toreturn = [
+  "data" => $running,
+];
+""".format(
+            json.dumps(
+                {
+                    "pid": pid,
+                }
+            )
+        )
+
+        response = self._exec_php(script)
+        return response["data"]
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_system_serial(self):
+        script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+$toreturn = [
+  "data" => system_get_serial(),
+];
+"""
+        response = self._exec_php(script)
+        return response["data"]
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_netgate_device_id(self):
+        script = """
+$toreturn = [
+  "data" => system_get_uniqueid(),
+];
+"""
+        response = self._exec_php(script)
+        return response["data"]
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_system_info(self):
+        response = self._exec_php(self._get_system_info_script())
+        return self._get_system_info_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_config(self, projection=None):
+        """
+        return the config
+
+        projection limits the result to specific fields of config lists, see
+        RULE_INDEX_PROJECTION for the format
+        """
+        return self._get_config(projection)
+
+    def _get_config(self, projection=None):
+        # a config of its own, not shared with concurrent get_config callers
+        response = self._exec_php(self._get_config_script(projection))
+        return self._get_config_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_config_revision(self):
+        response = self._exec_php(self._get_config_revision_script())
+        return self._get_config_revision_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    def get_cached_config(self, revision=None, projection=None):
+        """
+        return the config, only refetching it when the revision has changed
+
+        revision may be passed in when already known (ie: from a batch)
+        """
+        if revision is None:
+            revision = self.get_config_revision()
+        if not self._is_cached_config_current(revision, projection):
+            self._set_cached_config(self.get_config(projection), projection)
+        return self._cached_config
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_identity_key(self):
+        response = self._exec_php(self._get_identity_key_script())
+        return self._get_identity_key_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    def get_cached_identity(self, key=None):
+        """
+        return the system_info and host_firmware_version, only refetching them
+        when the boottime or config revision has changed
+
+        key may be passed in when already known (ie: from a batch)
+        """
+        if key is None:
+            key = self.get_identity_key()
+        if not self._is_cached_identity_current(key):
+            results = self.exec_php_batch(IDENTITY_CALLS)
+            identity = {name: batch_result(results, name) for name in IDENTITY_CALLS}
+            self._set_cached_identity(identity, key)
+        return self._cached_identity
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_interfaces(self):
+        return self._get_config_section("interfaces")
+
+    @_apply_timeout
+    @_log_errors
+    def get_interface(self, interface):
+        interfaces = self.get_interfaces()
+        return interfaces[interface]
+
+    @_apply_timeout
+    @_log_errors
+    def get_interface_by_description(self, interface):
+        interfaces = self.get_interfaces()
+        for i, i_interface in enumerate(interfaces.keys()):
+            if interfaces[i_interface]["descr"] == interface:
+                return interfaces[i_interface]
+
+    @_apply_timeout
+    @_log_errors
+    def enable_filter_rule_by_tracker(self, tracker):
+        config = self._get_config()
+        if self._set_filter_rule_disabled(config, tracker, False):
+            self._restore_config_section("filter", config["filter"])
+
+    @_apply_timeout
+    @_log_errors
+    def disable_filter_rule_by_tracker(self, tracker):
+        config = self._get_config()
+        if self._set_filter_rule_disabled(config, tracker, True):
+            self._restore_config_section("filter", config["filter"])
+
+    # use created_time as a unique_id since none other exists
+    @_apply_timeout
+    @_log_errors
+    def enable_nat_port_forward_rule_by_created_time(self, created_time):
+        if created_time is None:
+            return
+        config = self._get_config()
+        if self._set_nat_port_forward_rule_disabled(config, created_time, False):
+            self._restore_config_section("nat", config["nat"])
+
+    # use created_time as a unique_id since none other exists
+    @_apply_timeout
+    @_log_errors
+    def disable_nat_port_forward_rule_by_created_time(self, created_time):
+        if created_time is None:
+            return
+        config = self._get_config()
+        if self._set_nat_port_forward_rule_disabled(config, created_time, True):
+            self._restore_config_section("nat", config["nat"])
+
+    # use created_time as a unique_id since none other exists
+    @_apply_timeout
+    @_log_errors
+    def enable_nat_outbound_rule_by_created_time(self, created_time):
+        if created_time is None:
+            return
+        config = self._get_config()
+        if self._set_nat_outbound_rule_disabled(config, created_time, False):
+            self._restore_config_section("nat", config["nat"])
+
+    # use created_time as a unique_id since none other exists
+    @_apply_timeout
+    @_log_errors
+    def disable_nat_outbound_rule_by_created_time(self, created_time):
+        if created_time is None:
+            return
+        config = self._get_config()
+        if self._set_nat_outbound_rule_disabled(config, created_time, True):
+            self._restore_config_section("nat", config["nat"])
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_configured_interface_descriptions(self):
+        script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+$toreturn = [
+  "data" => get_configured_interface_with_descr(),
+];
+"""
+        response = self._exec_php(script)
+        return response["data"]
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_gateways(self):
+        # {'GW_WAN': {'interface': '<if>', 'gateway': '<ip>', 'name': 'GW_WAN', 'weight': '1', 'ipprotocol': 'inet', 'interval': '', 'descr': 'Interface wan Gateway', 'monitor': '<ip>', 'friendlyiface': 'wan', 'friendlyifdescr': 'WAN', 'isdefaultgw': True, 'attribute': 0, 'tiername': 'Default (IPv4)'}}
+        script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+$toreturn = [
+  "data" => return_gateways_array(),
+];
+"""
+        response = self._exec_php(script)
+        return response["data"]
+
+    @_apply_timeout
+    @_log_errors
+    def get_gateway(self, gateway):
+        gateways = self.get_gateways()
+        for g in gateways.keys():
+            if g == gateway:
+                return gateways[g]
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_gateways_status(self):
+        # {'GW_WAN': {'monitorip': '<ip>', 'srcip': '<ip>', 'name': 'GW_WAN', 'delay': '0.387ms', 'stddev': '0.097ms', 'loss': '0.0%', 'status': 'online', 'substatus': 'none'}}
+        script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+$toreturn = [
+  // function return_gateways_status($byname = false, $gways = false)
+  "data" => return_gateways_status(true),
+];
+"""
+        response = self._exec_php(script)
+        return response["data"]
+
+    @_apply_timeout
+    @_log_errors
+    def get_gateway_status(self, gateway):
+        gateways = self.get_gateways_status()
+        for g in gateways.keys():
+            if g == gateway:
+                return gateways[g]
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_arp_table(self, resolve_hostnames=False):
+        response = self._exec_php(self._get_arp_table_script(resolve_hostnames))
+        return self._get_arp_table_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    def set_default_gateway(self, gateway, ip_version="4"):
+        self._exec_php(self._set_default_gateway_script(gateway, ip_version))
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_services(self):
+        response = self._exec_php(self._get_services_script())
+        return self._get_services_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_service_is_enabled(self, service_name, service={}):
+        service = normalize_service_data(service)
+
+        # function is_service_enabled($service_name)
+        script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+require_once '/etc/inc/service-utils.inc';
+
+$data = json_decode('{}', true);
+$service_name = $data["service_name"];
+$toreturn = [
+  // always returns true, so mostly useless at this point
+  "data" => is_service_enabled($service_name),
+];
+""".format(
+            json.dumps(
+                {
+                    "service_name": service_name,
+                    "service": service,
+                }
+            )
+        )
+        response = self._exec_php(script)
+        return response["data"]
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_service_is_running(self, service_name, service={}):
+        response = self._exec_php(
+            self._get_service_is_running_script(service_name, service)
+        )
+        return self._get_service_is_running_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    def start_service(self, service_name, service={}):
+        self._exec_php(self._start_service_script(service_name, service))
+
+    @_apply_timeout
+    @_log_errors
+    def stop_service(self, service_name, service={}):
+        self._exec_php(self._stop_service_script(service_name, service))
+
+    @_apply_timeout
+    @_log_errors
+    def restart_service(self, service_name, service={}):
+        self._exec_php(self._restart_service_script(service_name, service))
+
+    @_apply_timeout
+    @_log_errors
+    def restart_service_if_running(self, service_name, service={}):
+        self._exec_php(self._restart_service_if_running_script(service_name, service))
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_dhcp_leases(self, dns_lookups=None):
+        response = self._exec_php(self._get_dhcp_leases_script(dns_lookups))
+        return self._get_dhcp_leases_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_dhcp_leases_delta(self, generation=None, dns_lookups=None):
+        """
+        return the leases changed since generation (as returned by a previous
+        call), see _get_dhcp_leases_delta_script for the format
+        """
+        response = self._exec_php(
+            self._get_dhcp_leases_delta_script(generation, dns_lookups)
+        )
+        return self._get_dhcp_leases_delta_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_virtual_ips(self):
+        script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+global $config;
+
+$vips = [];
+if ($config['virtualip'] && is_iterable($config['virtualip']['vip'])) {
+  foreach ($config['virtualip']['vip'] as $vip) {
+    $vips[] = $vip;
+  }
+}
+
+$toreturn = [
+  "data" => $vips,
+];
+"""
+        response = self._exec_php(script)
+        return response["data"]
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_carp_status(self):
+        response = self._exec_php(self._get_carp_status_script())
+        return self._get_carp_status_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_carp_interface_status(self, uniqueid):
+        # function get_carp_interface_status($carpid)
+        script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+$data = json_decode('{}', true);
+$uniqueid = $data["uniqueid"];
+$carp_if = "_vip{{$uniqueid}}";
+$status = get_carp_interface_status($carp_if);
+$toreturn = [
+  "data" => $status,
+];
+""".format(
+            json.dumps(
+                {
+                    "uniqueid": uniqueid,
+                }
+            )
+        )
+        response = self._exec_php(script)
+        return response["data"]
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_carp_interfaces(self):
+        response = self._exec_php(self._get_carp_interfaces_script())
+        return self._get_carp_interfaces_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_carp_state(self):
+        response = self._exec_php(self._get_carp_state_script())
+        return self._get_carp_state_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    def delete_arp_entry(self, ip):
+        if len(ip) < 1:
+            return
+        self._exec_php(self._delete_arp_entry_script(ip))
+
+    @_apply_timeout
+    @_log_errors
+    def delete_arp_entries(self, ips):
+        """delete the arp entries of multiple ips in a single request"""
+        ips = [ip for ip in ips if len(ip) > 0]
+        if len(ips) < 1:
+            return {}
+        response = self._exec_php(self._delete_arp_entries_script(ips))
+        return self._delete_arp_entries_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def arp_get_mac_by_ip(self, ip, do_ping=True):
+        """function arp_get_mac_by_ip($ip, $do_ping = true)"""
+        script = """
+// release the mutex immediately so other api calls can go through
+// as this one can take a minute
+require_once '/etc/inc/util.inc';
+global $xmlrpclockkey;
+unlock($xmlrpclockkey);
+
+$data = json_decode('{}', true);
+$ip = $data["ip"];
+$do_ping = $data["do_ping"];
+$toreturn = [
+  "data" => arp_get_mac_by_ip($ip, $do_ping),
+];
+""".format(
+            json.dumps(
+                {
+                    "ip": ip,
+                    "do_ping": do_ping,
+                }
+            )
+        )
+        response = self._exec_php(script)["data"]
+        if not response:
+            return None
+        return response
+
+    @_apply_timeout
+    @_log_errors
+    def reset_state_table(self):
+        # no response is expected on success since all connections are closed
+        self._exec_php(self._reset_state_table_script())
+
+    @_apply_timeout
+    @_log_errors
+    def kill_states(self, source, destination=None):
+        self._exec_php(self._kill_states_script(source, destination))
+
+    @_apply_timeout
+    @_log_errors
+    def system_reboot(self, type="normal"):
+        """
+        type = normal = simple reboot
+        type = reroot = a reroot reboot
+        type = fsck = perform an fsck on next boot
+        """
+        try:
+            self._exec_php(self._system_reboot_script(type))
+        except ExpatError:
+            # ignore response failures because the system is going down
+            pass
+
+    @_apply_timeout
+    @_log_errors
+    def system_halt(self):
+        try:
+            self._exec_php(self._system_halt_script())
+        except ExpatError:
+            # ignore response failures because the system is going down
+            pass
+
+    @_apply_timeout
+    @_log_errors
+    def send_wol(self, interface, mac):
+        """
+        interface should be wan, lan, opt1, opt2 etc, not the description
+        """
+        response = self._exec_php(self._send_wol_script(interface, mac))
+        return self._send_wol_response(response)
+
+    # TODO: function find_service_by_name($name)
+    # TODO: function get_service_status($service) # seems to be higher-level logic than is_service_running, passes in the full service object
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_telemetry(self, sections=None):
+        response = self._exec_php(self._get_telemetry_script(sections))
+        return self._get_telemetry_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_interface_counters(self):
+        """byte/packet counters of all configured interfaces, keyed by ifname"""
+        response = self._exec_php(self._get_interface_counters_script())
+        return self._get_interface_counters_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def are_notices_pending(self, category="all"):
+        """
+        are_notices_pending($category = "all")
+        $category appears to be ignored currently
+        """
+        response = self._exec_php(self._are_notices_pending_script(category))
+        return self._are_notices_pending_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    def get_notices(self, category="all"):
+        response = self._exec_php(self._get_notices_script(category))
+        return self._get_notices_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    def get_pending_notices(self, category="all"):
+        """
+        pending flag, notices list and content hash in one call, the list
+        is only transferred when it changed since the previous call
+        """
+        response = self._exec_php(self._get_pending_notices_script(category))
+        return self._get_pending_notices_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    def file_notice(
+        self, id, notice, category="General", url="", priority=1, local_only=False
+    ):
+        """
+        /****f* notices/file_notice
+        * NAME
+        *   file_notice
+        * INPUTS
+        *       $id, $notice, $category, $url, $priority, $local_only
+        * RESULT
+        *   Files a notice and kicks off the various alerts, smtp, telegram, pushover, system log, LED's, etc.
+        *   If $local_only is true then the notice is not sent to external places (smtp, telegram, pushover)
+        ******/
+        function file_notice($id, $notice, $category = "General", $url = "", $priority = 1, $local_only = false)
+        """
+        response = self._exec_php(
+            self._file_notice_script(id, notice, category, url, priority, local_only)
+        )
+        return self._file_notice_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    def close_notice(self, id):
+        """
+        id = "all" to wipe everything
+        """
+        response = self._exec_php(self._close_notice_script(id))
+        return self._close_notice_response(response)
+
+
+class AsyncClient(_BaseClient):
+    """
+    pfSense Client using a non-blocking aiohttp transport
+
+    provides the read methods used for polling plus the user actions, requests
+    are real coroutines so cancelling the caller aborts the underlying socket
+    """
+
+    def __init__(self, url, username, password, opts=None, session=None):
+        """pfSense AsyncClient initializer."""
+        super().__init__(url, username, password, opts)
+        parts = urlparse(url.rstrip("/") + "/xmlrpc.php")
+        self._request_url = "{scheme}://{host}/xmlrpc.php".format(
+            scheme=parts.scheme,
+            host=parts.netloc,
+        )
+        self._auth = aiohttp.BasicAuth(username, password)
+        # a session passed in is shared and owned by the caller
+        self._session = session
+        self._owns_session = session is None
+        # waiting requests get a slot by priority, see priority()
+        self._slots = _AsyncPrioritySemaphore(
+            self._opts.get("workers", DEFAULT_WORKERS)
+        )
+
+    def _get_session(self):
+        if self._session is None:
+            verify_ssl = True
+            if "verify_ssl" in self._opts.keys():
+                verify_ssl = self._opts["verify_ssl"]
+
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=None if verify_ssl else False)
+            )
+
+        return self._session
+
+    async def close(self):
+        """close the aiohttp session if it was created by this client"""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _log_errors(func):
+        @functools.wraps(func)
+        async def inner(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as err:
+                _LOGGER.error(f"Unexpected {func.__name__} error {err=}, {type(err)=}")
+                raise err
+
+        return inner
+
+    def _apply_timeout(func):
+        # requests made while func runs use the timeouts configured for it
+        @functools.wraps(func)
+        async def inner(*args, **kwargs):
+            token = _CURRENT_METHOD.set(func.__name__)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _CURRENT_METHOD.reset(token)
+
+        return inner
+
+    def _coalesce(func):
+        # concurrent identical reads share a single in-flight request and its
+        # result, which callers must not modify. only for reads that depend
+        # on nothing but the firewall and their arguments
+        @functools.wraps(func)
+        async def inner(self, *args, **kwargs):
+            key = self._coalesce_key(func.__name__, args, kwargs)
+            future = self._in_flight.get(key)
+            while future is not None:
+                try:
+                    return await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # only retry when the request joined was cancelled
+                    if not future.cancelled():
+                        raise
+                future = self._in_flight.get(key)
+
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            try:
+                result = await func(self, *args, **kwargs)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as err:
+                future.set_exception(err)
+                # nobody may have joined, avoid the never retrieved warning
+                future.exception()
+                raise
+            else:
+                future.set_result(result)
+            finally:
+                del self._in_flight[key]
+
+            return result
+
+        return inner
+
+    async def _xmlrpc_call(self, method, *params):
+        body = xmlrpc.client.dumps(params, method)
+        timeouts = self._get_timeouts()
+        timeout = aiohttp.ClientTimeout(
+            total=timeouts["total"],
+            connect=timeouts["connect"],
+            sock_read=timeouts["read"],
+        )
+        priority = _CURRENT_PRIORITY.get()
+        await self._slots.acquire(priority)
+        try:
+            async with self._get_session().post(
+                self._request_url,
+                data=body.encode("utf-8"),
+                headers={"Content-Type": "text/xml"},
+                auth=self._auth,
+                timeout=timeout,
+            ) as response:
+                if response.status != 200:
+                    raise xmlrpc.client.ProtocolError(
+                        self._request_url,
+                        response.status,
+                        response.reason,
+                        dict(response.headers),
+                    )
+                data = await response.read()
+        finally:
+            self._slots.release(priority)
+
+        # raises xmlrpc.client.Fault the same as ServerProxy would
+        result, _ = await self._decode(len(data), xmlrpc.client.loads, data)
+        return result[0]
+
+    async def _decode(self, size, func, *args):
+        # parsing a response of several MB would block the event loop
+        threshold = self._opts.get("decode_threshold", DEFAULT_DECODE_THRESHOLD)
+        if size < threshold:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _get_config_section(self, section):
+        response = await self._xmlrpc_call("pfsense.backup_config_section", [section])
+        return response[section]
+
+    @_apply_timeout
+    async def _restore_config_section(self, section_name, data):
+        params = {section_name: data}
+        return await self._xmlrpc_call("pfsense.restore_config_section", params, 60)
+
+    async def _exec_php(self, script):
+        response = await self._xmlrpc_call("pfsense.exec_php", self._php_script(script))
+        if "compressed" in response:
+            # only results above the compression threshold are compressed
+            size = float("inf")
+        else:
+            size = len(response.get("real", ""))
+        decoded = await self._decode(size, _decode_php_response, response)
+        return self._php_response(response, decoded)
+
+    async def _exec_command(self, command, background=False):
+        response = await self._exec_php(self._exec_command_script(command, background))
+        return self._exec_command_response(response)
+
+    async def _install_library(self):
+        # once per session, unless the "library" client opt is False
+        if self._library_installed is not None:
+            return
+        if not self._opts.get("library", True):
+            self._library_installed = False
+            return
+
+        try:
+            response = await self._exec_php(self._install_library_script())
+            self._library_installed = response["data"] is True
+        except asyncio.CancelledError:
+            raise
+        except BaseException as err:
+            _LOGGER.warning(f"failed to install the helper library {err=}")
+            self._library_installed = False
+
+    @_apply_timeout
+    @_log_errors
+    async def exec_php_batch(self, calls):
+        """
+        invoke several client methods using a single exec_php request
+
+        see _batch_calls for the format of calls, a failed method yields a
+        BatchError for its key instead of failing the whole batch
+        """
+        await self._install_library()
+        scripts, handlers, methods = self._batch_calls(calls)
+        response = await self._exec_php(
+            self._batch_script(self._library_scripts(scripts, methods))
+        )
+        results = self._batch_results(scripts, response)
+        missing = self._library_missing_keys(results)
+        if missing:
+            retry = {key: scripts[key] for key in missing}
+            response = await self._exec_php(self._batch_script(retry))
+            results.update(self._batch_results(retry, response))
+
+        for key, result in results.items():
+            if isinstance(result, BatchError):
+                continue
+            try:
+                result = handlers[key](result)
+                if inspect.isawaitable(result):
+                    result = await result
+                results[key] = result
+            except asyncio.CancelledError:
+                raise
+            except BaseException as err:
+                results[key] = BatchError(f"{key}: {err!r}")
+
+        return results
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_host_firmware_version(self):
+        return await self._xmlrpc_call("pfsense.host_firmware_version", 1, 60)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_firmware_update_info(self, use_cache=True):
+        response = await self._exec_php(
+            self._get_firmware_update_info_script(use_cache)
+        )
+        return self._get_firmware_update_info_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    async def upgrade_firmware(self):
+        response = await self._exec_php(self._upgrade_firmware_script())
+        return self._upgrade_firmware_response(response)
+
+    # errors are expected while the firewall reboots, left to the caller
+    @_apply_timeout
+    async def get_upgrade_progress(self, pid, offset=0):
+        response = await self._exec_php(self._get_upgrade_progress_script(pid, offset))
+        return self._get_upgrade_progress_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_system_info(self):
+        response = await self._exec_php(self._get_system_info_script())
+        return self._get_system_info_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_config(self, projection=None):
+        """
+        return the config
+
+        projection limits the result to specific fields of config lists, see
+        RULE_INDEX_PROJECTION for the format
+        """
+        return await self._get_config(projection)
+
+    async def _get_config(self, projection=None):
+        # a config of its own, not shared with concurrent get_config callers
+        response = await self._exec_php(self._get_config_script(projection))
+        return self._get_config_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_config_revision(self):
+        response = await self._exec_php(self._get_config_revision_script())
+        return self._get_config_revision_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    async def get_cached_config(self, revision=None, projection=None):
+        """
+        return the config, only refetching it when the revision has changed
+
+        revision may be passed in when already known (ie: from a batch)
+        """
+        if revision is None:
+            revision = await self.get_config_revision()
+        if not self._is_cached_config_current(revision, projection):
+            self._set_cached_config(await self.get_config(projection), projection)
+        return self._cached_config
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_identity_key(self):
+        response = await self._exec_php(self._get_identity_key_script())
+        return self._get_identity_key_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    async def get_cached_identity(self, key=None):
+        """
+        return the system_info and host_firmware_version, only refetching them
+        when the boottime or config revision has changed
+
+        key may be passed in when already known (ie: from a batch)
+        """
+        if key is None:
+            key = await self.get_identity_key()
+        if not self._is_cached_identity_current(key):
+            results = await self.exec_php_batch(IDENTITY_CALLS)
+            identity = {name: batch_result(results, name) for name in IDENTITY_CALLS}
+            self._set_cached_identity(identity, key)
+        return self._cached_identity
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_interfaces(self):
+        return await self._get_config_section("interfaces")
+
+    @_apply_timeout
+    @_log_errors
+    async def enable_filter_rule_by_tracker(self, tracker):
+        config = await self._get_config()
+        if self._set_filter_rule_disabled(config, tracker, False):
+            await self._restore_config_section("filter", config["filter"])
+
+    @_apply_timeout
+    @_log_errors
+    async def disable_filter_rule_by_tracker(self, tracker):
+        config = await self._get_config()
+        if self._set_filter_rule_disabled(config, tracker, True):
+            await self._restore_config_section("filter", config["filter"])
+
+    @_apply_timeout
+    @_log_errors
+    async def enable_nat_port_forward_rule_by_created_time(self, created_time):
+        if created_time is None:
+            return
+        config = await self._get_config()
+        if self._set_nat_port_forward_rule_disabled(config, created_time, False):
+            await self._restore_config_section("nat", config["nat"])
+
+    @_apply_timeout
+    @_log_errors
+    async def disable_nat_port_forward_rule_by_created_time(self, created_time):
+        if created_time is None:
+            return
+        config = await self._get_config()
+        if self._set_nat_port_forward_rule_disabled(config, created_time, True):
+            await self._restore_config_section("nat", config["nat"])
+
+    @_apply_timeout
+    @_log_errors
+    async def enable_nat_outbound_rule_by_created_time(self, created_time):
+        if created_time is None:
+            return
+        config = await self._get_config()
+        if self._set_nat_outbound_rule_disabled(config, created_time, False):
+            await self._restore_config_section("nat", config["nat"])
+
+    @_apply_timeout
+    @_log_errors
+    async def disable_nat_outbound_rule_by_created_time(self, created_time):
+        if created_time is None:
+            return
+        config = await self._get_config()
+        if self._set_nat_outbound_rule_disabled(config, created_time, True):
+            await self._restore_config_section("nat", config["nat"])
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_arp_table(self, resolve_hostnames=False):
+        response = await self._exec_php(self._get_arp_table_script(resolve_hostnames))
+        return self._get_arp_table_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    async def set_default_gateway(self, gateway, ip_version="4"):
+        await self._exec_php(self._set_default_gateway_script(gateway, ip_version))
+
+    @_apply_timeout
+    @_log_errors
+    async def delete_arp_entry(self, ip):
+        if len(ip) < 1:
+            return
+        await self._exec_php(self._delete_arp_entry_script(ip))
+
+    @_apply_timeout
+    @_log_errors
+    async def delete_arp_entries(self, ips):
+        """delete the arp entries of multiple ips in a single request"""
+        ips = [ip for ip in ips if len(ip) > 0]
+        if len(ips) < 1:
+            return {}
+        response = await self._exec_php(self._delete_arp_entries_script(ips))
+        return self._delete_arp_entries_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    async def reset_state_table(self):
+        # no response is expected on success since all connections are closed
+        await self._exec_php(self._reset_state_table_script())
+
+    @_apply_timeout
+    @_log_errors
+    async def kill_states(self, source, destination=None):
+        await self._exec_php(self._kill_states_script(source, destination))
+
+    @_apply_timeout
+    @_log_errors
+    async def system_reboot(self, type="normal"):
+        """
+        type = normal = simple reboot
+        type = reroot = a reroot reboot
+        type = fsck = perform an fsck on next boot
+        """
+        try:
+            await self._exec_php(self._system_reboot_script(type))
+        except ExpatError:
+            # ignore response failures because the system is going down
+            pass
+
+    @_apply_timeout
+    @_log_errors
+    async def system_halt(self):
+        try:
+            await self._exec_php(self._system_halt_script())
+        except ExpatError:
+            # ignore response failures because the system is going down
+            pass
+
+    @_apply_timeout
+    @_log_errors
+    async def send_wol(self, interface, mac):
+        """
+        interface should be wan, lan, opt1, opt2 etc, not the description
+        """
+        response = await self._exec_php(self._send_wol_script(interface, mac))
+        return self._send_wol_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_services(self):
+        response = await self._exec_php(self._get_services_script())
+        return self._get_services_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_service_is_running(self, service_name, service={}):
+        response = await self._exec_php(
+            self._get_service_is_running_script(service_name, service)
+        )
+        return self._get_service_is_running_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    async def start_service(self, service_name, service={}):
+        await self._exec_php(self._start_service_script(service_name, service))
+
+    @_apply_timeout
+    @_log_errors
+    async def stop_service(self, service_name, service={}):
+        await self._exec_php(self._stop_service_script(service_name, service))
+
+    @_apply_timeout
+    @_log_errors
+    async def restart_service(self, service_name, service={}):
+        await self._exec_php(self._restart_service_script(service_name, service))
+
+    @_apply_timeout
+    @_log_errors
+    async def restart_service_if_running(self, service_name, service={}):
+        await self._exec_php(
+            self._restart_service_if_running_script(service_name, service)
+        )
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_dhcp_leases(self, dns_lookups=None):
+        response = await self._exec_php(self._get_dhcp_leases_script(dns_lookups))
+        return self._get_dhcp_leases_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_dhcp_leases_delta(self, generation=None, dns_lookups=None):
+        """
+        return the leases changed since generation (as returned by a previous
+        call), see _get_dhcp_leases_delta_script for the format
+        """
+        response = await self._exec_php(
+            self._get_dhcp_leases_delta_script(generation, dns_lookups)
+        )
+        return self._get_dhcp_leases_delta_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_carp_status(self):
+        response = await self._exec_php(self._get_carp_status_script())
+        return self._get_carp_status_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_carp_interfaces(self):
+        response = await self._exec_php(self._get_carp_interfaces_script())
+        return self._get_carp_interfaces_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_carp_state(self):
+        response = await self._exec_php(self._get_carp_state_script())
+        return self._get_carp_state_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_telemetry(self, sections=None):
+        response = await self._exec_php(self._get_telemetry_script(sections))
+        return self._get_telemetry_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_interface_counters(self):
+        """byte/packet counters of all configured interfaces, keyed by ifname"""
+        response = await self._exec_php(self._get_interface_counters_script())
+        return self._get_interface_counters_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def are_notices_pending(self, category="all"):
+        response = await self._exec_php(self._are_notices_pending_script(category))
+        return self._are_notices_pending_response(response)
+
+    @_coalesce
+    @_apply_timeout
+    @_log_errors
+    async def get_notices(self, category="all"):
+        response = await self._exec_php(self._get_notices_script(category))
+        return self._get_notices_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    async def get_pending_notices(self, category="all"):
+        response = await self._exec_php(self._get_pending_notices_script(category))
+        return self._get_pending_notices_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    async def file_notice(
+        self, id, notice, category="General", url="", priority=1, local_only=False
+    ):
+        """
+        /****f* notices/file_notice
+        * NAME
+        *   file_notice
+        * INPUTS
+        *       $id, $notice, $category, $url, $priority, $local_only
+        * RESULT
+        *   Files a notice and kicks off the various alerts, smtp, telegram, pushover, system log, LED's, etc.
+        *   If $local_only is true then the notice is not sent to external places (smtp, telegram, pushover)
+        ******/
+        function file_notice($id, $notice, $category = "General", $url = "", $priority = 1, $local_only = false)
+        """
+        response = await self._exec_php(
+            self._file_notice_script(id, notice, category, url, priority, local_only)
+        )
+        return self._file_notice_response(response)
+
+    @_apply_timeout
+    @_log_errors
+    async def close_notice(self, id):
+        """
+        id = "all" to wipe everything
+        """
+        response = await self._exec_php(self._close_notice_script(id))
+        return self._close_notice_response(response)
@@ -24,10 +24,20 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import slugify
 from homeassistant.util.dt import utc_from_timestamp
 
-from . import CoordinatorEntityManager, PfSenseEntity, dict_get
+from . import (
+    CoordinatorEntityManager,
+    PfSenseEntity,
+    dict_get,
+    index_get,
+    normalize_filesystem_device_name,
+)
 from .const import (
-    COORDINATOR,
+    COORDINATORS,
     COUNT,
+    DATA_DOMAIN_CARP,
+    DATA_DOMAIN_DHCP,
+    DATA_DOMAIN_INTERFACE_COUNTERS,
+    DATA_DOMAIN_TELEMETRY,
     DATA_PACKETS,
     DATA_RATE_PACKETS_PER_SECOND,
     DOMAIN,
@@ -47,9 +57,14 @@ async def async_setup_entry(
     @callback
     def process_entities_callback(hass, config_entry):
         data = hass.data[DOMAIN][config_entry.entry_id]
-        coordinator = data[COORDINATOR]
+        coordinator = data[COORDINATORS][DATA_DOMAIN_TELEMETRY]
+        counters_coordinator = data[COORDINATORS][DATA_DOMAIN_INTERFACE_COUNTERS]
         state = coordinator.data
-        resources = [sensor_id for sensor_id in SENSOR_TYPES]
+        resources = [
+            sensor_id
+            for sensor_id in SENSOR_TYPES
+            if sensor_id.startswith("telemetry.")
+        ]
 
         entities = []
 
@@ -68,9 +83,6 @@ async def async_setup_entry(
                 "telemetry.system.load_average.fifteen_minute",
                 "telemetry.system.temp",
                 "telemetry.system.boottime",
-                # "dhcp_stats.leases.total",
-                "dhcp_stats.leases.online",
-                # "dhcp_stats.leases.offline",
             ]:
                 enabled_default = True
 
@@ -103,32 +115,6 @@ async def async_setup_entry(
             )
             entities.append(entity)
 
-        # carp interfaces
-        for interface in state["carp_interfaces"]:
-            uniqid = interface["uniqid"]
-            state_class = None
-            native_unit_of_measurement = None
-            icon = "mdi:check-network-outline"
-            enabled_default = True
-            # entity_category=ENTITY_CATEGORY_DIAGNOSTIC,
-
-            entity = PfSenseCarpInterfaceSensor(
-                config_entry,
-                coordinator,
-                SensorEntityDescription(
-                    key=f"carp.interface.{uniqid}",
-                    name="CARP Interface Status {} ({})".format(
-                        uniqid, interface["descr"]
-                    ),
-                    native_unit_of_measurement=native_unit_of_measurement,
-                    icon=icon,
-                    state_class=state_class,
-                    # entity_category=entity_category,
-                ),
-                True,
-            )
-            entities.append(entity)
-
         # interfaces
         for interface_name in dict_get(state, "telemetry.interfaces", {}).keys():
             interface = state["telemetry"]["interfaces"][interface_name]
@@ -213,9 +199,14 @@ async def async_setup_entry(
                 if icon is None:
                     icon = "mdi:gauge"
 
+                # counters and rates are refreshed by their own coordinator
+                interface_coordinator = counters_coordinator
+                if property == "status":
+                    interface_coordinator = coordinator
+
                 entity = PfSenseInterfaceSensor(
                     config_entry,
-                    coordinator,
+                    interface_coordinator,
                     SensorEntityDescription(
                         key="telemetry.interface.{}.{}".format(
                             interface["ifname"], property
@@ -327,18 +318,85 @@ async def async_setup_entry(
 
         return entities
 
-    cem = CoordinatorEntityManager(
-        hass,
-        hass.data[DOMAIN][config_entry.entry_id][COORDINATOR],
-        config_entry,
-        process_entities_callback,
-        async_add_entities,
-    )
-    cem.process_entities()
+    @callback
+    def process_carp_entities_callback(hass, config_entry):
+        data = hass.data[DOMAIN][config_entry.entry_id]
+        coordinator = data[COORDINATORS][DATA_DOMAIN_CARP]
+        state = coordinator.data
 
+        entities = []
 
-def normalize_filesystem_device_name(device_name):
-    return device_name.replace("/", "_slash_").strip("_")
+        # carp interfaces
+        for interface in state["carp_interfaces"]:
+            uniqid = interface["uniqid"]
+            state_class = None
+            native_unit_of_measurement = None
+            icon = "mdi:check-network-outline"
+            enabled_default = True
+            # entity_category=ENTITY_CATEGORY_DIAGNOSTIC,
+
+            entity = PfSenseCarpInterfaceSensor(
+                config_entry,
+                coordinator,
+                SensorEntityDescription(
+                    key=f"carp.interface.{uniqid}",
+                    name="CARP Interface Status {} ({})".format(
+                        uniqid, interface["descr"]
+                    ),
+                    native_unit_of_measurement=native_unit_of_measurement,
+                    icon=icon,
+                    state_class=state_class,
+                    # entity_category=entity_category,
+                ),
+                True,
+            )
+            entities.append(entity)
+
+        return entities
+
+    @callback
+    def process_dhcp_entities_callback(hass, config_entry):
+        data = hass.data[DOMAIN][config_entry.entry_id]
+        coordinator = data[COORDINATORS][DATA_DOMAIN_DHCP]
+
+        entities = []
+
+        for sensor_type in SENSOR_TYPES:
+            if not sensor_type.startswith("dhcp_stats."):
+                continue
+
+            enabled_default = False
+            if sensor_type in [
+                # "dhcp_stats.leases.total",
+                "dhcp_stats.leases.online",
+                # "dhcp_stats.leases.offline",
+            ]:
+                enabled_default = True
+
+            entity = PfSenseStaticKeySensor(
+                config_entry,
+                coordinator,
+                SENSOR_TYPES[sensor_type],
+                enabled_default,
+            )
+            entities.append(entity)
+
+        return entities
+
+    coordinators = hass.data[DOMAIN][config_entry.entry_id][COORDINATORS]
+    for data_domain, callback_func in [
+        (DATA_DOMAIN_TELEMETRY, process_entities_callback),
+        (DATA_DOMAIN_CARP, process_carp_entities_callback),
+        (DATA_DOMAIN_DHCP, process_dhcp_entities_callback),
+    ]:
+        cem = CoordinatorEntityManager(
+            hass,
+            coordinators[data_domain],
+            config_entry,
+            callback_func,
+            async_add_entities,
+        )
+        cem.process_entities()
 
 
 class PfSenseSensor(PfSenseEntity, SensorEntity):
@@ -420,13 +478,8 @@ class PfSenseStaticKeySensor(PfSenseSensor):
 class PfSenseFilesystemSensor(PfSenseSensor):
     def _pfsense_get_filesystem(self):
         state = self.coordinator.data
-        found = None
-        for filesystem in state["telemetry"]["filesystems"]:
-            device_clean = normalize_filesystem_device_name(filesystem["device"])
-            if self.entity_description.key == f"telemetry.filesystems.{device_clean}":
-                found = filesystem
-                break
-        return found
+        device_clean = self.entity_description.key.split(".", 2)[2]
+        return index_get(state, "filesystems", device_clean)
 
     @property
     def available(self) -> bool:
@@ -461,13 +514,8 @@ class PfSenseInterfaceSensor(PfSenseSensor):
 
     def _pfsense_get_interface(self):
         state = self.coordinator.data
-        found = None
         interface_name = self._pfsense_get_interface_name()
-        for i_interface_name in state["telemetry"]["interfaces"].keys():
-            if i_interface_name == interface_name:
-                found = state["telemetry"]["interfaces"][i_interface_name]
-                break
-        return found
+        return state["telemetry"]["interfaces"].get(interface_name)
 
     @property
     def available(self) -> bool:
@@ -511,13 +559,8 @@ class PfSenseCarpInterfaceSensor(PfSenseSensor):
 
     def _pfsense_get_interface(self):
         state = self.coordinator.data
-        found = None
         interface_name = self._pfsense_get_interface_name()
-        for i_interface in state["carp_interfaces"]:
-            if i_interface["uniqid"] == interface_name:
-                found = i_interface
-                break
-        return found
+        return index_get(state, "carp_interfaces", interface_name)
 
     @property
     def extra_state_attributes(self):
@@ -568,23 +611,13 @@ class PfSenseGatewaySensor(PfSenseSensor):
 
     def _pfsense_get_gateway(self):
         state = self.coordinator.data
-        found = None
         gateway_name = self._pfsense_get_gateway_name()
-        for i_gateway_name in state["telemetry"]["gateways"].keys():
-            if i_gateway_name == gateway_name:
-                found = state["telemetry"]["gateways"][i_gateway_name]
-                break
-        return found
+        return state["telemetry"]["gateways"].get(gateway_name)
 
     def _pfsense_get_gateway_details(self):
         state = self.coordinator.data
-        found = None
         gateway_name = self._pfsense_get_gateway_name()
-        for i_gateway_name in state["telemetry"]["gateways_detail"].keys():
-            if i_gateway_name == gateway_name:
-                found = state["telemetry"]["gateways_detail"][i_gateway_name]
-                break
-        return found
+        return state["telemetry"]["gateways_detail"].get(gateway_name)
 
     @property
     def available(self) -> bool:
@@ -14,6 +14,7 @@ from .const import (
     SERVICE_EXEC_PHP,
     SERVICE_FILE_NOTICE,
     SERVICE_KILL_STATES,
+    SERVICE_REFRESH_FIRMWARE_UPDATE_INFO,
     SERVICE_RESET_STATE_TABLE,
     SERVICE_RESTART_SERVICE,
     SERVICE_SEND_WOL,
@@ -206,3 +207,10 @@ class ServiceRegistrar:
             ),
             service_func=_async_send_service,
         )
+
+        self.hass.services.async_register(
+            domain=DOMAIN,
+            service=SERVICE_REFRESH_FIRMWARE_UPDATE_INFO,
+            schema=cv.make_entity_service_schema({}),
+            service_func=_async_send_service,
+        )
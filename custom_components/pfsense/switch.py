@@ -14,8 +14,14 @@ from homeassistant.helpers import entity_platform
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import slugify
 
-from . import CoordinatorEntityManager, PfSenseEntity, dict_get
-from .const import COORDINATOR, DOMAIN
+from . import CoordinatorEntityManager, PfSenseEntity, dict_get, index_get
+from .const import (
+    COORDINATORS,
+    DATA_DOMAIN_CONFIG,
+    DATA_DOMAIN_SERVICES,
+    DOMAIN,
+)
+from .pypfsense import PRIORITY_USER
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,7 +36,7 @@ async def async_setup_entry(
     @callback
     def process_entities_callback(hass, config_entry):
         data = hass.data[DOMAIN][config_entry.entry_id]
-        coordinator = data[COORDINATOR]
+        coordinator = data[COORDINATORS][DATA_DOMAIN_CONFIG]
         state = coordinator.data
 
         entities = []
@@ -157,6 +163,16 @@ async def async_setup_entry(
                     )
                     entities.append(entity)
 
+        return entities
+
+    @callback
+    def process_services_entities_callback(hass, config_entry):
+        data = hass.data[DOMAIN][config_entry.entry_id]
+        coordinator = data[COORDINATORS][DATA_DOMAIN_SERVICES]
+        state = coordinator.data
+
+        entities = []
+
         # services
         for service in state["services"]:
             for property in ["status"]:
@@ -193,14 +209,19 @@ async def async_setup_entry(
                 entities.append(entity)
         return entities
 
-    cem = CoordinatorEntityManager(
-        hass,
-        hass.data[DOMAIN][config_entry.entry_id][COORDINATOR],
-        config_entry,
-        process_entities_callback,
-        async_add_entities,
-    )
-    cem.process_entities()
+    coordinators = hass.data[DOMAIN][config_entry.entry_id][COORDINATORS]
+    for data_domain, callback_func in [
+        (DATA_DOMAIN_CONFIG, process_entities_callback),
+        (DATA_DOMAIN_SERVICES, process_services_entities_callback),
+    ]:
+        cem = CoordinatorEntityManager(
+            hass,
+            coordinators[data_domain],
+            config_entry,
+            callback_func,
+            async_add_entities,
+        )
+        cem.process_entities()
 
 
 class PfSenseSwitch(PfSenseEntity, SwitchEntity):
@@ -234,15 +255,8 @@ class PfSenseFilterSwitch(PfSenseSwitch):
 
     def _pfsense_get_rule(self):
         state = self.coordinator.data
-        found = None
         tracker = self._pfsense_get_tracker()
-        for rule in state["config"]["filter"]["rule"]:
-            if "tracker" not in rule.keys():
-                continue
-            if rule["tracker"] == tracker:
-                found = rule
-                break
-        return found
+        return index_get(state, "filter_rules", tracker)
 
     @property
     def available(self) -> bool:
@@ -268,10 +282,9 @@ class PfSenseFilterSwitch(PfSenseSwitch):
         if rule is None:
             return
         tracker = self._pfsense_get_tracker()
-        client = self._get_pfsense_client()
-        await self.hass.async_add_executor_job(
-            client.enable_filter_rule_by_tracker, tracker
-        )
+        client = self._get_pfsense_async_client()
+        with client.priority(PRIORITY_USER):
+            await client.enable_filter_rule_by_tracker(tracker)
         await self.coordinator.async_refresh()
 
     async def async_turn_off(self, **kwargs):
@@ -280,10 +293,9 @@ class PfSenseFilterSwitch(PfSenseSwitch):
         if rule is None:
             return
         tracker = self._pfsense_get_tracker()
-        client = self._get_pfsense_client()
-        await self.hass.async_add_executor_job(
-            client.disable_filter_rule_by_tracker, tracker
-        )
+        client = self._get_pfsense_async_client()
+        with client.priority(PRIORITY_USER):
+            await client.disable_filter_rule_by_tracker(tracker)
         await self.coordinator.async_refresh()
 
 
@@ -296,20 +308,9 @@ class PfSenseNatSwitch(PfSenseSwitch):
 
     def _pfsense_get_rule(self):
         state = self.coordinator.data
-        found = None
         tracker = self._pfsense_get_tracker()
         rule_type = self._pfsense_get_rule_type()
-        rules = []
-        if rule_type == "nat_port_forward":
-            rules = state["config"]["nat"]["rule"]
-        if rule_type == "nat_outbound":
-            rules = state["config"]["nat"]["outbound"]["rule"]
-
-        for rule in rules:
-            if dict_get(rule, "created.time") == tracker:
-                found = rule
-                break
-        return found
+        return index_get(state, f"{rule_type}_rules", tracker)
 
     @property
     def available(self) -> bool:
@@ -335,14 +336,15 @@ class PfSenseNatSwitch(PfSenseSwitch):
         if rule is None:
             return
         tracker = self._pfsense_get_tracker()
-        client = self._get_pfsense_client()
+        client = self._get_pfsense_async_client()
         rule_type = self._pfsense_get_rule_type()
         if rule_type == "nat_port_forward":
             method = client.enable_nat_port_forward_rule_by_created_time
         if rule_type == "nat_outbound":
             method = client.enable_nat_outbound_rule_by_created_time
 
-        await self.hass.async_add_executor_job(method, tracker)
+        with client.priority(PRIORITY_USER):
+            await method(tracker)
         await self.coordinator.async_refresh()
 
     async def async_turn_off(self, **kwargs):
@@ -351,14 +353,15 @@ class PfSenseNatSwitch(PfSenseSwitch):
         if rule is None:
             return
         tracker = self._pfsense_get_tracker()
-        client = self._get_pfsense_client()
+        client = self._get_pfsense_async_client()
         rule_type = self._pfsense_get_rule_type()
         if rule_type == "nat_port_forward":
             method = client.disable_nat_port_forward_rule_by_created_time
         if rule_type == "nat_outbound":
             method = client.disable_nat_outbound_rule_by_created_time
 
-        await self.hass.async_add_executor_job(method, tracker)
+        with client.priority(PRIORITY_USER):
+            await method(tracker)
         await self.coordinator.async_refresh()
 
 
@@ -371,18 +374,9 @@ class PfSenseServiceSwitch(PfSenseSwitch):
 
     def _pfsense_get_service(self):
         state = self.coordinator.data
-        found = None
+        # openvpn services are indexed as "openvpn-<vpnid>"
         service_name = self._pfsense_get_service_name()
-        for service in state["services"]:
-            if service_name.startswith("openvpn"):
-                # [ "openvpn", "<vpnid>""]
-                parts = service_name.split("-")
-                if service["name"] == parts[0] and service["vpnid"] == parts[1]:
-                    found = service
-            elif service["name"] == service_name:
-                found = service
-                break
-        return found
+        return index_get(state, "services", service_name)
 
     @property
     def available(self) -> bool:
@@ -406,17 +400,11 @@ class PfSenseServiceSwitch(PfSenseSwitch):
     async def async_turn_on(self, **kwargs):
         """Turn the entity on."""
         service = self._pfsense_get_service()
-        client = self._get_pfsense_client()
-        await self.hass.async_add_executor_job(
-            client.start_service, service["name"], service
-        )
+        await self._async_client_action("start_service", service["name"], service)
         await self.coordinator.async_refresh()
 
     async def async_turn_off(self, **kwargs):
         """Turn the entity off."""
         service = self._pfsense_get_service()
-        client = self._get_pfsense_client()
-        await self.hass.async_add_executor_job(
-            client.stop_service, service["name"], service
-        )
+        await self._async_client_action("stop_service", service["name"], service)
         await self.coordinator.async_refresh()
@@ -1,6 +1,8 @@
 """pfSense integration."""
 
+import asyncio
 import logging
+import re
 import time
 from typing import Any
 
@@ -14,14 +16,48 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.restore_state import RestoredExtraData
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import slugify
 
 from . import CoordinatorEntityManager, PfSenseEntity, dict_get
-from .const import COORDINATOR, DOMAIN
+from .const import COORDINATORS, DATA_DOMAIN_FIRMWARE, DOMAIN
+from .pypfsense import TRANSPORT_ERRORS
 
 _LOGGER = logging.getLogger(__name__)
 
+# seconds between reads of the upgrade log
+UPGRADE_POLL_INTERVAL = 10
+# stop following an upgrade after this many seconds
+UPGRADE_TIMEOUT = 7200
+# seconds to wait for the reboot that usually follows a finished upgrade
+UPGRADE_REBOOT_TIMEOUT = 300
+
+# [3/15] Fetching pfSense-base-2.7.0.pkg: .......... done
+# [12/60] Upgrading php82 from 8.2.6 to 8.2.8...
+_UPGRADE_STEP_RE = re.compile(r"^\[(\d+)/(\d+)\]\s+(\w+)", re.MULTILINE)
+# written by pfSense-upgrade once it is done
+_UPGRADE_RC_RE = re.compile(r"^__RC=(\d+)", re.MULTILINE)
+
+
+def _upgrade_progress(log: str, progress: int) -> int:
+    """
+    estimate the upgrade progress (0-99) from new upgrade log lines, fetching
+    packages makes up the first 40% and installing them the rest
+    """
+    for match in _UPGRADE_STEP_RE.finditer(log):
+        step, steps, action = int(match[1]), int(match[2]), match[3]
+        if action == "Fetching":
+            value = 40 * step // steps
+        elif steps > 1:
+            # single step groups (the kernel) say nothing about the total
+            value = 40 + 60 * step // steps
+        else:
+            continue
+        progress = max(progress, value)
+
+    return min(progress, 99)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -33,7 +69,11 @@ async def async_setup_entry(
     @callback
     def process_entities_callback(hass, config_entry):
         data = hass.data[DOMAIN][config_entry.entry_id]
-        coordinator = data[COORDINATOR]
+        coordinator = data[COORDINATORS][DATA_DOMAIN_FIRMWARE]
+        # the first firmware check runs in the background
+        if coordinator.data is None:
+            return []
+
         entities = []
         entity = PfSenseFirmwareUpdatesAvailableUpdate(
             config_entry,
@@ -47,11 +87,27 @@ async def async_setup_entry(
         )
         entities.append(entity)
 
+        # one entity per installed package, see get_firmware_update_info
+        packages = dict_get(coordinator.data, "firmware_update_info.packages") or {}
+        for package_name in packages.keys():
+            entity = PfSensePackageUpdate(
+                config_entry,
+                coordinator,
+                UpdateEntityDescription(
+                    key=f"firmware.packages.{package_name}",
+                    name=f"Package {package_name} Updates Available",
+                    entity_category=EntityCategory.DIAGNOSTIC,
+                ),
+                True,
+                package_name,
+            )
+            entities.append(entity)
+
         return entities
 
     cem = CoordinatorEntityManager(
         hass,
-        hass.data[DOMAIN][config_entry.entry_id][COORDINATOR],
+        hass.data[DOMAIN][config_entry.entry_id][COORDINATORS][DATA_DOMAIN_FIRMWARE],
         config_entry,
         process_entities_callback,
         async_add_entities,
@@ -80,7 +136,7 @@ class PfSenseUpdate(PfSenseEntity, UpdateEntity):
         self._attr_supported_features |= (
             UpdateEntityFeature.INSTALL
             # | UpdateEntityFeature.BACKUP
-            # | UpdateEntityFeature.PROGRESS
+            | UpdateEntityFeature.PROGRESS
             # | UpdateEntityFeature.RELEASE_NOTES
             # | UpdateEntityFeature.SPECIFIC_VERSION
         )
@@ -91,6 +147,11 @@ class PfSenseUpdate(PfSenseEntity, UpdateEntity):
 
 
 class PfSenseFirmwareUpdatesAvailableUpdate(PfSenseUpdate):
+    # pid, log offset, boot time, start/finish time and progress of the
+    # upgrade being followed, restored after a restart
+    _upgrade = None
+    _upgrade_task = None
+
     @property
     def available(self):
         state = self.coordinator.data
@@ -132,7 +193,15 @@ class PfSenseFirmwareUpdatesAvailableUpdate(PfSenseUpdate):
     @property
     def in_progress(self):
         """Update installation in progress."""
-        return False
+        if self._upgrade is None:
+            return False
+
+        # 0 would read as not in progress
+        return self._upgrade["progress"] or True
+
+    @property
+    def extra_restore_state_data(self):
+        return RestoredExtraData({"upgrade": self._upgrade})
 
     @property
     def extra_state_attributes(self):
@@ -154,13 +223,150 @@ class PfSenseFirmwareUpdatesAvailableUpdate(PfSenseUpdate):
     def release_url(self):
         return "https://docs.netgate.com/pfsense/en/latest/releases/index.html"
 
-    def install(self, version=None, backup=False):
+    async def async_added_to_hass(self) -> None:
+        """Resume following an upgrade started before a restart."""
+        await super().async_added_to_hass()
+        extra_data = await self.async_get_last_extra_data()
+        if extra_data is None:
+            return
+
+        self._upgrade = extra_data.as_dict().get("upgrade")
+        if self._upgrade is not None:
+            self._start_upgrade_tracking()
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self._upgrade_task is not None:
+            self._upgrade_task.cancel()
+        await super().async_will_remove_from_hass()
+
+    async def async_install(self, version, backup, **kwargs):
         """Install an update."""
-        client = self._get_pfsense_client()
-        pid = client.upgrade_firmware()
-
-        sleep_time = 10
-        running = True
-        while running:
-            time.sleep(sleep_time)
-            running = client.pid_is_running(pid)
+        client = self._get_pfsense_async_client()
+        pid = await client.upgrade_firmware()
+        self._upgrade = {
+            "pid": pid,
+            "offset": 0,
+            "boottime": None,
+            "started": time.time(),
+            "finished": None,
+            "progress": 0,
+        }
+        self.async_write_ha_state()
+        self._start_upgrade_tracking()
+        await asyncio.shield(self._upgrade_task)
+
+    def _start_upgrade_tracking(self):
+        self._upgrade_task = self.hass.async_create_task(self._async_track_upgrade())
+
+    async def _async_track_upgrade(self):
+        client = self._get_pfsense_async_client()
+        cancelled = False
+        try:
+            await self._async_follow_upgrade(client, self._upgrade)
+        except asyncio.CancelledError:
+            # still in progress, followed again once restored
+            cancelled = True
+            raise
+        except Exception as err:
+            _LOGGER.error(
+                f"stopped following the firmware upgrade {err=}, {type(err)=}"
+            )
+        finally:
+            if not cancelled:
+                self._upgrade = None
+                self.async_write_ha_state()
+
+        # the firmware version changed, refetch the identity and update info
+        client.clear_cached_identity()
+        await self.service_refresh_firmware_update_info()
+
+    async def _async_follow_upgrade(self, client, upgrade):
+        """
+        follow the upgrade by reading only the new bytes of its log each poll,
+        sleeping between polls instead of holding an executor thread
+        """
+        while time.time() - upgrade["started"] < UPGRADE_TIMEOUT:
+            await asyncio.sleep(UPGRADE_POLL_INTERVAL)
+            try:
+                progress = await client.get_upgrade_progress(
+                    upgrade["pid"], upgrade["offset"]
+                )
+            except TRANSPORT_ERRORS as err:
+                # the firewall is unreachable while it reboots
+                _LOGGER.debug(f"upgrade progress unavailable {err=}")
+                continue
+
+            if upgrade["boottime"] is None:
+                upgrade["boottime"] = progress["boottime"]
+            elif progress["boottime"] != upgrade["boottime"]:
+                # back from the reboot
+                break
+
+            if upgrade["finished"] is None:
+                upgrade["offset"] = progress["offset"]
+                log = progress["log"]
+                upgrade["progress"] = _upgrade_progress(log, upgrade["progress"])
+                rc = _UPGRADE_RC_RE.search(log)
+                if rc is not None and rc[1] != "0":
+                    _LOGGER.error(f"firmware upgrade failed with exit code {rc[1]}")
+                    break
+                if rc is not None or (
+                    not progress["running"] and progress["offset"] >= progress["size"]
+                ):
+                    upgrade["finished"] = time.time()
+                    upgrade["progress"] = 100
+            elif time.time() - upgrade["finished"] > UPGRADE_REBOOT_TIMEOUT:
+                # finished without a reboot
+                break
+
+            self.async_write_ha_state()
+        else:
+            _LOGGER.warning("stopped following the firmware upgrade, it timed out")
+
+
+class PfSensePackageUpdate(PfSenseUpdate):
+    def __init__(
+        self,
+        config_entry,
+        coordinator: DataUpdateCoordinator,
+        entity_description: UpdateEntityDescription,
+        enabled_default: bool,
+        package_name: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(config_entry, coordinator, entity_description, enabled_default)
+        self._package_name = package_name
+        # visibility only, packages are updated from the pfSense UI
+        self._attr_supported_features = UpdateEntityFeature(0)
+
+    def _get_package(self):
+        packages = dict_get(self.coordinator.data, "firmware_update_info.packages")
+        if not isinstance(packages, dict):
+            return None
+
+        return packages.get(self._package_name)
+
+    @property
+    def available(self):
+        if self._get_package() is None:
+            return False
+
+        return super().available
+
+    @property
+    def device_class(self):
+        return None
+
+    @property
+    def title(self):
+        return self._package_name.removeprefix("pfSense-pkg-")
+
+    @property
+    def installed_version(self):
+        """Version installed and in use."""
+        return (self._get_package() or {}).get("installed_version")
+
+    @property
+    def latest_version(self):
+        """Latest version available for install."""
+        return (self._get_package() or {}).get("version")
@@ -0,0 +1,23 @@
+"""Shared helpers of the pypfsense tests."""
+
+import importlib.util
+from pathlib import Path
+
+PYPFSENSE_PATH = (
+    Path(__file__).parent.parent
+    / "custom_components"
+    / "pfsense"
+    / "pypfsense"
+    / "__init__.py"
+)
+
+
+def _load_pypfsense():
+    # loaded on its own, the component package needs homeassistant
+    spec = importlib.util.spec_from_file_location("pypfsense", PYPFSENSE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+pypfsense = _load_pypfsense()
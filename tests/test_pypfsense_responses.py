@@ -0,0 +1,105 @@
+"""Decode exec_php responses on and off the event loop."""
+
+import asyncio
+import base64
+import json
+import threading
+import zlib
+
+import pytest
+
+from conftest import pypfsense
+
+RESULT = {"data": ["lease"] * 100}
+REAL = json.dumps(RESULT)
+
+
+def _create_async_client(opts):
+    return pypfsense.AsyncClient("https://pfsense.localdomain", "admin", "x", opts)
+
+
+def test_php_response_stats():
+    client = pypfsense.Client("https://pfsense.localdomain", "admin", "x", {})
+    compressed = base64.b64encode(zlib.compress(REAL.encode())).decode()
+    assert client._php_response({"real": REAL}) == RESULT
+    assert client._php_response({"compressed": compressed}) == RESULT
+    assert client.payload_stats == {
+        "responses": 2,
+        "compressed_responses": 1,
+        "raw_bytes": 2 * len(REAL),
+        "transferred_bytes": len(REAL) + len(compressed),
+    }
+
+
+def _exec_php(client):
+    return client._exec_php("")
+
+
+def _exec_php_batch(client):
+    return client.exec_php_batch({"leases": "get_dhcp_leases"})
+
+
+@pytest.mark.parametrize(
+    "call, real, result",
+    [
+        (_exec_php, REAL, RESULT),
+        # the fragments are decoded along with the batch, nothing is left
+        # to parse on the loop afterwards
+        (
+            _exec_php_batch,
+            json.dumps({"leases": {"data": RESULT}}),
+            {"leases": RESULT["data"]},
+        ),
+    ],
+    ids=["exec_php", "exec_php_batch"],
+)
+def test_large_responses_are_decoded_in_the_executor(monkeypatch, call, real, result):
+    decode_php_response = pypfsense._decode_php_response
+    json_loads = json.loads
+    on_loop = []
+
+    def decode(response):
+        on_loop.append(threading.current_thread() is threading.main_thread())
+        return decode_php_response(response)
+
+    def loads(*args, **kwargs):
+        assert threading.current_thread() is not threading.main_thread()
+        return json_loads(*args, **kwargs)
+
+    async def xmlrpc_call(method, *params):
+        return {"real": real}
+
+    monkeypatch.setattr(pypfsense, "_decode_php_response", decode)
+    for opts in ({"library": False}, {"library": False, "decode_threshold": 16}):
+        client = _create_async_client(opts)
+        client._xmlrpc_call = xmlrpc_call
+        if "decode_threshold" in opts:
+            monkeypatch.setattr(json, "loads", loads)
+        assert asyncio.run(call(client)) == result
+
+    assert on_loop == [True, False]
+
+
+def test_concurrent_reads_share_a_request():
+    requests = []
+
+    async def exec_php(script):
+        requests.append(script)
+        await asyncio.sleep(0)
+        if "get_notices(" in script:
+            notices = {"category": "all", "hash": "abc", "pending": False}
+            return {"data": dict(notices, notices=False)}
+        return {"data": [{"name": "dhcpd", "status": True}]}
+
+    async def run():
+        client = _create_async_client({})
+        client._exec_php = exec_php
+        services = await asyncio.gather(client.get_services(), client.get_services())
+        assert services[0] is services[1]
+        assert len(requests) == 1
+
+        # built from the cached notices hash, never shared
+        await asyncio.gather(client.get_pending_notices(), client.get_pending_notices())
+        assert len(requests) == 3
+
+    asyncio.run(run())
@@ -0,0 +1,104 @@
+"""Build every pypfsense php script with sample arguments."""
+
+import inspect
+import re
+
+import pytest
+
+from conftest import pypfsense
+
+
+def _create_client():
+    return pypfsense.Client("https://pfsense.localdomain", "admin", "secret", {})
+
+
+# positional arguments for every _<method>_script, () for no arguments
+SAMPLE_ARGS = {
+    "php": ("$toreturn = [];",),
+    "batch": ({"a": "$toreturn = [];", "b": "$toreturn = 1;"},),
+    "install_library": (),
+    "library_call": ("get_system_info", _create_client()._get_system_info_script()),
+    "get_host_firmware_version": (),
+    "get_firmware_update_info": (False,),
+    "upgrade_firmware": (),
+    "get_upgrade_progress": (1234, 100),
+    "get_system_info": (),
+    "get_config": (["filter"],),
+    "get_config_projection": (pypfsense.RULE_INDEX_PROJECTION,),
+    "get_config_revision": (),
+    "get_identity_key": (),
+    "get_interfaces": (),
+    "get_arp_table": (True,),
+    "get_services": (),
+    "get_service_is_running": ("dhcpd", {"name": "dhcpd"}),
+    "get_dhcp_leases": (True,),
+    "get_dhcp_leases_delta": ("abc", True),
+    "get_carp_status": (),
+    "get_carp_interfaces": (),
+    "get_carp_state": (),
+    "delete_arp_entry": ("192.168.1.10",),
+    "delete_arp_entries": (["192.168.1.10", "fe80::1"],),
+    "get_telemetry": (["cpu", "interfaces"],),
+    "get_interface_counters": (),
+    "are_notices_pending": ("all",),
+    "get_notices": ("all",),
+    "get_pending_notices": ("all",),
+    "exec_command": ("uptime", True),
+    "set_default_gateway": ("WAN_DHCP", "6"),
+    "start_service": ("openvpn", {"name": "openvpn", "mode": "server", "vpnid": 1}),
+    "stop_service": ("dhcpd", {"name": "dhcpd"}),
+    "restart_service": ("dhcpd", {"name": "dhcpd"}),
+    "restart_service_if_running": ("dhcpd", {"name": "dhcpd"}),
+    "reset_state_table": (),
+    "kill_states": ("192.168.1.10", "192.168.1.1"),
+    "system_reboot": ("fsck",),
+    "system_halt": (),
+    "send_wol": ("lan", "00:11:22:33:44:55"),
+    "file_notice": ("hass", "test notice", "General", "", 1, True),
+    "close_notice": ("all",),
+}
+
+
+def _script_methods():
+    return sorted(
+        match[1]
+        for name in dir(pypfsense._BaseClient)
+        if (match := re.fullmatch(r"_(\w+)_script", name))
+    )
+
+
+@pytest.fixture
+def client():
+    return _create_client()
+
+
+def test_sample_args_cover_every_script():
+    assert set(_script_methods()) == set(SAMPLE_ARGS)
+
+
+@pytest.mark.parametrize("method", _script_methods())
+def test_script_builds(client, method):
+    func = getattr(client, f"_{method}_script")
+    script = func(*SAMPLE_ARGS[method])
+    assert isinstance(script, str)
+    assert len(script) > 0
+
+
+@pytest.mark.parametrize("method", _script_methods())
+def test_script_builds_with_defaults(client, method):
+    # the optional arguments keep working at their defaults
+    func = getattr(client, f"_{method}_script")
+    required = [
+        param
+        for param in inspect.signature(func).parameters.values()
+        if param.default is param.empty
+    ]
+    script = func(*SAMPLE_ARGS[method][: len(required)])
+    assert isinstance(script, str)
+
+
+@pytest.mark.parametrize("method", sorted(pypfsense._LIBRARY_METHODS))
+def test_library_method_is_called_from_the_library(client, method):
+    assert hasattr(client, f"_{method}_response")
+    script = getattr(client, f"_{method}_script")(*pypfsense._LIBRARY_METHODS[method])
+    assert f"hass_lib_{method}(" in client._library_call_script(method, script)
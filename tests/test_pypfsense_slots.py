@@ -0,0 +1,88 @@
+"""Hand out the request slots of the async client by priority."""
+
+import asyncio
+
+from conftest import pypfsense
+
+USER = pypfsense.PRIORITY_USER
+TELEMETRY = pypfsense.PRIORITY_TELEMETRY
+BACKGROUND = pypfsense.PRIORITY_BACKGROUND
+
+
+async def _try_acquire(slots, priority):
+    task = asyncio.ensure_future(slots.acquire(priority))
+    await asyncio.sleep(0)
+    return task
+
+
+def test_user_slot_is_reserved():
+    async def run():
+        slots = pypfsense._AsyncPrioritySemaphore(3)
+        await slots.acquire(TELEMETRY)
+        await slots.acquire(TELEMETRY)
+        telemetry = await _try_acquire(slots, TELEMETRY)
+        assert not telemetry.done()
+        user = await _try_acquire(slots, USER)
+        assert user.done()
+
+        slots.release(USER)
+        await asyncio.sleep(0)
+        assert not telemetry.done()
+        slots.release(TELEMETRY)
+        await asyncio.sleep(0)
+        assert telemetry.done()
+
+    asyncio.run(run())
+
+
+def test_background_slots_are_capped():
+    async def run():
+        slots = pypfsense._AsyncPrioritySemaphore(3)
+        await slots.acquire(BACKGROUND)
+        background = await _try_acquire(slots, BACKGROUND)
+        assert not background.done()
+        # the capped waiter does not hold back less capped priorities
+        telemetry = await _try_acquire(slots, TELEMETRY)
+        assert telemetry.done()
+
+        slots.release(TELEMETRY)
+        await asyncio.sleep(0)
+        assert not background.done()
+        slots.release(BACKGROUND)
+        await asyncio.sleep(0)
+        assert background.done()
+
+    asyncio.run(run())
+
+
+def test_waiters_are_woken_by_priority():
+    async def run():
+        slots = pypfsense._AsyncPrioritySemaphore(3)
+        for _ in range(3):
+            await slots.acquire(USER)
+        background = await _try_acquire(slots, BACKGROUND)
+        telemetry = await _try_acquire(slots, TELEMETRY)
+        user = await _try_acquire(slots, USER)
+
+        slots.release(USER)
+        await asyncio.sleep(0)
+        assert user.done() and not telemetry.done() and not background.done()
+        slots.release(USER)
+        await asyncio.sleep(0)
+        assert not telemetry.done()
+        slots.release(USER)
+        await asyncio.sleep(0)
+        # two free slots, telemetry leaves one of them to user actions
+        assert telemetry.done() and not background.done()
+
+    asyncio.run(run())
+
+
+def test_single_slot_is_usable_by_every_priority():
+    async def run():
+        slots = pypfsense._AsyncPrioritySemaphore(1)
+        await slots.acquire(BACKGROUND)
+        slots.release(BACKGROUND)
+        await slots.acquire(TELEMETRY)
+
+    asyncio.run(run())